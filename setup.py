@@ -1,5 +1,9 @@
+from pathlib import Path
+
 from setuptools import setup, find_packages
 
+HERE = Path(__file__).parent
+
 setup(
     name="docs_translator",
     version="0.1.0",
@@ -16,6 +20,9 @@ setup(
         "polib>=1.1.0",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.6.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "black>=22.0.0",
@@ -34,7 +41,7 @@ setup(
     author="Author",
     author_email="author@example.com",
     description="A tool for translating open-source project documentation",
-    long_description=open("README.md", encoding="utf-8").read(),
+    long_description=(HERE / "README.md").read_text(encoding="utf-8"),
     long_description_content_type="text/markdown",
     url="https://github.com/username/docs_translator",
     classifiers=[
@@ -0,0 +1,94 @@
+"""文档项目类型检测模块。
+
+这个模块提供了检测文档目录类型的辅助函数，供命令行接口和Python API共用。
+"""
+
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# 可能存放Sphinx配置文件的子目录
+_SPHINX_SUBDIRS = ('source', 'doc', 'docs')
+
+
+@lru_cache(maxsize=None)
+def probe_sphinx_project(directory: str) -> Tuple[bool, Optional[str], str]:
+    """一次性探测目录的Sphinx项目信息。
+    
+    依次在目录本身以及其中的source、doc、docs子目录中查找conf.py。
+    目录本身只扫描一次，是否为Sphinx项目、配置文件路径和源文件目录都由
+    这一次扫描的结果得出，只有实际存在的子目录才会被进一步扫描。
+    结果按目录路径缓存，命令行接口、Python API和解析器共用同一份结果，
+    重复探测同一目录不会再次访问文件系统。
+    
+    Parameters
+    ----------
+    directory : str
+        要检查的目录路径
+        
+    Returns
+    -------
+    Tuple[bool, Optional[str], str]
+        是否为Sphinx项目、conf.py的路径（未找到时为None）以及源文件目录；
+        conf.py位于子目录中时源文件目录为该子目录，否则存在source子目录时为source子目录，
+        都不满足时为目录本身。目录不存在或无法读取时返回(False, None, directory)
+    """
+    try:
+        with os.scandir(directory) as it:
+            entries = {entry.name: entry.is_dir() for entry in it}
+    except OSError:
+        # 目录不存在、不是目录或没有读取权限时都视为非Sphinx项目
+        return False, None, directory
+    
+    # conf.py不在子目录中时，存在source子目录则以其为源文件目录
+    source_dir = os.path.join(directory, 'source') if entries.get('source') else directory
+    
+    # 检查是否存在conf.py文件（Sphinx配置文件）
+    if 'conf.py' in entries:
+        return True, os.path.join(directory, 'conf.py'), source_dir
+    
+    # 按source、doc、docs的顺序检查实际存在的子目录
+    for name in _SPHINX_SUBDIRS:
+        if not entries.get(name):
+            continue
+        subdir = os.path.join(directory, name)
+        try:
+            with os.scandir(subdir) as it:
+                if any(entry.name == 'conf.py' for entry in it):
+                    return True, os.path.join(subdir, 'conf.py'), subdir
+        except OSError:
+            continue
+    
+    return False, None, source_dir
+
+
+def find_sphinx_conf(directory: str) -> Optional[str]:
+    """查找Sphinx项目的配置文件conf.py。
+    
+    Parameters
+    ----------
+    directory : str
+        要检查的目录路径
+        
+    Returns
+    -------
+    Optional[str]
+        conf.py的路径，未找到时返回None
+    """
+    return probe_sphinx_project(directory)[1]
+
+
+def is_sphinx_project(directory: str) -> bool:
+    """检查指定目录是否为Sphinx项目。
+    
+    Parameters
+    ----------
+    directory : str
+        要检查的目录路径
+        
+    Returns
+    -------
+    bool
+        如果是Sphinx项目则返回True，否则返回False
+    """
+    return probe_sphinx_project(directory)[0]
@@ -0,0 +1,49 @@
+"""JSON序列化辅助模块。
+
+安装了orjson时使用orjson进行序列化和反序列化，否则回退到标准库json。
+两种实现都以UTF-8字节作为序列化结果，且不转义非ASCII字符。
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于是否安装了可选依赖
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """将对象序列化为UTF-8编码的JSON字节串。
+    
+    Parameters
+    ----------
+    obj : Any
+        要序列化的对象
+    
+    Returns
+    -------
+    bytes
+        JSON字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """反序列化JSON字节串或字符串。
+    
+    Parameters
+    ----------
+    data : Union[bytes, str]
+        JSON数据
+    
+    Returns
+    -------
+    Any
+        反序列化得到的对象
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -10,6 +10,7 @@ from .translator import OpenAITranslator, BaseTranslator
 from .parsers import MarkdownParser, SphinxIntlParser, BaseParser
 from .processor import DocumentProcessor
 from .sphinx_intl_processor import SphinxIntlProcessor
+from ._detect import probe_sphinx_project
 
 
 def translate_docs(
@@ -22,7 +23,13 @@ def translate_docs(
     model: str = "gpt-3.5-turbo",
     use_cache: bool = True,
     cache_dir: Optional[str] = None,
-    batch_size: int = 10
+    batch_size: int = 10,
+    concurrency: int = 8,
+    rate_limit_rpm: Optional[int] = None,
+    max_batch_tokens: Optional[int] = 3000,
+    batch_api: bool = False,
+    io_workers: int = 32,
+    use_async: bool = False
 ) -> None:
     """翻译文档目录。
     
@@ -49,7 +56,19 @@ def translate_docs(
     cache_dir : str, optional
         自定义缓存目录，默认为None（使用默认目录）
     batch_size : int, optional
-        批量翻译时每批处理的条目数量，默认为10
+        批量翻译时每批处理的条目数量，默认为10，仅在max_batch_tokens为None或0时生效
+    concurrency : int, optional
+        批量翻译时同时进行的API请求数量，默认为8（设为1时串行）
+    rate_limit_rpm : int, optional
+        每分钟最多发送的API请求数量，默认为None（不限制）
+    max_batch_tokens : int, optional
+        每批翻译请求估算的token上限，较短的文本会合并到同一个请求中，默认为3000
+    batch_api : bool, optional
+        是否通过OpenAI Batch API提交翻译任务，费用更低但最长可能需要24小时完成，默认为False
+    io_workers : int, optional
+        并行读取源文件的线程数，默认为32
+    use_async : bool, optional
+        是否使用asyncio事件循环驱动整个处理流程，默认为False
         
     Raises
     ------
@@ -74,79 +93,56 @@ def translate_docs(
         api_base=api_base,
         model=model,
         use_cache=use_cache,
-        cache_dir=cache_dir
+        cache_dir=cache_dir,
+        concurrency=concurrency,
+        use_batch_api=batch_api,
+        rate_limit_rpm=rate_limit_rpm,
+        max_batch_tokens=max_batch_tokens
     )
     
-    # 创建解析器和处理器
-    is_sphinx = _is_sphinx_project(source_dir)
-    
-    if doc_type == "markdown" or (doc_type == "auto" and not is_sphinx):
-        # Markdown文档
-        parser = MarkdownParser(source_dir)
-        
-        # 创建通用文档处理器
-        processor = DocumentProcessor(
-            parser=parser,
-            translator=translator,
-            output_dir=output_dir,
-            target_lang=target_lang,
-            batch_size=batch_size
-        )
-        
-        # 开始处理
-        processor.process_all()
-        
-    elif doc_type == "sphinx-intl" or (doc_type == "auto" and is_sphinx):
-        # Sphinx文档 + sphinx-intl
-        parser = SphinxIntlParser(source_dir)
-        
-        # 创建sphinx-intl处理器
-        processor = SphinxIntlProcessor(
-            parser=parser,
-            translator=translator,
-            output_dir=output_dir,
-            target_lang=target_lang.replace("-", "_"),  # 将zh-CN转换为zh_CN
-            batch_size=batch_size
-        )
-        
-        # 开始处理
-        processor.process()
-        
-    else:
-        raise ValueError(f"不支持的文档类型: {doc_type}")
-
-
-def _is_sphinx_project(directory: str) -> bool:
-    """检查指定目录是否为Sphinx项目。
-    
-    Parameters
-    ----------
-    directory : str
-        要检查的目录路径
+    try:
+        # 创建解析器和处理器
+        is_sphinx, conf_path, sphinx_source_dir = probe_sphinx_project(source_dir)
         
-    Returns
-    -------
-    bool
-        如果是Sphinx项目则返回True，否则返回False
-    """
-    # 检查是否存在conf.py文件（Sphinx配置文件）
-    conf_path = os.path.join(directory, 'conf.py')
-    if os.path.exists(conf_path):
-        return True
-    
-    # 检查source目录
-    source_dir = os.path.join(directory, 'source')
-    if os.path.isdir(source_dir):
-        conf_path = os.path.join(source_dir, 'conf.py')
-        if os.path.exists(conf_path):
-            return True
-    
-    # 检查doc/docs目录
-    for doc_dir in ['doc', 'docs']:
-        dir_path = os.path.join(directory, doc_dir)
-        if os.path.isdir(dir_path):
-            conf_path = os.path.join(dir_path, 'conf.py')
-            if os.path.exists(conf_path):
-                return True
-    
-    return False
\ No newline at end of file
+        if doc_type == "markdown" or (doc_type == "auto" and not is_sphinx):
+            # Markdown文档
+            parser = MarkdownParser(source_dir)
+            
+            # 创建通用文档处理器
+            processor = DocumentProcessor(
+                parser=parser,
+                translator=translator,
+                output_dir=output_dir,
+                target_lang=target_lang,
+                batch_size=batch_size,
+                io_workers=io_workers,
+                use_async=use_async
+            )
+            
+            # 开始处理
+            processor.process_all()
+            
+        elif doc_type == "sphinx-intl" or (doc_type == "auto" and is_sphinx):
+            # Sphinx文档 + sphinx-intl
+            parser = SphinxIntlParser(
+                source_dir,
+                config_path=conf_path,
+                source_dir=sphinx_source_dir
+            )
+            
+            # 创建sphinx-intl处理器
+            processor = SphinxIntlProcessor(
+                parser=parser,
+                translator=translator,
+                output_dir=output_dir,
+                target_lang=target_lang.replace("-", "_"),  # 将zh-CN转换为zh_CN
+                batch_size=batch_size
+            )
+            
+            # 开始处理
+            processor.process()
+            
+        else:
+            raise ValueError(f"不支持的文档类型: {doc_type}")
+    finally:
+        translator.close()
\ No newline at end of file
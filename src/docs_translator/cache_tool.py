@@ -7,14 +7,17 @@ import os
 import sys
 import argparse
 import logging
-import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator, Tuple
 
 from .translation_cache import TranslationCache
+from . import _json
 
 
 logger = logging.getLogger(__name__)
 
+# 文件大小的显示单位
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
 
 def setup_logger(verbose: bool = False) -> logging.Logger:
     """设置日志记录器。
@@ -34,6 +37,15 @@ def setup_logger(verbose: bool = False) -> logging.Logger:
     logger = logging.getLogger("docs_translator")
     logger.setLevel(log_level)
     
+    # 已配置过处理器时只更新日志级别，避免重复调用时处理器累积导致日志重复输出
+    if logger.handlers:
+        for handler in logger.handlers:
+            handler.setLevel(log_level)
+        return logger
+    
+    # 不再传递给根日志记录器，避免重复输出
+    logger.propagate = False
+    
     # 创建控制台处理器
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
@@ -113,7 +125,7 @@ def parse_args() -> argparse.Namespace:
     # 压缩缓存子命令
     compact_parser = subparsers.add_parser(
         "compact",
-        help="压缩翻译缓存，删除重复项"
+        help="压缩翻译缓存，删除无效条目"
     )
     
     # 公共参数
@@ -195,8 +207,7 @@ def handle_info(cache: TranslationCache) -> None:
     print(f"缓存条目数量: {stats['cache_entries']}")
     
     if stats['cache_entries'] > 0:
-        cache_file_size = os.path.getsize(stats['cache_file']) if os.path.exists(stats['cache_file']) else 0
-        print(f"缓存文件大小: {format_size(cache_file_size)}")
+        print(f"缓存文件大小: {format_size(stats['size_bytes'])}")
         
         # 获取目标语言统计
         langs = cache.get_language_stats()
@@ -235,8 +246,12 @@ def handle_delete(cache: TranslationCache) -> None:
     confirm = input("确定要删除翻译缓存文件吗? 此操作不可撤销! (y/N): ")
     if confirm.lower() in ['y', 'yes']:
         cache_file = cache.cache_path
+        cache.close()
         if os.path.exists(cache_file):
-            os.remove(cache_file)
+            # 同时删除SQLite的预写日志和共享内存文件
+            for path in (cache_file, cache_file + "-wal", cache_file + "-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
             print(f"已删除翻译缓存文件: {cache_file}")
         else:
             print(f"缓存文件不存在: {cache_file}")
@@ -247,6 +262,9 @@ def handle_delete(cache: TranslationCache) -> None:
 def handle_export(cache: TranslationCache, output_file: str) -> None:
     """处理export命令，导出缓存到文件。
     
+    缓存以NDJSON格式逐条写出（每行一个{"k": 键, "v": 值}对象），
+    不需要在内存中复制整个缓存或拼接完整的JSON字符串。
+    
     Parameters
     ----------
     cache : TranslationCache
@@ -256,17 +274,51 @@ def handle_export(cache: TranslationCache, output_file: str) -> None:
     """
     # 确保输出目录存在
     output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
+    if output_dir:
         os.makedirs(output_dir, exist_ok=True)
     
-    # 获取缓存数据
-    data = cache.export_data()
+    # 逐条写入文件
+    count = 0
+    with open(output_file, 'wb') as f:
+        for key, value in cache.iter_entries():
+            f.write(_json.dumps({"k": key, "v": value}) + b"\n")
+            count += 1
     
-    # 写入文件
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"已导出 {count} 个缓存条目到: {output_file}")
+
+
+def _iter_import_file(f) -> Iterator[Tuple[str, str]]:
+    """逐条读取导出文件中的缓存条目。
+    
+    支持NDJSON格式，同时兼容旧版本导出的单个JSON对象格式。
     
-    print(f"已导出 {len(data)} 个缓存条目到: {output_file}")
+    Parameters
+    ----------
+    f : BinaryIO
+        以二进制模式打开的导入文件
+        
+    Yields
+    ------
+    Tuple[str, str]
+        缓存键和对应的翻译结果
+    """
+    first_line = f.readline()
+    try:
+        first = _json.loads(first_line)
+    except ValueError:
+        first = None
+    
+    if not (isinstance(first, dict) and "k" in first and "v" in first):
+        # 旧版本的导出文件是一个完整的JSON对象
+        f.seek(0)
+        yield from _json.loads(f.read()).items()
+        return
+    
+    yield first["k"], first["v"]
+    for line in f:
+        if line.strip():
+            entry = _json.loads(line)
+            yield entry["k"], entry["v"]
 
 
 def handle_import(cache: TranslationCache, input_file: str, merge: bool) -> None:
@@ -286,13 +338,11 @@ def handle_import(cache: TranslationCache, input_file: str, merge: bool) -> None
         return
     
     try:
-        # 读取导入文件
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 导入数据
         old_count = cache.get_stats()['cache_entries']
-        new_count = cache.import_data(data, merge=merge)
+        
+        # 逐行读取并导入数据
+        with open(input_file, 'rb') as f:
+            new_count = cache.import_entries(_iter_import_file(f), merge=merge)
         
         if merge:
             print(f"已合并导入 {new_count - old_count} 个新条目，当前缓存共有 {new_count} 个条目")
@@ -315,7 +365,7 @@ def handle_compact(cache: TranslationCache) -> None:
     new_count = cache.compact()
     
     if new_count < old_count:
-        print(f"已压缩缓存，从 {old_count} 个条目减少到 {new_count} 个条目，删除了 {old_count - new_count} 个重复项")
+        print(f"已压缩缓存，从 {old_count} 个条目减少到 {new_count} 个条目，删除了 {old_count - new_count} 个无效条目")
     else:
         print(f"缓存已是最优状态，包含 {new_count} 个条目")
 
@@ -333,14 +383,11 @@ def format_size(size_bytes: int) -> str:
     str
         格式化后的大小字符串
     """
-    if size_bytes < 1024:
+    # 每1024倍（2的10次方）换一个单位，直接由二进制位数计算单位索引
+    index = min(len(_SIZE_UNITS) - 1, max(0, (size_bytes.bit_length() - 1) // 10))
+    if index == 0:
         return f"{size_bytes} B"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes / 1024:.1f} KB"
-    elif size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes / (1024 * 1024):.1f} MB"
-    else:
-        return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
+    return f"{size_bytes / (1 << (10 * index)):.1f} {_SIZE_UNITS[index]}"
 
 
 if __name__ == "__main__":
@@ -9,10 +9,7 @@ import sys
 import logging
 from typing import Dict, List, Optional, Any
 
-from .translator import OpenAITranslator
-from .parsers import MarkdownParser, SphinxIntlParser
-from .processor import DocumentProcessor
-from .sphinx_intl_processor import SphinxIntlProcessor
+from ._detect import probe_sphinx_project
 from . import __version__
 
 
@@ -34,6 +31,15 @@ def setup_logger(verbose: bool = False) -> logging.Logger:
     logger = logging.getLogger("docs_translator")
     logger.setLevel(log_level)
     
+    # 已配置过处理器时只更新日志级别，避免重复调用时处理器累积导致日志重复输出
+    if logger.handlers:
+        for handler in logger.handlers:
+            handler.setLevel(log_level)
+        return logger
+    
+    # 不再传递给根日志记录器，避免重复输出
+    logger.propagate = False
+    
     # 创建控制台处理器
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
@@ -50,14 +56,29 @@ def setup_logger(verbose: bool = False) -> logging.Logger:
     return logger
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """解析命令行参数。
     
+    先用只包含--version的预解析器快速处理版本查询，
+    只有实际运行时才构造完整的参数解析器。
+    
+    Parameters
+    ----------
+    argv : List[str], optional
+        命令行参数列表，默认为None（使用sys.argv）
+    
     Returns
     -------
     argparse.Namespace
         解析后的命令行参数
     """
+    pre_parser = argparse.ArgumentParser(add_help=False)
+    pre_parser.add_argument("--version", action="store_true")
+    pre_args, _ = pre_parser.parse_known_args(argv)
+    if pre_args.version:
+        print(f"docs_translator {__version__}")
+        sys.exit(0)
+    
     parser = argparse.ArgumentParser(
         description="翻译开源项目文档工具"
     )
@@ -117,7 +138,48 @@ def parse_args() -> argparse.Namespace:
         "--batch-size",
         type=int,
         default=10,
-        help="批量翻译时每批处理的条目数量，默认为10"
+        help="批量翻译时每批处理的条目数量，默认为10（仅在--batch-tokens为0时生效）"
+    )
+    
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=3000,
+        help="每批翻译请求估算的token上限，较短的文本会合并到同一个请求中，默认为3000（设为0时每批固定--batch-size个条目）"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="批量翻译时同时进行的API请求数量，默认为8（设为1时串行）"
+    )
+    
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=None,
+        help="每分钟最多发送的API请求数量，按模型的速率限制设置，默认不限制"
+    )
+    
+    parser.add_argument(
+        "--io-workers",
+        type=int,
+        default=32,
+        help="并行读取源文件的线程数，默认为32"
+    )
+    
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="使用asyncio事件循环驱动读取、解析和翻译的整个流程"
+    )
+    
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="通过OpenAI Batch API提交翻译任务，费用更低但最长可能需要24小时完成"
     )
     
     parser.add_argument(
@@ -132,7 +194,69 @@ def parse_args() -> argparse.Namespace:
         help="自定义缓存目录，默认使用~/.docs_translator/cache"
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="只估算需要翻译的片段、API请求数量和token数量，不调用翻译API"
+    )
+    
+    return parser.parse_args(argv)
+
+
+def dry_run(
+    args: argparse.Namespace,
+    use_sphinx_intl: bool,
+    conf_path: Optional[str] = None,
+    sphinx_source_dir: Optional[str] = None
+) -> int:
+    """估算翻译开销并输出结果，不调用翻译API。
+    
+    Parameters
+    ----------
+    args : argparse.Namespace
+        解析后的命令行参数
+    use_sphinx_intl : bool
+        是否按Sphinx文档处理
+    conf_path : Optional[str], optional
+        探测到的conf.py路径，默认为None
+    sphinx_source_dir : Optional[str], optional
+        探测到的Sphinx源文件目录，默认为None
+        
+    Returns
+    -------
+    int
+        退出代码，0表示成功
+    """
+    from .estimate import estimate_translation
+    from .translation_cache import TranslationCache
+    
+    if use_sphinx_intl:
+        from .parsers.sphinx_intl import SphinxIntlParser
+        parser = SphinxIntlParser(
+            args.source_dir,
+            config_path=conf_path,
+            source_dir=sphinx_source_dir
+        )
+        target_lang = args.target_lang.replace("-", "_")
+    else:
+        from .parsers.markdown import MarkdownParser
+        parser = MarkdownParser(args.source_dir)
+        target_lang = args.target_lang
+    
+    cache = TranslationCache(args.cache_dir) if args.use_cache else None
+    result = estimate_translation(
+        parser, target_lang, args.model, args.batch_size, cache, args.batch_tokens
+    )
+    
+    print("\n翻译开销估算（未调用翻译API）:")
+    print(f"- 待翻译片段: {result['segments']}个")
+    print(f"- 去重后片段: {result['unique']}个")
+    print(f"- 缓存命中: {result['cached']}个")
+    print(f"- 需要翻译: {result['to_translate']}个")
+    batch_desc = f"每批约{args.batch_tokens}个token" if args.batch_tokens > 0 else f"每批{args.batch_size}个"
+    print(f"- 预计API请求: {result['requests']}次（{batch_desc}）")
+    print(f"- 预计输入token: {result['tokens']}（模型: {args.model}）")
+    return 0
 
 
 def main() -> int:
@@ -145,8 +269,22 @@ def main() -> int:
     """
     args = parse_args()
     logger = setup_logger(args.verbose)
+    translator = None
     
     try:
+        # 检查源目录
+        if not os.path.isdir(args.source_dir):
+            logger.error(f"源目录不存在: {args.source_dir}")
+            return 1
+        
+        # 只探测一次项目目录，并将配置文件和源文件目录直接传给Sphinx解析器
+        is_sphinx, conf_path, sphinx_source_dir = probe_sphinx_project(args.source_dir)
+        use_sphinx_intl = args.doc_type == "sphinx-intl" or (args.doc_type == "auto" and is_sphinx)
+        
+        # 只估算翻译开销，不需要API密钥
+        if args.dry_run:
+            return dry_run(args, use_sphinx_intl, conf_path, sphinx_source_dir)
+        
         # 获取API密钥
         api_key = args.api_key or os.environ.get('OPENAI_API_KEY')
         if not api_key:
@@ -157,29 +295,30 @@ def main() -> int:
         api_base = args.api_base or os.environ.get('OPENAI_API_BASE', 'https://api.openai.com/v1')
         
         # 创建翻译器
+        from .translator import OpenAITranslator
         translator = OpenAITranslator(
             api_key=api_key,
             api_base=api_base,
             model=args.model,
             use_cache=args.use_cache,
-            cache_dir=args.cache_dir
+            cache_dir=args.cache_dir,
+            concurrency=args.concurrency,
+            use_batch_api=args.batch_api,
+            rate_limit_rpm=args.rpm,
+            max_batch_tokens=args.batch_tokens
         )
         
-        # 检查源目录
-        if not os.path.isdir(args.source_dir):
-            logger.error(f"源目录不存在: {args.source_dir}")
-            return 1
+        if args.batch_api:
+            logger.warning("已启用Batch API模式：翻译任务将异步执行，最长可能需要24小时才能完成")
         
         # 创建输出目录
         os.makedirs(args.output_dir, exist_ok=True)
         
-        is_sphinx = _is_sphinx_project(args.source_dir)
-        use_sphinx_intl = args.doc_type == "sphinx-intl" or (args.doc_type == "auto" and is_sphinx)
-        
         # 根据文档类型创建解析器和处理器
         if args.doc_type == "markdown" or (args.doc_type == "auto" and not is_sphinx):
             # Markdown文档
             from .parsers.markdown import MarkdownParser
+            from .processor import DocumentProcessor
             parser = MarkdownParser(args.source_dir)
             logger.info("使用Markdown解析器")
             
@@ -189,7 +328,9 @@ def main() -> int:
                 translator=translator,
                 output_dir=args.output_dir,
                 target_lang=args.target_lang,
-                batch_size=args.batch_size
+                batch_size=args.batch_size,
+                io_workers=args.io_workers,
+                use_async=args.use_async
             )
             
             # 开始处理
@@ -199,8 +340,15 @@ def main() -> int:
             # Sphinx文档 + sphinx-intl
             logger.info("使用sphinx-intl处理Sphinx文档")
             
+            from .parsers.sphinx_intl import SphinxIntlParser
+            from .sphinx_intl_processor import SphinxIntlProcessor
+            
             # 创建sphinx-intl解析器
-            parser = SphinxIntlParser(args.source_dir)
+            parser = SphinxIntlParser(
+                args.source_dir,
+                config_path=conf_path,
+                source_dir=sphinx_source_dir
+            )
             
             # 创建sphinx-intl处理器
             processor = SphinxIntlProcessor(
@@ -227,42 +375,9 @@ def main() -> int:
     except Exception as e:
         logger.error(f"处理过程中出错: {str(e)}", exc_info=args.verbose)
         return 1
-
-
-def _is_sphinx_project(directory: str) -> bool:
-    """检查指定目录是否为Sphinx项目。
-    
-    Parameters
-    ----------
-    directory : str
-        要检查的目录路径
-        
-    Returns
-    -------
-    bool
-        如果是Sphinx项目则返回True，否则返回False
-    """
-    # 检查是否存在conf.py文件（Sphinx配置文件）
-    conf_path = os.path.join(directory, 'conf.py')
-    if os.path.exists(conf_path):
-        return True
-    
-    # 检查source目录
-    source_dir = os.path.join(directory, 'source')
-    if os.path.isdir(source_dir):
-        conf_path = os.path.join(source_dir, 'conf.py')
-        if os.path.exists(conf_path):
-            return True
-    
-    # 检查doc/docs目录
-    for doc_dir in ['doc', 'docs']:
-        dir_path = os.path.join(directory, doc_dir)
-        if os.path.isdir(dir_path):
-            conf_path = os.path.join(dir_path, 'conf.py')
-            if os.path.exists(conf_path):
-                return True
-    
-    return False
+    finally:
+        if translator is not None:
+            translator.close()
 
 
 if __name__ == "__main__":
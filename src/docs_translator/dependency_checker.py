@@ -5,7 +5,8 @@
 
 import re
 import logging
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +16,16 @@ class DependencyChecker:
     检查依赖包是否存在，并提供安装建议。
     """
     
+    # pkg_resources.DistributionNotFound 错误
+    _DIST_RE = re.compile(r"DistributionNotFound: The '([^']+)' distribution was not found")
+    # ModuleNotFoundError 错误
+    _MOD_RE = re.compile(r"ModuleNotFoundError: No module named '([^']+)'")
+    # ImportError 错误
+    _IMP_RE = re.compile(r"ImportError: No module named ([^\s]+)")
+    
     @staticmethod
-    def check_error_for_missing_dependencies(error_message: str) -> Optional[List[str]]:
+    @lru_cache(maxsize=256)
+    def check_error_for_missing_dependencies(error_message: str) -> Optional[Tuple[str, ...]]:
         """从错误消息中检查是否有缺失的依赖包。
         
         Parameters
@@ -26,38 +35,36 @@ class DependencyChecker:
             
         Returns
         -------
-        Optional[List[str]]
-            缺失的依赖包列表，如果没有检测到则返回None
+        Optional[Tuple[str, ...]]
+            缺失的依赖包，如果没有检测到则返回None。
+            结果按错误消息缓存，重试时反复检查同一错误不会重新扫描
         """
         missing_deps = []
         
         # 检查 pkg_resources.DistributionNotFound 错误
-        dist_not_found_pattern = r"DistributionNotFound: The '([^']+)' distribution was not found"
-        dist_matches = re.findall(dist_not_found_pattern, error_message)
+        dist_matches = DependencyChecker._DIST_RE.findall(error_message)
         if dist_matches:
             missing_deps.extend(dist_matches)
         
         # 检查 ModuleNotFoundError 错误
-        module_not_found_pattern = r"ModuleNotFoundError: No module named '([^']+)'"
-        module_matches = re.findall(module_not_found_pattern, error_message)
+        module_matches = DependencyChecker._MOD_RE.findall(error_message)
         if module_matches:
             missing_deps.extend(module_matches)
         
         # 检查 ImportError 错误
-        import_error_pattern = r"ImportError: No module named ([^\s]+)"
-        import_matches = re.findall(import_error_pattern, error_message)
+        import_matches = DependencyChecker._IMP_RE.findall(error_message)
         if import_matches:
             missing_deps.extend(import_matches)
         
-        return missing_deps if missing_deps else None
+        return tuple(missing_deps) if missing_deps else None
     
     @staticmethod
-    def get_installation_instructions(missing_deps: List[str]) -> str:
+    def get_installation_instructions(missing_deps: Sequence[str]) -> str:
         """获取安装指令。
         
         Parameters
         ----------
-        missing_deps : List[str]
+        missing_deps : Sequence[str]
             缺失的依赖包列表
             
         Returns
@@ -65,19 +72,13 @@ class DependencyChecker:
         str
             安装指令
         """
-        instructions = "检测到缺少以下依赖包:\n"
-        
-        for dep in missing_deps:
-            instructions += f"  - {dep}\n"
-        
-        instructions += "\n您可以通过以下命令安装这些依赖包:\n\n"
-        
-        for dep in missing_deps:
-            instructions += f"pip install --no-deps {dep}\n"
+        lines = ["检测到缺少以下依赖包:"]
+        lines.extend(f"  - {dep}" for dep in missing_deps)
         
-        instructions += "\n如果上述命令不起作用，您可能需要安装完整依赖:\n\n"
+        lines.append("\n您可以通过以下命令安装这些依赖包:\n")
+        lines.extend(f"pip install --no-deps {dep}" for dep in missing_deps)
         
-        for dep in missing_deps:
-            instructions += f"pip install {dep}\n"
+        lines.append("\n如果上述命令不起作用，您可能需要安装完整依赖:\n")
+        lines.extend(f"pip install {dep}" for dep in missing_deps)
         
-        return instructions
\ No newline at end of file
+        return "\n".join(lines) + "\n"
\ No newline at end of file
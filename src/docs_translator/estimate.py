@@ -0,0 +1,153 @@
+"""翻译开销估算模块。
+
+这个模块在不调用翻译API的情况下统计待翻译文本，
+结合去重和翻译缓存估算需要发送的请求数量和token数量。
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from .parsers.base import BaseParser, _iter_files
+from .parsers.sphinx_intl import SphinxIntlParser
+from .translation_cache import TranslationCache
+from .translator import _DEFAULT_BATCH_TOKENS, _pack_batches
+
+logger = logging.getLogger(__name__)
+
+# 未安装tiktoken时，按平均每个token约4个字符粗略估算
+_CHARS_PER_TOKEN = 4
+
+
+def count_tokens(texts: List[str], model: str) -> int:
+    """统计文本列表的token总数。
+    
+    安装了tiktoken时使用模型对应的编码精确计数，否则按字符数粗略估算。
+    
+    Parameters
+    ----------
+    texts : List[str]
+        要统计的文本列表
+    model : str
+        模型名称
+    
+    Returns
+    -------
+    int
+        token总数
+    """
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return sum(len(encoding.encode(text)) for text in texts)
+    except Exception as e:
+        logger.debug(f"无法使用tiktoken统计token，改为按字符数估算: {str(e)}")
+        return sum(len(text) for text in texts) // _CHARS_PER_TOKEN
+
+
+def collect_texts(parser: BaseParser) -> List[str]:
+    """收集文档中所有需要翻译的文本。
+    
+    对于Sphinx文档，提取.pot文件中的消息；对于其他文档，
+    解析所有文件并收集代码和空白以外的片段。
+    
+    Parameters
+    ----------
+    parser : BaseParser
+        文档解析器
+    
+    Returns
+    -------
+    List[str]
+        需要翻译的文本列表（未去重）
+    """
+    if isinstance(parser, SphinxIntlParser):
+        return _collect_pot_messages(parser)
+    
+    files = list(parser.files)
+    texts = []
+    for file_path, content in zip(files, parser.read_all(files)):
+        texts.extend(
+            segment.content for segment in parser.parse_file(file_path, content)
+            if segment.type not in ['code_block', 'inline_code', 'blank']
+        )
+    return texts
+
+
+def _collect_pot_messages(parser: SphinxIntlParser) -> List[str]:
+    """通过Sphinx的gettext构建器提取.pot文件中的消息。
+    
+    Parameters
+    ----------
+    parser : SphinxIntlParser
+        Sphinx-intl解析器
+    
+    Returns
+    -------
+    List[str]
+        .pot文件中的所有msgid
+    """
+    import polib
+    
+    if not parser.extract_messages():
+        raise RuntimeError("提取消息失败，无法估算翻译开销")
+    
+    msgids = []
+    for pot_path in sorted(_iter_files(parser.pot_dir, ('.pot',))):
+        pot = polib.pofile(pot_path)
+        msgids.extend(entry.msgid for entry in pot if entry.msgid)
+    return msgids
+
+
+def estimate_translation(
+    parser: BaseParser,
+    target_lang: str,
+    model: str,
+    batch_size: int = 10,
+    cache: Optional[TranslationCache] = None,
+    max_batch_tokens: Optional[int] = _DEFAULT_BATCH_TOKENS
+) -> Dict[str, int]:
+    """估算翻译整个文档所需的API请求数量和token数量。
+    
+    不会发送任何翻译请求。相同的文本只计算一次，已在缓存中的文本不计入。
+    
+    Parameters
+    ----------
+    parser : BaseParser
+        文档解析器
+    target_lang : str
+        目标语言
+    model : str
+        模型名称
+    batch_size : int, optional
+        每批翻译的文本数量，默认为10，仅在max_batch_tokens为None或0时生效
+    cache : TranslationCache, optional
+        翻译缓存，默认为None（不考虑缓存）
+    max_batch_tokens : int, optional
+        每批翻译请求估算的token上限，默认为3000，与翻译器按相同方式打包批次
+    
+    Returns
+    -------
+    Dict[str, int]
+        估算结果，包括片段总数、唯一片段数、缓存命中数、
+        需要翻译的片段数、请求数量和输入token数量
+    """
+    texts = collect_texts(parser)
+    unique_texts = list(dict.fromkeys(texts))
+    
+    if cache is not None:
+        _, misses = cache.batch_lookup(unique_texts, target_lang, model)
+        to_translate = [unique_texts[i] for i in misses]
+    else:
+        to_translate = unique_texts
+    
+    return {
+        "segments": len(texts),
+        "unique": len(unique_texts),
+        "cached": len(unique_texts) - len(to_translate),
+        "to_translate": len(to_translate),
+        "requests": len(_pack_batches(to_translate, batch_size, max_batch_tokens)),
+        "tokens": count_tokens(to_translate, model)
+    }
\ No newline at end of file
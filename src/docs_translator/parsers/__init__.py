@@ -3,8 +3,8 @@
 此模块包含用于解析不同类型文档的解析器实现。
 """
 
-from .base import BaseParser
+from .base import BaseParser, Segment
 from .markdown import MarkdownParser
 from .sphinx_intl import SphinxIntlParser
 
-__all__ = ['BaseParser', 'MarkdownParser', 'SphinxIntlParser']
\ No newline at end of file
+__all__ = ['BaseParser', 'Segment', 'MarkdownParser', 'SphinxIntlParser']
\ No newline at end of file
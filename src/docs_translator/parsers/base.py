@@ -4,12 +4,128 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
 import os
+import mmap
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# 超过这个大小的文件通过mmap读取
+_MMAP_THRESHOLD = 64 * 1024
+# 普通读取时使用的缓冲区大小
+_READ_BUFFER_SIZE = 1 << 20
+
+
+class Segment(NamedTuple):
+    """文档片段。
+    
+    Attributes
+    ----------
+    content : str
+        片段内容
+    type : str
+        片段类型，例如'text'、'blank'、'code_block'、'inline_code'或'file'
+    position : int
+        片段在文件中的位置序号
+    """
+    
+    content: str
+    type: str
+    position: int
+
+
+def _read_text(path: str) -> str:
+    """读取UTF-8文本文件。
+    
+    大文件通过mmap映射后一次性解码，避免逐块read的系统调用开销；
+    小文件使用较大的缓冲区一次读完。换行符与文本模式读取一致，统一转换为\\n。
+    
+    Parameters
+    ----------
+    path : str
+        文件路径
+        
+    Returns
+    -------
+    str
+        文件内容
+    """
+    with open(path, 'rb', buffering=_READ_BUFFER_SIZE) as f:
+        if os.fstat(f.fileno()).st_size > _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = mm[:].decode('utf-8')
+        else:
+            text = f.read().decode('utf-8')
+    
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+# 遍历目录时不进入的目录（构建输出和依赖目录）；以.开头的隐藏目录（如.git）同样不进入
+_SKIP_DIRS = frozenset(('_build', 'node_modules', '__pycache__'))
+
+
+def _walk(root: str) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+    """使用os.scandir遍历目录树。
+    
+    查找文档文件和复制静态文件都使用这个函数，跳过的目录只在这里确定。
+    与os.walk类似，但返回DirEntry对象，可以复用其中缓存的stat结果；
+    使用显式栈代替递归，跳过的目录不会被读取。
+    
+    Parameters
+    ----------
+    root : str
+        要遍历的目录路径
+        
+    Yields
+    ------
+    Tuple[str, List[os.DirEntry]]
+        目录相对于root的路径（root本身为空字符串）和其中的文件
+    """
+    stack = [(root, '')]
+    while stack:
+        path, rel_dir = stack.pop()
+        files = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    # 与os.walk一致：不进入符号链接指向的目录
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _SKIP_DIRS and not entry.name.startswith('.'):
+                            stack.append((entry.path, os.path.join(rel_dir, entry.name)))
+                    elif entry.is_file():
+                        files.append(entry)
+        except OSError as e:
+            logger.warning(f"无法读取目录 {path}: {str(e)}")
+            continue
+        yield rel_dir, files
+
+
+def _iter_files(root: str, extensions: Tuple[str, ...]) -> Iterator[str]:
+    """递归查找指定扩展名的文件。
+    
+    Parameters
+    ----------
+    root : str
+        要扫描的目录路径
+    extensions : Tuple[str, ...]
+        要匹配的文件扩展名
+        
+    Yields
+    ------
+    str
+        匹配扩展名的文件路径
+    """
+    for _, files in _walk(root):
+        for entry in files:
+            if entry.name.endswith(extensions):
+                yield entry.path
+
 
 class BaseParser(ABC):
     """文档解析器基类。
@@ -39,6 +155,17 @@ class BaseParser(ABC):
         if not os.path.isdir(self.root_dir):
             raise ValueError(f"目录不存在: {self.root_dir}")
     
+    @cached_property
+    def files(self) -> Tuple[str, ...]:
+        """需要翻译的文件路径，首次访问时查找并缓存。
+        
+        Returns
+        -------
+        Tuple[str, ...]
+            需要翻译的文件的相对路径
+        """
+        return tuple(self.get_all_files())
+    
     @abstractmethod
     def get_all_files(self) -> List[str]:
         """获取所有需要翻译的文件路径。
@@ -50,37 +177,155 @@ class BaseParser(ABC):
         """
         pass
     
+    def _scan_files(self, directory: str, extensions: Tuple[str, ...]) -> List[str]:
+        """递归查找目录下指定扩展名的文件。
+        
+        Parameters
+        ----------
+        directory : str
+            要扫描的目录路径
+        extensions : Tuple[str, ...]
+            要匹配的文件扩展名
+            
+        Returns
+        -------
+        List[str]
+            按路径排序的文件相对路径列表（相对于根目录）
+        """
+        # 相对路径只在起始目录计算一次，之后逐级拼接目录名和文件名
+        rel_root = os.path.relpath(directory, self.root_dir)
+        if rel_root == os.curdir:
+            rel_root = ''
+        
+        return sorted(
+            os.path.join(rel_root, rel_dir, entry.name)
+            for rel_dir, files in _walk(directory)
+            for entry in files
+            if entry.name.endswith(extensions)
+        )
+    
+    def read_file(self, file_path: str) -> str:
+        """读取单个文件的文本内容。
+        
+        Parameters
+        ----------
+        file_path : str
+            相对于根目录的文件路径
+            
+        Returns
+        -------
+        str
+            文件内容
+        """
+        return _read_text(os.path.join(self.root_dir, file_path))
+    
+    def read_all(self, file_paths: List[str], max_workers: int = 32) -> List[str]:
+        """使用线程池并行读取多个文件。
+        
+        大量小文件的读取主要耗时在I/O等待上，并行读取可以显著缩短解析前的准备时间。
+        
+        Parameters
+        ----------
+        file_paths : List[str]
+            相对于根目录的文件路径列表
+        max_workers : int, optional
+            最大读取线程数，默认为32
+            
+        Returns
+        -------
+        List[str]
+            文件内容列表，顺序与输入列表相同
+        """
+        if max_workers <= 1 or len(file_paths) <= 1:
+            return [self.read_file(path) for path in file_paths]
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+            return list(executor.map(self.read_file, file_paths))
+    
+    async def parse_all_async(
+        self,
+        file_paths: List[str],
+        max_concurrency: int = 8
+    ) -> List[Optional[List[Segment]]]:
+        """并发读取并解析多个文件。
+        
+        文件读取和正则切分都在线程池中执行，事件循环本身不会被阻塞，
+        并通过信号量限制同时解析的文件数量。
+        
+        Parameters
+        ----------
+        file_paths : List[str]
+            相对于根目录的文件路径列表
+        max_concurrency : int, optional
+            同时解析的最大文件数量，默认为8
+            
+        Returns
+        -------
+        List[Optional[List[Segment]]]
+            每个文件解析出的片段列表，顺序与输入列表相同；解析失败的文件对应None
+        """
+        loop = asyncio.get_running_loop()
+        max_concurrency = max(1, max_concurrency)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            async def parse_one(file_path: str) -> List[Segment]:
+                async with semaphore:
+                    return await loop.run_in_executor(executor, self.parse_file, file_path)
+            
+            results = await asyncio.gather(
+                *(parse_one(file_path) for file_path in file_paths),
+                return_exceptions=True
+            )
+        
+        parsed = []
+        for file_path, result in zip(file_paths, results):
+            if isinstance(result, Exception):
+                logger.error(f"解析文件 {file_path} 时出错: {str(result)}")
+                parsed.append(None)
+            else:
+                parsed.append(result)
+        return parsed
+    
     @abstractmethod
-    def parse_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_file(self, file_path: str, content: Optional[str] = None) -> List[Segment]:
         """解析单个文件，将其分解为可翻译的片段。
         
         Parameters
         ----------
         file_path : str
             要解析的文件路径
+        content : str, optional
+            预先读取的文件内容，为None时从磁盘读取
             
         Returns
         -------
-        List[Dict[str, Any]]
-            文件中解析出的片段列表，每个片段为一个字典，
-            至少包含'content'和'type'字段
+        List[Segment]
+            文件中解析出的片段列表
         """
         pass
     
     @abstractmethod
-    def build_file(self, file_path: str, translated_segments: List[Dict[str, Any]]) -> str:
+    def build_file(
+        self,
+        file_path: str,
+        translated_segments: List[Segment],
+        out: Optional[TextIO] = None
+    ) -> Optional[str]:
         """根据翻译后的片段重建文件内容。
         
         Parameters
         ----------
         file_path : str
             原始文件路径
-        translated_segments : List[Dict[str, Any]]
+        translated_segments : List[Segment]
             翻译后的片段列表
+        out : TextIO, optional
+            输出流，传入时片段直接逐个写入其中，不在内存中拼接完整内容
             
         Returns
         -------
-        str
-            重建后的文件内容
+        Optional[str]
+            重建后的文件内容；传入out时返回None
         """
         pass
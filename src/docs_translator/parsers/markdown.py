@@ -5,9 +5,107 @@
 
 import os
 import re
-from typing import Dict, List, Optional, Any, Tuple
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, Iterator, List, Optional, Any, TextIO, Tuple
 
-from .base import BaseParser
+from .base import BaseParser, Segment
+
+# 段落之间的空行
+_BLANK_RE = re.compile(r'\n{2,}')
+
+
+def _iter_code_spans(content: str) -> Iterator[Tuple[int, int, str]]:
+    """按顺序划分普通文本、代码块（```...```）和内联代码（`...`）的区间。
+    
+    划分结果与 ``re.split(r'(```[^\\n]*\\n.*?```|`.*?`)', content, flags=re.DOTALL)`` 相同，
+    但只向前扫描一遍：正则在每个未闭合的代码块起点都会扫描到文件末尾，
+    最坏情况下是平方复杂度，这里记住已经确认不存在的闭合标记，保证线性时间。
+    
+    Parameters
+    ----------
+    content : str
+        Markdown文本
+        
+    Yields
+    ------
+    Tuple[int, int, str]
+        区间的起止位置和类型（'text'、'code_block'或'inline_code'），不包含空区间
+    """
+    start = 0
+    # 之后已不存在换行符或代码块闭合标记时，不再重复查找
+    has_newline = True
+    has_fence_close = True
+    
+    while True:
+        i = content.find('`', start)
+        if i == -1:
+            break
+        
+        end = -1
+        if has_newline and has_fence_close and content.startswith('```', i):
+            newline = content.find('\n', i + 3)
+            if newline == -1:
+                has_newline = False
+            else:
+                close = content.find('```', newline + 1)
+                if close == -1:
+                    has_fence_close = False
+                else:
+                    end = close + 3
+                    kind = 'code_block'
+        
+        if end == -1:
+            # 内联代码，以下一个反引号结束
+            close = content.find('`', i + 1)
+            if close == -1:
+                break
+            end = close + 1
+            kind = 'inline_code'
+        
+        if i > start:
+            yield start, i, 'text'
+        yield i, end, kind
+        start = end
+    
+    if start < len(content):
+        yield start, len(content), 'text'
+
+
+def _tokenize(content: str) -> Iterator[Tuple[int, int, str]]:
+    """将Markdown文本划分为连续的片段区间。
+    
+    普通文本按空行进一步切分为段落，空行以及只包含空白字符的文本作为'blank'片段保留，
+    因此按顺序拼接所有片段即可还原原文。
+    
+    Parameters
+    ----------
+    content : str
+        Markdown文本
+        
+    Yields
+    ------
+    Tuple[int, int, str]
+        片段的起止位置和类型（'text'、'blank'、'code_block'或'inline_code'）
+    """
+    for start, end, kind in _iter_code_spans(content):
+        if kind != 'text':
+            yield start, end, kind
+            continue
+        
+        last = start
+        for match in _BLANK_RE.finditer(content, start, end):
+            if match.start() > last:
+                yield last, match.start(), _text_kind(content, last, match.start())
+            yield match.start(), match.end(), 'blank'
+            last = match.end()
+        if end > last:
+            yield last, end, _text_kind(content, last, end)
+
+
+def _text_kind(content: str, start: int, end: int) -> str:
+    """判断文本区间是普通文本还是只包含空白字符。"""
+    return 'text' if content[start:end].strip() else 'blank'
 
 
 class MarkdownParser(BaseParser):
@@ -42,6 +140,8 @@ class MarkdownParser(BaseParser):
         """
         super().__init__(root_dir)
         self.file_extensions = file_extensions or ['.md', '.markdown']
+        # str.endswith可以直接接受元组，预先转换避免每次扫描时重新构造
+        self._ext_tuple = tuple(self.file_extensions)
     
     def get_all_files(self) -> List[str]:
         """获取所有需要翻译的Markdown文件路径。
@@ -51,96 +151,64 @@ class MarkdownParser(BaseParser):
         List[str]
             需要翻译的Markdown文件的相对路径列表
         """
-        markdown_files = []
-        
-        for root, _, files in os.walk(self.root_dir):
-            for file in files:
-                if any(file.endswith(ext) for ext in self.file_extensions):
-                    rel_path = os.path.relpath(os.path.join(root, file), self.root_dir)
-                    markdown_files.append(rel_path)
-        
-        return markdown_files
+        return self._scan_files(self.root_dir, self._ext_tuple)
     
-    def parse_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_file(self, file_path: str, content: Optional[str] = None) -> List[Segment]:
         """解析Markdown文件，将其分解为可翻译的片段。
         
         Parameters
         ----------
         file_path : str
             要解析的Markdown文件路径
+        content : str, optional
+            预先读取的文件内容，为None时从磁盘读取
             
         Returns
         -------
-        List[Dict[str, Any]]
-            文件中解析出的片段列表，每个片段为一个字典，
-            包含'content'、'type'和'position'字段
+        List[Segment]
+            文件中解析出的片段列表
         """
-        full_path = os.path.join(self.root_dir, file_path)
-        
-        with open(full_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        segments = []
-        position = 0
+        if content is None:
+            content = self.read_file(file_path)
         
-        # 分隔代码块和非代码块
-        pattern = r'(```[^\n]*\n.*?```|`.*?`)'
-        parts = re.split(pattern, content, flags=re.DOTALL)
-        
-        for part in parts:
-            if not part:
-                continue
-                
-            # 检查是否为代码块
-            if part.startswith('```') and part.endswith('```'):
-                segments.append({
-                    'content': part,
-                    'type': 'code_block',
-                    'position': position
-                })
-            # 检查是否为内联代码
-            elif part.startswith('`') and part.endswith('`'):
-                segments.append({
-                    'content': part,
-                    'type': 'inline_code',
-                    'position': position
-                })
-            # 普通文本
-            else:
-                # 进一步分割文本为段落
-                paragraphs = re.split(r'(\n{2,})', part)
-                for para in paragraphs:
-                    if para.strip():
-                        segments.append({
-                            'content': para,
-                            'type': 'text',
-                            'position': position
-                        })
-                        position += 1
-            
-            position += 1
-        
-        return segments
+        # 单次扫描划分片段，每个片段只切片一次
+        return [
+            Segment(content[start:end], kind, position)
+            for position, (start, end, kind) in enumerate(_tokenize(content))
+        ]
     
-    def build_file(self, file_path: str, translated_segments: List[Dict[str, Any]]) -> str:
+    def build_file(
+        self,
+        file_path: str,
+        translated_segments: List[Segment],
+        out: Optional[TextIO] = None
+    ) -> Optional[str]:
         """根据翻译后的片段重建Markdown文件内容。
         
         Parameters
         ----------
         file_path : str
             原始Markdown文件路径
-        translated_segments : List[Dict[str, Any]]
+        translated_segments : List[Segment]
             翻译后的片段列表
+        out : TextIO, optional
+            输出流，传入时片段直接逐个写入其中，不在内存中拼接完整内容
             
         Returns
         -------
-        str
-            重建后的Markdown文件内容
+        Optional[str]
+            重建后的Markdown文件内容；传入out时返回None
         """
-        # 按位置排序片段
-        sorted_segments = sorted(translated_segments, key=lambda x: x['position'])
+        # parse_file按位置顺序生成片段，翻译也保持顺序，只有顺序被打乱时才需要排序
+        positions = [segment.position for segment in translated_segments]
+        if any(a > b for a, b in zip(positions, islice(positions, 1, None))):
+            translated_segments = sorted(translated_segments, key=attrgetter('position'))
         
-        # 组合所有片段
-        content = ''.join(segment['content'] for segment in sorted_segments)
+        if out is not None:
+            # 逐个写入输出流，不生成完整的文件内容字符串
+            for segment in translated_segments:
+                out.write(segment.content)
+            return None
         
-        return content
+        # 组合所有片段
+        return ''.join(segment.content for segment in translated_segments)
@@ -9,13 +9,136 @@ import subprocess
 import tempfile
 import shutil
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+from collections import deque
+from functools import cached_property, lru_cache
+from typing import Dict, List, Optional, Any, TextIO, Tuple
 
-from .base import BaseParser
+from .base import BaseParser, Segment, _read_text
+from .markdown import MarkdownParser
+from .._detect import find_sphinx_conf, probe_sphinx_project
 
 logger = logging.getLogger(__name__)
 
 
+# 文件数量少于这个值时串行构建；Sphinx默认的并行分块很小，文件少时并行反而更慢
+_PARALLEL_MIN_FILES = 500
+
+
+def _sphinx_jobs(file_count: int) -> List[str]:
+    """获取传给sphinx-build的并行参数。
+    
+    可以通过SPHINX_JOBS环境变量指定进程数，避免在CI或容器中占用过多CPU；
+    未指定时，文件数量少于_PARALLEL_MIN_FILES则不启用并行，
+    Windows上Sphinx的并行模式不稳定，默认为1，其他平台默认为auto。
+    
+    Parameters
+    ----------
+    file_count : int
+        需要构建的文档文件数量
+    
+    Returns
+    -------
+    List[str]
+        -j参数，不需要并行时为空列表
+    """
+    jobs = os.environ.get("SPHINX_JOBS")
+    if jobs is None:
+        if file_count < _PARALLEL_MIN_FILES:
+            return []
+        jobs = "1" if os.name == "nt" else "auto"
+    return ["-j", jobs]
+
+
+# 命令失败时在日志中保留的最后输出行数
+_OUTPUT_TAIL_LINES = 200
+
+
+def _run_streaming(cmd: List[str]) -> Tuple[int, str]:
+    """执行命令并逐行读取输出。
+    
+    输出逐行写入INFO日志，便于观察长时间运行的sphinx-build的进度；
+    只在内存中保留最后若干行用于报告错误，不会把全部输出缓存在内存中。
+    
+    Parameters
+    ----------
+    cmd : List[str]
+        要执行的命令
+        
+    Returns
+    -------
+    Tuple[int, str]
+        命令的退出代码和最后若干行输出（标准输出和标准错误合并）
+    """
+    tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
+    ) as proc:
+        for line in proc.stdout:
+            line = line.rstrip()
+            logger.info(line)
+            tail.append(line)
+        returncode = proc.wait()
+    return returncode, "\n".join(tail)
+
+
+def _detect_extensions(config_path: Optional[str]) -> Tuple[str, ...]:
+    """根据conf.py确定需要处理的文件扩展名。
+    
+    结果按配置文件路径、修改时间和大小缓存，多次创建解析器时不会重复读取conf.py。
+    
+    Parameters
+    ----------
+    config_path : str, optional
+        Sphinx配置文件(conf.py)的路径
+        
+    Returns
+    -------
+    Tuple[str, ...]
+        文件扩展名元组；启用了Markdown支持时包含.md和.markdown
+    """
+    try:
+        st = os.stat(config_path) if config_path else None
+    except OSError:
+        st = None
+    if st is None:
+        return _detect_extensions_cached(None, None)
+    return _detect_extensions_cached(config_path, (st.st_mtime_ns, st.st_size))
+
+
+@lru_cache(maxsize=None)
+def _detect_extensions_cached(
+    config_path: Optional[str],
+    signature: Optional[Tuple[int, int]]
+) -> Tuple[str, ...]:
+    """读取conf.py并确定文件扩展名，由_detect_extensions调用。
+    
+    Parameters
+    ----------
+    config_path : str, optional
+        存在的Sphinx配置文件路径，不存在时为None
+    signature : Tuple[int, int], optional
+        配置文件的修改时间和大小，仅作为缓存键的一部分
+        
+    Returns
+    -------
+    Tuple[str, ...]
+        文件扩展名元组
+    """
+    extensions = ('.rst', '.txt')
+    
+    # 检查是否启用了Markdown支持
+    if config_path:
+        config_content = _read_text(config_path)
+        if 'myst_parser' in config_content or 'recommonmark' in config_content:
+            extensions += ('.md', '.markdown')
+    
+    return extensions
+
+
 class SphinxIntlParser(BaseParser):
     """基于sphinx-intl的Sphinx文档解析器。
     
@@ -38,9 +161,16 @@ class SphinxIntlParser(BaseParser):
         存储.pot文件的目录路径
     locale_dir : str
         存储翻译文件的目录路径
+    doctree_dir : str
+        跨运行保留的Sphinx doctree缓存目录
     """
     
-    def __init__(self, root_dir: str, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        root_dir: str,
+        config_path: Optional[str] = None,
+        source_dir: Optional[str] = None
+    ):
         """初始化Sphinx-intl解析器。
         
         Parameters
@@ -49,27 +179,42 @@ class SphinxIntlParser(BaseParser):
             Sphinx文档的根目录
         config_path : str, optional
             Sphinx配置文件(conf.py)的路径，默认为None，将自动查找
+        source_dir : str, optional
+            Sphinx源文件目录，默认为None，将根据配置文件位置确定
         """
         super().__init__(root_dir)
         
-        self.file_extensions = ['.rst', '.txt']
+        # 两者都未指定时只探测一次项目目录
+        if config_path is None and source_dir is None:
+            _, config_path, source_dir = probe_sphinx_project(self.root_dir)
         
         # 查找conf.py文件
         if config_path:
             self.config_path = os.path.abspath(config_path)
         else:
             self.config_path = self._find_config()
+        self._source_dir = os.path.abspath(source_dir) if source_dir else None
         
         # 设置pot和locale目录
         self.pot_dir = os.path.join(self.root_dir, "_build", "gettext")
+        # 跨运行保留Sphinx的doctree缓存，只重新解析有变化的文件
+        self.doctree_dir = os.path.join(self.root_dir, "_build", ".doctrees")
         self.locale_dir = os.path.join(self.root_dir, "locale")
         
-        # 检查是否启用了Markdown支持
-        if self.config_path and os.path.exists(self.config_path):
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config_content = f.read()
-                if 'myst_parser' in config_content or 'recommonmark' in config_content:
-                    self.file_extensions.extend(['.md', '.markdown'])
+        # 根据conf.py确定文件扩展名；str.endswith可以直接接受元组，扫描时直接使用
+        self._ext_tuple = _detect_extensions(self.config_path)
+        self.file_extensions = list(self._ext_tuple)
+    
+    @cached_property
+    def _md_delegate(self) -> MarkdownParser:
+        """处理Markdown文件的解析器，首次使用时创建并在之后复用。
+        
+        Returns
+        -------
+        MarkdownParser
+            与当前解析器共用根目录的Markdown解析器
+        """
+        return MarkdownParser(self.root_dir)
     
     def _find_config(self) -> Optional[str]:
         """查找Sphinx配置文件。
@@ -79,27 +224,7 @@ class SphinxIntlParser(BaseParser):
         Optional[str]
             找到的配置文件路径，如果未找到则为None
         """
-        # 首先检查root_dir下是否有conf.py
-        conf_path = os.path.join(self.root_dir, 'conf.py')
-        if os.path.exists(conf_path):
-            return conf_path
-        
-        # 查找source目录
-        source_dir = os.path.join(self.root_dir, 'source')
-        if os.path.isdir(source_dir):
-            conf_path = os.path.join(source_dir, 'conf.py')
-            if os.path.exists(conf_path):
-                return conf_path
-        
-        # 查找doc或docs目录
-        for doc_dir in ['doc', 'docs']:
-            dir_path = os.path.join(self.root_dir, doc_dir)
-            if os.path.isdir(dir_path):
-                conf_path = os.path.join(dir_path, 'conf.py')
-                if os.path.exists(conf_path):
-                    return conf_path
-        
-        return None
+        return find_sphinx_conf(self.root_dir)
     
     def _get_source_dir(self) -> str:
         """获取Sphinx源文件目录。
@@ -109,6 +234,10 @@ class SphinxIntlParser(BaseParser):
         str
             源文件目录路径
         """
+        # 构造时已确定源文件目录，不再访问文件系统
+        if self._source_dir is not None:
+            return self._source_dir
+        
         # 如果conf.py在source目录中，则返回source目录
         if self.config_path and os.path.dirname(self.config_path) != self.root_dir:
             return os.path.dirname(self.config_path)
@@ -129,18 +258,10 @@ class SphinxIntlParser(BaseParser):
         List[str]
             需要翻译的文件的相对路径列表
         """
-        doc_files = []
-        
         # 确定文档目录
         source_dir = self._get_source_dir()
         
-        for root, _, files in os.walk(source_dir):
-            for file in files:
-                if any(file.endswith(ext) for ext in self.file_extensions):
-                    rel_path = os.path.relpath(os.path.join(root, file), self.root_dir)
-                    doc_files.append(rel_path)
-        
-        return doc_files
+        return self._scan_files(source_dir, self._ext_tuple)
     
     def extract_messages(self) -> bool:
         """提取需要翻译的消息到.pot文件。
@@ -162,6 +283,8 @@ class SphinxIntlParser(BaseParser):
             # 构建sphinx-build命令
             cmd = [
                 "sphinx-build",
+                *_sphinx_jobs(len(self.files)),
+                "-d", os.path.join(self.doctree_dir, "gettext"),
                 "-b", "gettext",
                 source_dir,
                 self.pot_dir
@@ -170,15 +293,10 @@ class SphinxIntlParser(BaseParser):
             logger.info(f"执行命令: {' '.join(cmd)}")
             
             # 执行命令
-            result = subprocess.run(
-                cmd, 
-                capture_output=True,
-                text=True,
-                check=False
-            )
+            returncode, output = _run_streaming(cmd)
             
-            if result.returncode != 0:
-                logger.error(f"sphinx-build命令失败: {result.stderr}")
+            if returncode != 0:
+                logger.error(f"sphinx-build命令失败: {output}")
                 return False
                 
             logger.info("提取消息完成")
@@ -188,7 +306,7 @@ class SphinxIntlParser(BaseParser):
             logger.error(f"提取消息失败: {str(e)}")
             return False
     
-    def parse_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_file(self, file_path: str, content: Optional[str] = None) -> List[Segment]:
         """解析Sphinx文档文件，将其分解为可翻译的片段。
         
         由于使用sphinx-intl，这个方法的实现方式与传统解析不同。
@@ -199,33 +317,31 @@ class SphinxIntlParser(BaseParser):
         ----------
         file_path : str
             要解析的文件路径
+        content : str, optional
+            预先读取的文件内容，为None时从磁盘读取
             
         Returns
         -------
-        List[Dict[str, Any]]
+        List[Segment]
             文件中解析出的片段列表
         """
-        full_path = os.path.join(self.root_dir, file_path)
-        
         # 根据文件扩展名选择解析方法
         if file_path.endswith(('.md', '.markdown')):
             # 使用Markdown解析逻辑
-            from .markdown import MarkdownParser
-            md_parser = MarkdownParser(self.root_dir)
-            return md_parser.parse_file(file_path)
+            return self._md_delegate.parse_file(file_path, content)
         else:
             # RST文件，返回整个文件作为一个片段
-            with open(full_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            if content is None:
+                content = self.read_file(file_path)
             
-            return [{
-                'content': content,
-                'type': 'file',
-                'position': 0,
-                'path': file_path
-            }]
+            return [Segment(content, 'file', 0)]
     
-    def build_file(self, file_path: str, translated_segments: List[Dict[str, Any]]) -> str:
+    def build_file(
+        self,
+        file_path: str,
+        translated_segments: List[Segment],
+        out: Optional[TextIO] = None
+    ) -> Optional[str]:
         """根据翻译后的片段重建文件内容。
         
         对于RST文件，由于我们处理的是整个文件，
@@ -235,23 +351,27 @@ class SphinxIntlParser(BaseParser):
         ----------
         file_path : str
             原始文件路径
-        translated_segments : List[Dict[str, Any]]
+        translated_segments : List[Segment]
             翻译后的片段列表
+        out : TextIO, optional
+            输出流，传入时片段直接逐个写入其中，不在内存中拼接完整内容
             
         Returns
         -------
-        str
-            重建后的文件内容
+        Optional[str]
+            重建后的文件内容；传入out时返回None
         """
         # 根据文件扩展名选择重建方法
         if file_path.endswith(('.md', '.markdown')):
             # 使用Markdown重建逻辑
-            from .markdown import MarkdownParser
-            md_parser = MarkdownParser(self.root_dir)
-            return md_parser.build_file(file_path, translated_segments)
+            return self._md_delegate.build_file(file_path, translated_segments, out)
         else:
             # 对于RST文件，直接返回翻译内容
-            return translated_segments[0]['content']
+            content = translated_segments[0].content
+            if out is None:
+                return content
+            out.write(content)
+            return None
     
     def generate_po_files(self, target_lang: str) -> bool:
         """为目标语言生成.po文件。
@@ -281,15 +401,10 @@ class SphinxIntlParser(BaseParser):
             logger.info(f"执行命令: {' '.join(cmd)}")
             
             # 执行命令
-            result = subprocess.run(
-                cmd, 
-                capture_output=True,
-                text=True,
-                check=False
-            )
+            returncode, output = _run_streaming(cmd)
             
-            if result.returncode != 0:
-                logger.error(f"sphinx-intl命令失败: {result.stderr}")
+            if returncode != 0:
+                logger.error(f"sphinx-intl命令失败: {output}")
                 return False
                 
             logger.info("生成.po文件完成")
@@ -321,6 +436,8 @@ class SphinxIntlParser(BaseParser):
             # 构建sphinx-build命令
             cmd = [
                 "sphinx-build",
+                *_sphinx_jobs(len(self.files)),
+                "-d", os.path.join(self.doctree_dir, f"html-{target_lang}"),
                 "-b", "html",
                 "-D", f"language={target_lang}",
                 "-D", f"locale_dirs={self.locale_dir}",
@@ -331,15 +448,10 @@ class SphinxIntlParser(BaseParser):
             logger.info(f"执行命令: {' '.join(cmd)}")
             
             # 执行命令
-            result = subprocess.run(
-                cmd, 
-                capture_output=True,
-                text=True,
-                check=False
-            )
+            returncode, output = _run_streaming(cmd)
             
-            if result.returncode != 0:
-                logger.error(f"构建文档命令失败: {result.stderr}")
+            if returncode != 0:
+                logger.error(f"构建文档命令失败: {output}")
                 return False
                 
             logger.info("构建翻译文档完成")
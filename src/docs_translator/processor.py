@@ -4,16 +4,126 @@
 """
 
 import os
+import mmap
 import shutil
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Any, Tuple
 from tqdm import tqdm
 
-from .parsers.base import BaseParser
+from . import _json
+from .parsers.base import BaseParser, Segment, _walk
 from .translator import BaseTranslator
 
 logger = logging.getLogger(__name__)
 
+# 写入输出文件时使用的缓冲区大小
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# 解析器未指定扩展名时视为文档文件的扩展名
+_DEFAULT_DOC_EXTENSIONS = ('.rst', '.md', '.markdown', '.txt')
+
+# 记录已翻译源文件摘要的清单文件，保存在输出目录中
+_MANIFEST_FILE = '.docs_translator_manifest.json'
+
+# 同时处理的文件数量，可通过TRANSLATE_WORKERS环境变量覆盖，但不超过翻译器并发数的_WORKERS_PER_REQUEST倍
+_DEFAULT_WORKERS = 16
+_WORKERS_PER_REQUEST = 2
+
+
+def _segment_key(content: str) -> bytes:
+    """计算片段内容的去重键。
+    
+    先将连续空白归一化为单个空格再计算哈希，仅空白不同的片段得到相同的键。
+    
+    Parameters
+    ----------
+    content : str
+        片段内容
+        
+    Returns
+    -------
+    bytes
+        16字节的blake2b摘要
+    """
+    normalized = ' '.join(content.split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+
+
+def _rewrap(original: str, translated: str) -> str:
+    """将译文套上原始片段首尾的空白。
+    
+    Parameters
+    ----------
+    original : str
+        原始片段内容
+    translated : str
+        与原始片段等价的另一片段的译文
+        
+    Returns
+    -------
+    str
+        保留原始片段首尾空白的译文
+    """
+    stripped = original.strip()
+    if not stripped:
+        return original
+    start = original.index(stripped)
+    return original[:start] + translated.strip() + original[start + len(stripped):]
+
+
+def _file_digest(path: str) -> str:
+    """计算文件内容的摘要。
+    
+    通过mmap直接对文件字节计算哈希，不需要解码为字符串。
+    
+    Parameters
+    ----------
+    path : str
+        文件路径
+        
+    Returns
+    -------
+    str
+        16字节blake2b摘要的十六进制字符串
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.blake2b(b'', digest_size=16).hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.blake2b(mm, digest_size=16).hexdigest()
+
+
+def _max_workers(concurrency: int, default: int = _DEFAULT_WORKERS) -> int:
+    """获取同时处理的文件数量。
+    
+    请求都由翻译器的共用线程池发送，文件级线程只负责解析、写入和等待结果，
+    因此文件数量按翻译器的并发数确定上限：部分文件在解析或写入时，
+    其余文件的请求仍能占满并发，更多的文件线程只会空等。
+    
+    Parameters
+    ----------
+    concurrency : int
+        翻译器同时进行的请求数量上限
+    default : int, optional
+        未设置TRANSLATE_WORKERS环境变量时的文件数量，默认为_DEFAULT_WORKERS
+        
+    Returns
+    -------
+    int
+        TRANSLATE_WORKERS环境变量的值，未设置或无效时为default，不超过并发数的_WORKERS_PER_REQUEST倍
+    """
+    workers = default
+    value = os.environ.get("TRANSLATE_WORKERS")
+    if value is not None:
+        try:
+            workers = int(value)
+        except ValueError:
+            logger.warning(f"无效的TRANSLATE_WORKERS值: {value!r}，使用默认值 {default}")
+    return max(1, min(workers, _WORKERS_PER_REQUEST * max(1, concurrency)))
+
 
 class DocumentProcessor:
     """文档处理器。
@@ -30,6 +140,12 @@ class DocumentProcessor:
         输出目录路径
     target_lang : str, optional
         目标语言，默认为"zh-CN"
+    batch_size : int, optional
+        批量翻译时每批处理的片段数量，默认为10
+    io_workers : int, optional
+        并行读取源文件的线程数，默认为32
+    use_async : bool, optional
+        是否通过asyncio事件循环驱动整个处理流程，默认为False
         
     Attributes
     ----------
@@ -41,6 +157,12 @@ class DocumentProcessor:
         输出目录路径
     target_lang : str
         目标语言
+    batch_size : int
+        批量处理大小
+    io_workers : int
+        并行读取源文件的线程数
+    use_async : bool
+        是否通过asyncio驱动处理流程
     """
     
     def __init__(
@@ -48,7 +170,10 @@ class DocumentProcessor:
         parser: BaseParser, 
         translator: BaseTranslator, 
         output_dir: str,
-        target_lang: str = "zh-CN"
+        target_lang: str = "zh-CN",
+        batch_size: int = 10,
+        io_workers: int = 32,
+        use_async: bool = False
     ):
         """初始化文档处理器。
         
@@ -62,111 +187,373 @@ class DocumentProcessor:
             输出目录路径
         target_lang : str, optional
             目标语言，默认为"zh-CN"
+        batch_size : int, optional
+            批量翻译大小，默认为10
+        io_workers : int, optional
+            并行读取源文件的线程数，默认为32
+        use_async : bool, optional
+            是否通过asyncio事件循环驱动整个处理流程，默认为False
         """
         self.parser = parser
         self.translator = translator
         self.output_dir = os.path.abspath(output_dir)
         self.target_lang = target_lang
+        self.batch_size = batch_size
+        self.io_workers = io_workers
+        self.use_async = use_async
+        # 预先转换为元组，判断文档文件时由str.endswith一次完成
+        self._doc_extensions = tuple(getattr(parser, 'file_extensions', _DEFAULT_DOC_EXTENSIONS))
         
         # 创建输出目录
         os.makedirs(self.output_dir, exist_ok=True)
+        
+        # 已创建的输出子目录，避免每个文件都调用os.makedirs
+        self._made_dirs = {self.output_dir}
+        
+        # 加载上次运行记录的源文件摘要
+        self._manifest_path = os.path.join(self.output_dir, _MANIFEST_FILE)
+        self._manifest = self._load_manifest()
     
     def process_all(self) -> None:
         """处理所有文档文件。
         """
-        # 获取所有需要翻译的文件
-        files = self.parser.get_all_files()
+        if self.use_async:
+            asyncio.run(self.process_all_async())
+            return
+        
+        # 获取所有需要翻译的文件，跳过内容未变化且已有输出的文件
+        files, digests = self._changed_files(list(self.parser.files))
         logger.info(f"找到 {len(files)} 个需要翻译的文件")
         
         # 复制静态资源
         self._copy_static_files()
         
-        # 处理每个文件
-        for file_path in tqdm(files, desc="翻译进度"):
+        # 并行预读所有文件内容，避免逐个文件串行等待I/O
+        contents = self._read_files(files)
+        parsed = [None] * len(files)
+        
+        # 使用Batch API时，先把所有文件的待翻译文本合并为一个批处理任务
+        if getattr(self.translator, 'use_batch_api', False):
+            self._pretranslate(files, contents, parsed)
+        
+        # 在线程池中并行处理文件，翻译主要耗时在等待API响应上
+        with ThreadPoolExecutor(max_workers=_max_workers(self.translator.concurrency)) as executor:
+            futures = {
+                executor.submit(self._process_file, file_path, content, segments): file_path
+                for file_path, content, segments in zip(files, contents, parsed)
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="翻译进度"):
+                file_path = futures[future]
+                try:
+                    if future.result():
+                        self._manifest[file_path] = digests[file_path]
+                except Exception as e:
+                    logger.error(f"处理文件 {file_path} 时出错: {str(e)}")
+        
+        self._save_manifest()
+    
+    async def process_all_async(self) -> None:
+        """在事件循环中处理所有文档文件。
+        
+        文件的读取解析和翻译都在线程池中执行，由信号量限制同时处理的文件数量，
+        已经运行事件循环的调用方可以直接await，不会阻塞事件循环。
+        """
+        loop = asyncio.get_running_loop()
+        
+        # 获取所有需要翻译的文件，跳过内容未变化且已有输出的文件
+        files, digests = await loop.run_in_executor(None, self._changed_files, list(self.parser.files))
+        logger.info(f"找到 {len(files)} 个需要翻译的文件")
+        
+        # 复制静态资源
+        await loop.run_in_executor(None, self._copy_static_files)
+        
+        # 并发读取并解析所有文件，解析失败的文件在处理时重新解析
+        parsed = await self.parser.parse_all_async(files, self.io_workers)
+        contents = [None] * len(files)
+        
+        # 使用Batch API时，先把所有文件的待翻译文本合并为一个批处理任务
+        if getattr(self.translator, 'use_batch_api', False):
+            await loop.run_in_executor(None, self._pretranslate, files, contents, parsed)
+        
+        max_workers = _max_workers(self.translator.concurrency)
+        semaphore = asyncio.Semaphore(max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                tqdm(total=len(files), desc="翻译进度") as progress:
+            async def process_one(file_path: str, segments: Optional[List[Segment]]) -> None:
+                async with semaphore:
+                    try:
+                        if await loop.run_in_executor(executor, self._process_file, file_path, None, segments):
+                            self._manifest[file_path] = digests[file_path]
+                    except Exception as e:
+                        logger.error(f"处理文件 {file_path} 时出错: {str(e)}")
+                    finally:
+                        progress.update(1)
+            
+            await asyncio.gather(*(
+                process_one(file_path, segments) for file_path, segments in zip(files, parsed)
+            ))
+        
+        self._save_manifest()
+    
+    def _load_manifest(self) -> Dict[str, str]:
+        """加载上次运行记录的源文件摘要。
+        
+        Returns
+        -------
+        Dict[str, str]
+            文件路径到内容摘要的映射；清单不存在、无法读取或目标语言不同时为空
+        """
+        try:
+            with open(self._manifest_path, 'rb') as f:
+                data = _json.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        
+        if not isinstance(data, dict) or data.get("target_lang") != self.target_lang:
+            return {}
+        return data.get("files", {})
+    
+    def _save_manifest(self) -> None:
+        """保存已成功翻译的源文件摘要。"""
+        try:
+            with open(self._manifest_path, 'wb') as f:
+                f.write(_json.dumps({"target_lang": self.target_lang, "files": self._manifest}))
+        except OSError as e:
+            logger.warning(f"保存翻译清单失败: {str(e)}")
+    
+    def _changed_files(self, files: List[str]) -> Tuple[List[str], Dict[str, Optional[str]]]:
+        """筛选出需要重新翻译的文件。
+        
+        源文件摘要与清单中记录的一致且输出文件存在时跳过该文件。
+        
+        Parameters
+        ----------
+        files : List[str]
+            文件路径列表（相对于源目录）
+            
+        Returns
+        -------
+        Tuple[List[str], Dict[str, Optional[str]]]
+            需要翻译的文件列表，以及这些文件当前的内容摘要（无法读取时为None）
+        """
+        changed = []
+        digests = {}
+        for file_path in files:
+            try:
+                digest = _file_digest(os.path.join(self.parser.root_dir, file_path))
+            except OSError:
+                # 无法读取的文件交给后续处理流程报告错误
+                changed.append(file_path)
+                digests[file_path] = None
+                continue
+            
+            if (self._manifest.get(file_path) == digest
+                    and os.path.exists(os.path.join(self.output_dir, file_path))):
+                continue
+            changed.append(file_path)
+            digests[file_path] = digest
+        
+        skipped = len(files) - len(changed)
+        if skipped:
+            logger.info(f"跳过 {skipped} 个内容未变化的文件")
+        return changed, digests
+    
+    def _read_files(self, files: List[str]) -> List[Optional[str]]:
+        """并行读取所有文件的内容。
+        
+        Parameters
+        ----------
+        files : List[str]
+            要读取的文件路径列表（相对于源目录）
+            
+        Returns
+        -------
+        List[Optional[str]]
+            文件内容列表；读取失败时全部为None，由解析器在处理时逐个读取
+        """
+        try:
+            return self.parser.read_all(files, self.io_workers)
+        except Exception as e:
+            logger.warning(f"并行读取文件失败，将逐个读取: {str(e)}")
+            return [None] * len(files)
+    
+    def _pretranslate(
+        self,
+        files: List[str],
+        contents: List[Optional[str]],
+        parsed: List[Optional[List[Segment]]]
+    ) -> None:
+        """一次性翻译所有文件中的文本片段并写入缓存。
+        
+        逐文件处理时每个文件都会产生一个独立的Batch API任务，
+        预先合并提交后，逐文件处理阶段只需读取缓存。
+        
+        Parameters
+        ----------
+        files : List[str]
+            要处理的文件路径列表（相对于源目录）
+        contents : List[Optional[str]]
+            预先读取的文件内容列表
+        parsed : List[Optional[List[Segment]]]
+            预先解析的片段列表，为None的文件将在此解析
+        """
+        if not self.translator.use_cache:
+            logger.warning("Batch API模式需要启用翻译缓存才能合并提交，将逐文件提交批处理任务")
+            return
+        
+        texts = []
+        for file_path, content, segments in zip(files, contents, parsed):
             try:
-                self._process_file(file_path)
+                if segments is None:
+                    segments = self.parser.parse_file(file_path, content)
             except Exception as e:
-                logger.error(f"处理文件 {file_path} 时出错: {str(e)}")
+                logger.error(f"解析文件 {file_path} 时出错: {str(e)}")
+                continue
+            texts.extend(
+                segment.content for segment in segments
+                if segment.type not in ['code_block', 'inline_code', 'blank']
+            )
+        
+        if texts:
+            logger.info(f"通过Batch API预先翻译 {len(texts)} 个文本片段")
+            self.translator.batch_translate(texts, self.target_lang, self.batch_size)
     
-    def _process_file(self, file_path: str) -> None:
+    def _process_file(
+        self,
+        file_path: str,
+        content: Optional[str] = None,
+        segments: Optional[List[Segment]] = None
+    ) -> bool:
         """处理单个文件。
         
         Parameters
         ----------
         file_path : str
             要处理的文件路径（相对于源目录）
+        content : str, optional
+            预先读取的文件内容，为None时由解析器读取
+        segments : List[Segment], optional
+            预先解析的片段列表，为None时解析文件
+            
+        Returns
+        -------
+        bool
+            是否所有片段都翻译成功；翻译出错或有片段未能翻译时，
+            对应内容保留原文，返回False
         """
         logger.debug(f"开始处理文件: {file_path}")
         
         # 解析文件
-        segments = self.parser.parse_file(file_path)
+        if segments is None:
+            segments = self.parser.parse_file(file_path, content)
         logger.debug(f"文件 {file_path} 被分解为 {len(segments)} 个片段")
         
-        # 翻译文本片段
-        translated_segments = []
-        for segment in segments:
-            if segment['type'] in ['code_block', 'inline_code']:
-                # 不翻译代码块
-                translated_segments.append(segment)
-            else:
-                # 翻译文本
-                try:
-                    translated_content = self.translator.translate(
-                        segment['content'], 
-                        self.target_lang
-                    )
-                    translated_segment = segment.copy()
-                    translated_segment['content'] = translated_content
-                    translated_segments.append(translated_segment)
-                except Exception as e:
-                    logger.warning(f"翻译片段时出错: {str(e)}")
-                    # 使用原始内容
-                    translated_segments.append(segment)
+        # 收集需要翻译的文本片段（不翻译代码块和空白）
+        text_indices = [
+            i for i, segment in enumerate(segments)
+            if segment.type not in ['code_block', 'inline_code', 'blank']
+        ]
         
-        # 重建文件内容
-        translated_content = self.parser.build_file(file_path, translated_segments)
+        # 按归一化内容的哈希去重，仅空白不同的片段只翻译一次
+        unique_slots: Dict[bytes, int] = {}
+        unique_texts = []
+        slots = []
+        for i in text_indices:
+            key = _segment_key(segments[i].content)
+            slot = unique_slots.get(key)
+            if slot is None:
+                slot = unique_slots[key] = len(unique_texts)
+                unique_texts.append(segments[i].content)
+            slots.append(slot)
         
-        # 写入输出文件
+        # 批量翻译，由翻译器负责分批、缓存和失败回退
+        translated_segments = list(segments)
+        translated = True
+        if text_indices:
+            try:
+                translated_texts, failed = self.translator.batch_translate_with_failures(
+                    unique_texts,
+                    self.target_lang,
+                    self.batch_size
+                )
+                if failed:
+                    # 部分片段保留了原文，输出照常写入，但不记为已完成，下次运行重新翻译
+                    logger.warning(f"文件 {file_path} 中有 {len(failed)} 个片段未能翻译")
+                    translated = False
+                for i, slot in zip(text_indices, slots):
+                    translated_content = translated_texts[slot]
+                    if segments[i].content != unique_texts[slot]:
+                        translated_content = _rewrap(segments[i].content, translated_content)
+                    translated_segments[i] = segments[i]._replace(content=translated_content)
+            except Exception as e:
+                logger.warning(f"翻译片段时出错: {str(e)}")
+                # 使用原始内容
+                translated = False
+        
+        # 同一目录只创建一次
         output_path = os.path.join(self.output_dir, file_path)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        output_dir = os.path.dirname(output_path)
+        if output_dir not in self._made_dirs:
+            os.makedirs(output_dir, exist_ok=True)
+            self._made_dirs.add(output_dir)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(translated_content)
+        # 重建文件内容并直接写入临时文件，完成后原子替换，中途失败不会留下不完整的输出
+        tmp_path = output_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                self.parser.build_file(file_path, translated_segments, out=f)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
         
         logger.debug(f"文件处理完成: {file_path}")
+        return translated
     
     def _copy_static_files(self) -> None:
         """复制静态资源文件。
         
-        将非文档文件（如图片、CSS等）复制到输出目录。
+        将非文档文件（如图片、CSS等）复制到输出目录，与查找文档文件时一样跳过构建输出、
+        依赖目录和隐藏目录（如.git）。
         """
         # 源目录
         source_dir = self.parser.root_dir
         
         # 遍历源目录
-        for root, _, files in os.walk(source_dir):
-            # 计算相对路径
-            rel_path = os.path.relpath(root, source_dir)
-            
+        for rel_path, entries in _walk(source_dir):
             # 创建目标目录
-            if rel_path != '.':
+            if rel_path:
                 target_dir = os.path.join(self.output_dir, rel_path)
                 os.makedirs(target_dir, exist_ok=True)
             else:
                 target_dir = self.output_dir
             
             # 复制除了文档文件以外的文件
-            for file in files:
+            for entry in entries:
                 # 检查是否为需要翻译的文件类型
-                if not self._is_document_file(file):
-                    source_file = os.path.join(root, file)
-                    target_file = os.path.join(target_dir, file)
-                    
-                    # 如果目标文件不存在或修改时间较旧，则复制
-                    if (not os.path.exists(target_file) or 
-                            os.path.getmtime(source_file) > os.path.getmtime(target_file)):
-                        shutil.copy2(source_file, target_file)
-                        logger.debug(f"复制静态文件: {os.path.join(rel_path, file)}")
+                if self._is_document_file(entry.name):
+                    continue
+                
+                target_file = os.path.join(target_dir, entry.name)
+                source_stat = entry.stat()
+                try:
+                    target_stat = os.stat(target_file)
+                except FileNotFoundError:
+                    target_stat = None
+                
+                # 大小和修改时间都相同的文件视为未变化，跳过复制
+                if target_stat is not None and (
+                    (source_stat.st_size, int(source_stat.st_mtime))
+                    == (target_stat.st_size, int(target_stat.st_mtime))
+                ):
+                    continue
+                
+                # copyfile在Linux上使用sendfile在内核中复制，之后同步修改时间供下次比较
+                shutil.copyfile(entry.path, target_file)
+                os.utime(target_file, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+                logger.debug(f"复制静态文件: {os.path.join(rel_path, entry.name)}")
     
     def _is_document_file(self, file_name: str) -> bool:
         """检查文件是否为需要翻译的文档文件。
@@ -181,10 +568,4 @@ class DocumentProcessor:
         bool
             如果是文档文件则返回True，否则返回False
         """
-        # 根据不同解析器类型判断
-        if hasattr(self.parser, 'file_extensions'):
-            return any(file_name.endswith(ext) for ext in self.parser.file_extensions)
-        
-        # 默认检查
-        doc_extensions = ['.rst', '.md', '.markdown', '.txt']
-        return any(file_name.endswith(ext) for ext in doc_extensions)
+        return file_name.endswith(self._doc_extensions)
@@ -4,6 +4,7 @@
 """
 
 import os
+import re
 import logging
 import subprocess
 import tempfile
@@ -11,13 +12,112 @@ import shutil
 import glob
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional, Any, Tuple
+from tqdm import tqdm
 
+from .parsers.base import _iter_files
 from .parsers.sphinx_intl import SphinxIntlParser
+from .processor import _max_workers
 from .translator import BaseTranslator
 
 logger = logging.getLogger(__name__)
 
+# 记录.po文件已完整翻译的标记文件后缀，内容为对应.pot文件的修改时间
+_DONE_SUFFIX = '.done'
+
+# 同时翻译的.po文件数量，可通过TRANSLATE_WORKERS环境变量覆盖
+_DEFAULT_WORKERS = 8
+
+
+# 含有字母（任意语言）的文本才需要翻译，纯标点、数字和空白的msgid直接沿用原文
+_HAS_LETTER = re.compile(r'[^\W\d_]')
+
+# 行内代码（``code``）和带角色的引用（:func:`name`），其中的字母不需要翻译
+_INLINE_LITERAL = re.compile(r'(?::[\w:.+-]+:)?(?:``.+?``|`[^`]+`)')
+
+
+def _needs_translation(msgid: str) -> bool:
+    """判断msgid是否需要调用翻译API。
+    
+    去掉行内代码和角色引用后仍含有字母的msgid才需要翻译。
+    
+    Parameters
+    ----------
+    msgid : str
+        .po文件中的原文
+        
+    Returns
+    -------
+    bool
+        msgid需要翻译时返回True
+    """
+    if _HAS_LETTER.search(msgid) is None:
+        return False
+    if '`' not in msgid:
+        return True
+    return _HAS_LETTER.search(_INLINE_LITERAL.sub('', msgid)) is not None
+
+
+# .po字符串中的转义序列，与polib的处理方式一致
+_PO_ESCAPE_SEQ = re.compile(r'\\(.)')
+_PO_UNESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '\\': '\\', '"': '"'}
+_PO_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n', '\t': '\\t', '\r': '\\r'})
+
+
+def _unescape_po(text: str) -> str:
+    """还原.po文件字符串中的转义序列。"""
+    return _PO_ESCAPE_SEQ.sub(lambda m: _PO_UNESCAPES.get(m.group(1), m.group(0)), text)
+
+
+def _escape_po(text: str) -> str:
+    """转义文本中的反斜杠、双引号和控制字符，使其可以写入.po文件的字符串中。"""
+    return text.translate(_PO_ESCAPES)
+
+
+def _find_untranslated_lines(lines: List[str]) -> List[Tuple[int, str]]:
+    """单次扫描.po文件的各行，找出msgstr为空的条目。
+    
+    支持跨多行的msgid；msgstr之后还有续行（即译文非空）或带复数形式的条目会被跳过。
+    
+    Parameters
+    ----------
+    lines : List[str]
+        .po文件的各行（保留行尾换行符）
+        
+    Returns
+    -------
+    List[Tuple[int, str]]
+        空msgstr所在的行号和对应msgid的原始（未反转义）内容
+    """
+    found = []
+    msgid_parts: Optional[List[str]] = None
+    pending: Optional[Tuple[int, str]] = None
+    
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        
+        if pending is not None:
+            # 空msgstr后紧跟续行说明译文实际非空
+            if not stripped.startswith('"'):
+                found.append(pending)
+            pending = None
+        
+        if stripped.startswith('msgid "'):
+            msgid_parts = [stripped[7:-1]]
+        elif msgid_parts is not None and stripped.startswith('"'):
+            msgid_parts.append(stripped[1:-1])
+        elif msgid_parts is not None and stripped == 'msgstr ""':
+            pending = (i, ''.join(msgid_parts))
+            msgid_parts = None
+        else:
+            msgid_parts = None
+    
+    if pending is not None:
+        found.append(pending)
+    
+    return found
+
 
 class SphinxIntlProcessor:
     """基于sphinx-intl的Sphinx文档处理器。
@@ -38,6 +138,8 @@ class SphinxIntlProcessor:
         批量翻译时每批处理的数量，默认为10
     show_cache_stats : bool, optional
         是否在处理结束时显示缓存统计，默认为True
+    max_workers : int, optional
+        同时翻译的.po文件数量上限，默认为None（使用TRANSLATE_WORKERS环境变量或8，不超过翻译器并发数的两倍）
         
     Attributes
     ----------
@@ -53,6 +155,8 @@ class SphinxIntlProcessor:
         批量处理大小
     show_cache_stats : bool
         是否显示缓存统计
+    max_workers : int
+        同时翻译的.po文件数量上限
     """
     
     def __init__(
@@ -62,7 +166,8 @@ class SphinxIntlProcessor:
         output_dir: str,
         target_lang: str = "zh_CN",
         batch_size: int = 10,
-        show_cache_stats: bool = True
+        show_cache_stats: bool = True,
+        max_workers: Optional[int] = None
     ):
         """初始化Sphinx-intl处理器。
         
@@ -80,6 +185,8 @@ class SphinxIntlProcessor:
             批量翻译大小，默认为10
         show_cache_stats : bool, optional
             是否显示缓存统计，默认为True
+        max_workers : int, optional
+            同时翻译的.po文件数量上限，默认为None（使用TRANSLATE_WORKERS环境变量或8，不超过翻译器并发数的两倍）
         """
         self.parser = parser
         self.translator = translator
@@ -87,6 +194,9 @@ class SphinxIntlProcessor:
         self.target_lang = target_lang
         self.batch_size = batch_size
         self.show_cache_stats = show_cache_stats
+        if max_workers is None:
+            max_workers = _max_workers(translator.concurrency, _DEFAULT_WORKERS)
+        self.max_workers = max(1, max_workers)
         
         # 创建输出目录
         os.makedirs(self.output_dir, exist_ok=True)
@@ -141,6 +251,7 @@ class SphinxIntlProcessor:
                 print("\n翻译缓存统计:")
                 print(f"- 缓存命中: {stats.get('hits', 0)}次")
                 print(f"- 缓存未命中: {stats.get('misses', 0)}次")
+                print(f"- 无需翻译: {stats.get('skipped', 0)}次")
                 print(f"- 缓存条目总数: {stats.get('cache_entries', 0)}个")
                 print(f"- 节省的API调用: {stats.get('saved_calls', 0)}次")
                 print(f"- 预估节省费用: ${stats.get('estimated_saving_usd', 0):.3f}")
@@ -201,11 +312,7 @@ class SphinxIntlProcessor:
                 print(f"标准PO文件目录不存在: {po_dir}，尝试查找其他可能的目录...")
                 
                 # 尝试递归搜索找到所有.po文件
-                po_files_paths = []
-                for root, _, files in os.walk(locale_dir):
-                    for file in files:
-                        if file.endswith('.po'):
-                            po_files_paths.append(os.path.join(root, file))
+                po_files_paths = self._find_po_files(locale_dir)
                 
                 if not po_files_paths:
                     # 如果没有找到任何.po文件，尝试运行sphinx-intl命令创建
@@ -217,33 +324,58 @@ class SphinxIntlProcessor:
                         return False
                     
                     # 再次尝试寻找.po文件
-                    for root, _, files in os.walk(locale_dir):
-                        for file in files:
-                            if file.endswith('.po'):
-                                po_files_paths.append(os.path.join(root, file))
+                    po_files_paths = self._find_po_files(locale_dir)
                 
                 if not po_files_paths:
                     logger.error("在尝试所有方法后仍未找到.po文件")
                     print("在尝试所有方法后仍未找到.po文件")
                     return False
                 
-                logger.info(f"找到 {len(po_files_paths)} 个.po文件需要翻译")
-                print(f"找到 {len(po_files_paths)} 个.po文件需要翻译")
-                
-                # 翻译找到的所有.po文件
-                for i, po_path in enumerate(po_files_paths):
-                    print(f"[{i+1}/{len(po_files_paths)}] 翻译文件: {os.path.basename(po_path)}")
-                    self._translate_po_file(po_path)
             else:
-                # 标准目录存在，按原计划处理
-                po_files = [f for f in os.listdir(po_dir) if f.endswith('.po')]
-                logger.info(f"找到 {len(po_files)} 个.po文件需要翻译")
-                print(f"找到 {len(po_files)} 个.po文件需要翻译")
-                
-                for i, po_file in enumerate(po_files):
-                    po_path = os.path.join(po_dir, po_file)
-                    print(f"[{i+1}/{len(po_files)}] 翻译文件: {po_file}")
-                    self._translate_po_file(po_path)
+                # 标准目录存在，按原计划处理；子目录中的文档对应的.po文件位于子目录中
+                po_files_paths = self._find_po_files(po_dir)
+            
+            # 跳过上次运行后没有变化且已完整翻译的.po文件
+            pot_paths = {po_path: self._get_pot_path(po_path, po_dir) for po_path in po_files_paths}
+            skipped = [po_path for po_path in po_files_paths if self._is_up_to_date(po_path, pot_paths[po_path])]
+            if skipped:
+                logger.info(f"跳过 {len(skipped)} 个未变化且已完整翻译的.po文件")
+                print(f"跳过 {len(skipped)} 个未变化且已完整翻译的.po文件")
+                skipped = set(skipped)
+                po_files_paths = [po_path for po_path in po_files_paths if po_path not in skipped]
+            
+            logger.info(f"找到 {len(po_files_paths)} 个.po文件需要翻译")
+            print(f"找到 {len(po_files_paths)} 个.po文件需要翻译")
+            
+            if not po_files_paths:
+                return True
+            
+            # 先对所有文件中的待翻译条目去重并统一翻译，不同文件中的相同条目只翻译一次，
+            # 使用Batch API时也只会产生一个批处理任务
+            translations, parsed = self._pretranslate(po_files_paths)
+            
+            def translate_one(po_path: str) -> None:
+                # 复用预翻译时已解析的.po文件，处理完后释放
+                if self._translate_po_file(po_path, translations, parsed.pop(po_path, None)):
+                    self._mark_done(po_path, pot_paths[po_path])
+            
+            # 在线程池中并行翻译所有.po文件，翻译主要耗时在等待API响应上；
+            # 单个文件失败不影响其他文件，失败的文件下次运行时会重新翻译
+            failed = 0
+            max_workers = min(self.max_workers, len(po_files_paths))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(translate_one, po_path): po_path for po_path in po_files_paths}
+                for future in tqdm(as_completed(futures), total=len(futures), desc="翻译进度"):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed += 1
+                        logger.error(f"翻译文件 {futures[future]} 时出错: {str(e)}")
+                        tqdm.write(f"翻译文件 {futures[future]} 时出错: {str(e)}")
+            
+            if failed:
+                logger.warning(f"{failed} 个.po文件翻译失败")
+                print(f"{failed} 个.po文件翻译失败")
             
             return True
             
@@ -252,68 +384,248 @@ class SphinxIntlProcessor:
             print(f"翻译.po文件时出错: {str(e)}")
             return False
     
-    def _translate_po_file(self, po_path: str) -> None:
-        """翻译单个.po文件。
+    def _find_po_files(self, directory: str) -> List[str]:
+        """递归查找目录下的所有.po文件。
+        
+        Parameters
+        ----------
+        directory : str
+            要搜索的目录
+            
+        Returns
+        -------
+        List[str]
+            排序后的.po文件路径列表
+        """
+        return sorted(_iter_files(directory, ('.po',)))
+    
+    def _get_pot_path(self, po_path: str, po_dir: str) -> str:
+        """获取.po文件对应的.pot文件路径。
+        
+        Parameters
+        ----------
+        po_path : str
+            .po文件路径
+        po_dir : str
+            标准的.po文件目录
+            
+        Returns
+        -------
+        str
+            对应的.pot文件路径；.po文件不在标准目录中时按文件名对应
+        """
+        rel_path = os.path.relpath(po_path, po_dir)
+        if rel_path.startswith(os.pardir):
+            rel_path = os.path.basename(po_path)
+        return os.path.join(self.parser.pot_dir, os.path.splitext(rel_path)[0] + '.pot')
+    
+    def _is_up_to_date(self, po_path: str, pot_path: str) -> bool:
+        """检查.po文件自上次完整翻译后是否没有变化。
+        
+        优先检查标记文件，标记中记录的.pot修改时间一致且.po文件之后未被修改时
+        不需要打开.po文件；否则.po文件比.pot文件新且已全部翻译时同样视为最新，并补写标记。
+        
+        Parameters
+        ----------
+        po_path : str
+            .po文件路径
+        pot_path : str
+            对应的.pot文件路径
+            
+        Returns
+        -------
+        bool
+            可以跳过翻译时返回True
+        """
+        try:
+            pot_mtime = os.stat(pot_path).st_mtime_ns
+            po_mtime = os.stat(po_path).st_mtime_ns
+        except OSError:
+            return False
+        
+        marker_path = po_path + _DONE_SUFFIX
+        try:
+            with open(marker_path, 'r', encoding='utf-8') as f:
+                marker = f.read().strip()
+            if marker == str(pot_mtime) and po_mtime <= os.stat(marker_path).st_mtime_ns:
+                return True
+        except OSError:
+            pass
+        
+        if po_mtime <= pot_mtime:
+            return False
+        
+        try:
+            import polib
+            if polib.pofile(po_path).percent_translated() < 100:
+                return False
+        except Exception:
+            return False
+        
+        self._mark_done(po_path, pot_path)
+        return True
+    
+    def _mark_done(self, po_path: str, pot_path: str) -> None:
+        """写入标记文件，记录.po文件已根据当前的.pot文件完整翻译。
         
         Parameters
         ----------
         po_path : str
             .po文件路径
+        pot_path : str
+            对应的.pot文件路径
+        """
+        try:
+            pot_mtime = os.stat(pot_path).st_mtime_ns
+            with open(po_path + _DONE_SUFFIX, 'w', encoding='utf-8') as f:
+                f.write(str(pot_mtime))
+        except OSError as e:
+            logger.debug(f"无法写入翻译完成标记 {po_path}: {str(e)}")
+    
+    def _pretranslate(self, po_paths: List[str]) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """一次性翻译所有.po文件中的未翻译条目。
+        
+        Sphinx项目中大量条目（标题、提示框、导航文字等）在多个文件中重复出现，
+        合并去重后只需翻译一次；使用Batch API时也只会产生一个批处理任务。
+        
+        Parameters
+        ----------
+        po_paths : List[str]
+            .po文件路径列表
+            
+        Returns
+        -------
+        Tuple[Dict[str, str], Dict[str, Any]]
+            msgid到译文的映射（不含翻译失败的条目），以及.po文件路径到已解析的
+            polib.POFile的映射；未安装polib时两者都为空，由逐文件翻译处理
         """
         try:
             import polib
+        except ImportError:
+            return {}, {}
+        
+        msgids = []
+        parsed = {}
+        for po_path in po_paths:
+            try:
+                po = parsed[po_path] = polib.pofile(po_path)
+            except Exception as e:
+                logger.warning(f"读取.po文件 {po_path} 时出错: {str(e)}")
+                continue
+            msgids.extend(entry.msgid for entry in po.untranslated_entries() if _needs_translation(entry.msgid))
+        
+        # 不同文件中的相同条目只提交一次
+        msgids = list(dict.fromkeys(msgids))
+        if not msgids:
+            return {}, parsed
+        
+        print(f"所有.po文件中共有 {len(msgids)} 个不重复的条目需要翻译")
+        translated, failed = self.translator.batch_translate_with_failures(msgids, self.target_lang, self.batch_size)
+        # 翻译失败的条目不放入映射，逐文件翻译时会再尝试一次，仍失败则保留空的msgstr
+        translations = {
+            msgid: text for i, (msgid, text) in enumerate(zip(msgids, translated)) if i not in failed
+        }
+        return translations, parsed
+    
+    def _translate_po_file(
+        self,
+        po_path: str,
+        translations: Optional[Dict[str, str]] = None,
+        po: Optional[Any] = None
+    ) -> bool:
+        """翻译单个.po文件。
+        
+        Parameters
+        ----------
+        po_path : str
+            .po文件路径
+        translations : Dict[str, str], optional
+            已经翻译好的msgid到译文的映射，其中没有的条目才会调用翻译器，默认为None
+        po : polib.POFile, optional
+            已解析的.po文件，为None时从po_path加载
             
-            # 加载.po文件
-            po = polib.pofile(po_path)
+        Returns
+        -------
+        bool
+            文件中的条目是否已全部翻译；有条目翻译失败时返回False
+        """
+        name = os.path.basename(po_path)
+        try:
+            import polib
             
-            # 收集需要翻译的条目
-            to_translate = []
-            entries_to_update = []
+            # 加载.po文件，已预先解析时直接复用
+            if po is None:
+                po = polib.pofile(po_path)
             
-            for entry in po:
-                if entry.msgstr == "" and not entry.obsolete:
-                    # 只收集未翻译且非过时的条目
-                    to_translate.append(entry.msgid)
-                    entries_to_update.append(entry)
+            # 收集未翻译且非过时、非fuzzy的条目
+            entries_to_update = po.untranslated_entries()
+            to_translate = [entry.msgid for entry in entries_to_update]
             
             total_entries = len(to_translate)
             if total_entries == 0:
-                print(f"文件 {os.path.basename(po_path)} 中没有需要翻译的条目")
-                return
+                logger.info(f"文件 {name} 中没有需要翻译的条目")
+                return True
             
-            print(f"文件 {os.path.basename(po_path)} 中有 {total_entries} 个条目需要翻译")
+            logger.info(f"文件 {name} 中有 {total_entries} 个条目需要翻译")
             
             # 批量翻译
             start_time = time.time()
             
-            # 使用translator.batch_translate进行批量翻译
-            # 这会自动处理缓存
-            translated_texts = self.translator.batch_translate(
-                to_translate, 
-                self.target_lang, 
-                self.batch_size
-            )
-            
-            # 更新PO条目
-            for entry, translated_text in zip(entries_to_update, translated_texts):
-                entry.msgstr = translated_text
+            # 相同的msgid只翻译一次，不含字母的msgid直接沿用原文；已预先翻译的条目直接从
+            # 所有文件共用的映射中读取，不复制该映射，本文件中未预先翻译的条目放入局部映射
+            shared = translations or {}
+            unique_texts = list(dict.fromkeys(
+                text for text in to_translate
+                if text not in shared and _needs_translation(text)
+            ))
+            
+            # 使用translator进行批量翻译，这会自动处理缓存；翻译失败的条目不放入映射
+            local: Dict[str, str] = {}
+            failed = set()
+            if unique_texts:
+                translated_texts, failed = self.translator.batch_translate_with_failures(
+                    unique_texts, 
+                    self.target_lang, 
+                    self.batch_size
+                )
+                local = {
+                    text: translated
+                    for i, (text, translated) in enumerate(zip(unique_texts, translated_texts))
+                    if i not in failed
+                }
+            
+            # 更新PO条目；翻译失败的条目保留空的msgstr，下次运行时重新翻译
+            for entry in entries_to_update:
+                translated = shared.get(entry.msgid)
+                if translated is None:
+                    translated = local.get(entry.msgid)
+                if translated is not None:
+                    entry.msgstr = translated
+                elif not _needs_translation(entry.msgid):
+                    entry.msgstr = entry.msgid
             
             # 保存翻译后的.po文件
             po.save(po_path)
             
-            # 显示完成信息
-            total_time = time.time() - start_time
-            print(f"文件 {os.path.basename(po_path)} 翻译完成! 用时: {total_time:.1f} 秒, 平均速度: {total_entries/total_time:.2f} 条目/秒")
+            if failed:
+                logger.warning(f"文件 {name} 中有 {len(failed)} 个条目翻译失败，下次运行时重新翻译")
+                return False
+            
+            # 显示完成信息（避免用时过短时除以零）
+            total_time = max(time.time() - start_time, 1e-6)
+            logger.info(f"文件 {name} 翻译完成! 用时: {total_time:.1f} 秒, 平均速度: {total_entries/total_time:.2f} 条目/秒")
+            return True
             
         except ImportError:
             # 如果没有polib，使用简单文本替换
             logger.warning("未找到polib库，使用简单替换方法")
-            print("未找到polib库，使用简单替换方法")
             self._translate_po_file_simple(po_path)
+            return False
         
         except Exception as e:
             logger.warning(f"翻译.po文件 {po_path} 时出错: {str(e)}")
-            print(f"翻译.po文件 {os.path.basename(po_path)} 时出错: {str(e)}")
+            tqdm.write(f"翻译.po文件 {name} 时出错: {str(e)}")
+            return False
     
     def _translate_po_file_simple(self, po_path: str) -> None:
         """使用简单文本处理方式翻译.po文件。
@@ -325,64 +637,64 @@ class SphinxIntlProcessor:
         po_path : str
             .po文件路径
         """
+        name = os.path.basename(po_path)
         try:
             with open(po_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 解析.po文件
-            msgid_pattern = r'msgid "(.*?)"\nmsgstr ""'
+                lines = f.readlines()
             
-            # 查找所有未翻译的字符串
-            import re
-            matches = re.findall(msgid_pattern, content, re.DOTALL)
+            # 单次扫描查找所有未翻译的字符串
+            matches = _find_untranslated_lines(lines)
             
             # 准备批量翻译
             total_entries = len(matches)
             if total_entries == 0:
-                print(f"文件 {os.path.basename(po_path)} 中没有需要翻译的条目")
+                logger.info(f"文件 {name} 中没有需要翻译的条目")
                 return
             
-            print(f"文件 {os.path.basename(po_path)} 中有 {total_entries} 个条目需要翻译")
+            logger.info(f"文件 {name} 中有 {total_entries} 个条目需要翻译")
             
             # 批量翻译
             start_time = time.time()
-            to_translate = []
             
-            # 收集需要翻译的文本
-            for msgid in matches:
-                if msgid.strip() and msgid != "":
-                    to_translate.append(msgid)
+            # 收集需要翻译的文本，跳过空msgid（文件头）；与polib一样先还原转义序列，
+            # 这样两种模式提交的原文相同，可以共用翻译缓存
+            pending = [(line_no, _unescape_po(msgid)) for line_no, msgid in matches if msgid.strip()]
             
-            # 使用translator.batch_translate进行批量翻译
-            # 这会自动处理缓存
-            all_translated = self.translator.batch_translate(
-                to_translate, 
+            # 相同的msgid只翻译一次，不含字母的msgid直接沿用原文
+            unique_texts = list(dict.fromkeys(msgid for _, msgid in pending if _needs_translation(msgid)))
+            
+            # 使用translator进行批量翻译，这会自动处理缓存；翻译失败的条目不放入映射
+            all_translated, failed = self.translator.batch_translate_with_failures(
+                unique_texts, 
                 self.target_lang, 
                 self.batch_size
-            )
-            
-            # 更新.po文件内容
-            for msgid, translated in zip(to_translate, all_translated):
-                # 对msgid和translated进行转义处理
-                escaped_msgid = msgid.replace('"', '\\"')
-                escaped_translated = translated.replace('"', '\\"')
-                
-                # 替换原文件中的内容
-                pattern = f'msgid "{escaped_msgid}"\nmsgstr ""'
-                replacement = f'msgid "{escaped_msgid}"\nmsgstr "{escaped_translated}"'
-                content = content.replace(pattern, replacement)
-            
-            # 写回文件
+            ) if unique_texts else ([], set())
+            translations = {
+                text: translated
+                for i, (text, translated) in enumerate(zip(unique_texts, all_translated))
+                if i not in failed
+            }
+            
+            # 直接替换对应的msgstr行，不再反复扫描整个文件；翻译失败的条目保留空的msgstr
+            for line_no, msgid in pending:
+                if msgid in translations:
+                    lines[line_no] = f'msgstr "{_escape_po(translations[msgid])}"\n'
+                elif not _needs_translation(msgid):
+                    lines[line_no] = f'msgstr "{_escape_po(msgid)}"\n'
+            
+            # 逐行写回文件，不再拼接出整个文件内容
             with open(po_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+                f.writelines(lines)
             
-            # 显示完成信息
-            total_time = time.time() - start_time
-            print(f"文件 {os.path.basename(po_path)} 简单模式翻译完成! 用时: {total_time:.1f} 秒, 平均速度: {total_entries/total_time:.2f} 条目/秒")
+            # 显示完成信息（避免用时过短时除以零）
+            total_time = max(time.time() - start_time, 1e-6)
+            logger.info(f"文件 {name} 简单模式翻译完成! 用时: {total_time:.1f} 秒, 平均速度: {total_entries/total_time:.2f} 条目/秒")
+            if failed:
+                logger.warning(f"文件 {name} 中有 {len(failed)} 个条目翻译失败，下次运行时重新翻译")
             
         except Exception as e:
             logger.warning(f"使用简单方法翻译.po文件 {po_path} 时出错: {str(e)}")
-            print(f"使用简单方法翻译.po文件 {os.path.basename(po_path)} 时出错: {str(e)}")
+            tqdm.write(f"使用简单方法翻译.po文件 {name} 时出错: {str(e)}")
     
     def _build_translated_docs(self) -> bool:
         """构建翻译后的文档。
@@ -1,38 +1,81 @@
 """翻译缓存模块。
 
 这个模块提供翻译缓存功能，避免重复翻译相同的内容。
+缓存条目保存在SQLite数据库中，每次写入只更新变化的条目。
 """
 
 import os
-import json
+import atexit
 import hashlib
 import logging
 import re
-from typing import Dict, Optional, List, Tuple, Any
+import sqlite3
+import threading
+from typing import Dict, Optional, List, Tuple, Any, Iterable, Iterator
+
+from . import _json
 
 logger = logging.getLogger(__name__)
 
+# 当前缓存键的前缀，缓存键为"b2:"加原文、目标语言和模型的BLAKE2b-128哈希值
+_KEY_PREFIX = "b2:"
+# 已发布版本使用的缓存键：原文和目标语言（不含模型）的MD5哈希值，32位十六进制
+_LEGACY_KEY = re.compile(r'[0-9a-f]{32}')
+
+
+# 早期版本使用的JSON缓存文件名，首次打开数据库时会自动导入
+_LEGACY_JSON_FILE = "translation_cache.json"
+
+# lang列记录写入条目时的目标语言，用于语言分布统计；导入的条目没有这一信息，为NULL
+_CREATE_SQL = "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, lang TEXT)"
+_INSERT_SQL = "INSERT OR REPLACE INTO cache (key, value, lang) VALUES (?, ?, ?)"
+
+# 简单的语言检测规则，按顺序匹配
+_LANG_PATTERNS = (
+    # 含有中文字符
+    ("zh", re.compile(r'[\u4e00-\u9fff]')),
+    # 含有日文假名（平假名和片假名）
+    ("ja", re.compile(r'[\u3040-\u309f\u30a0-\u30ff]')),
+    # 含有韩文字符
+    ("ko", re.compile(r'[\uac00-\ud7af]')),
+    # 含有俄文字符
+    ("ru", re.compile(r'[\u0400-\u04ff]')),
+    # 含有拉丁字母，可能是英文或欧洲语言，默认作为英文
+    ("en", re.compile(r'[a-zA-Z]')),
+)
+
+
+def _is_legacy_key(key: str) -> bool:
+    """判断缓存键是否为已发布版本的MD5键。"""
+    return _LEGACY_KEY.fullmatch(key) is not None
+
 
 class TranslationCache:
     """翻译缓存类。
     
     这个类提供了翻译结果的缓存功能，可以避免重复翻译相同的内容。
+    缓存键由原文、目标语言和模型名称共同计算BLAKE2b哈希得到，
+    因此切换模型时不会误用其他模型的翻译结果。已发布版本不含模型的MD5键在首次命中时
+迁移为当前模型的新键，升级后不需要重新翻译已缓存的内容。
+    
+    缓存数据存储在WAL模式的SQLite数据库中，启动时整体读入内存，
+    新增的条目逐条（或按批）写入数据库，不再需要重写整个缓存文件，多个进程也可以共用同一个缓存。
     
     Parameters
     ----------
     cache_dir : str, optional
         缓存文件存储目录，默认为用户家目录下的.docs_translator/cache
     cache_file : str, optional
-        缓存文件名，默认为translation_cache.json
+        缓存数据库文件名，默认为translation_cache.db
     
     Attributes
     ----------
     cache_dir : str
         缓存文件存储目录
     cache_file : str
-        缓存文件名
+        缓存数据库文件名
     cache_path : str
-        完整的缓存文件路径
+        完整的缓存数据库路径
     cache : Dict
         内存中的缓存数据
     """
@@ -40,7 +83,7 @@ class TranslationCache:
     def __init__(
         self, 
         cache_dir: Optional[str] = None, 
-        cache_file: str = "translation_cache.json"
+        cache_file: str = "translation_cache.db"
     ):
         """初始化翻译缓存。
         
@@ -49,7 +92,7 @@ class TranslationCache:
         cache_dir : str, optional
             缓存文件存储目录，默认为用户家目录下的.docs_translator/cache
         cache_file : str, optional
-            缓存文件名，默认为translation_cache.json
+            缓存数据库文件名，默认为translation_cache.db
         """
         if cache_dir is None:
             # 默认使用用户家目录下的.docs_translator/cache目录
@@ -60,39 +103,129 @@ class TranslationCache:
         self.cache_file = cache_file
         self.cache_path = os.path.join(self.cache_dir, self.cache_file)
         self.cache = {}
+        # 缓存中是否还有已发布版本的MD5键，没有时查询不必再计算旧键
+        self._has_legacy_keys = False
+        # 多个线程同时处理文件时，保护缓存和数据库连接；
+        # 清空、导入和压缩会在持有锁时调用_save_cache，因此使用可重入锁
+        self._lock = threading.RLock()
         
         # 确保缓存目录存在
         os.makedirs(self.cache_dir, exist_ok=True)
         
-        # 加载现有缓存
+        # 打开数据库并加载现有缓存
+        self._conn = self._connect()
+        # 上次检查点之后是否写入过数据库
+        self._dirty = False
         self._load_cache()
         
+        # 进程退出时合并预写日志并关闭连接，不依赖__del__在解释器关闭阶段执行
+        atexit.register(self.close)
+        
         logger.info(f"翻译缓存初始化，缓存文件: {self.cache_path}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """打开缓存数据库，必要时创建数据表。
+        
+        数据库无法打开（例如文件已损坏）时改用内存数据库，翻译仍可正常进行，只是缓存不会保存。
+        
+        Returns
+        -------
+        sqlite3.Connection
+            数据库连接（自动提交模式，可跨线程使用）
+        """
+        try:
+            conn = sqlite3.connect(self.cache_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_CREATE_SQL)
+            # 早期创建的数据库没有lang列
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(cache)")]
+            if "lang" not in columns:
+                conn.execute("ALTER TABLE cache ADD COLUMN lang TEXT")
+            return conn
+        except sqlite3.Error as e:
+            logger.warning(f"打开缓存数据库失败: {str(e)}，缓存将不会被保存")
+            conn = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+            conn.execute(_CREATE_SQL)
+            return conn
+    
     def _load_cache(self) -> None:
-        """从文件加载缓存数据。"""
-        if os.path.exists(self.cache_path):
-            try:
-                with open(self.cache_path, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
-                logger.info(f"已加载翻译缓存，包含 {len(self.cache)} 个条目")
-            except Exception as e:
-                logger.warning(f"加载翻译缓存失败: {str(e)}，将使用空缓存")
-                self.cache = {}
-        else:
-            logger.info("缓存文件不存在，将使用空缓存")
+        """从数据库加载缓存数据。"""
+        try:
+            with self._lock:
+                self.cache = dict(self._conn.execute("SELECT key, value FROM cache"))
+        except sqlite3.Error as e:
+            logger.warning(f"加载翻译缓存失败: {str(e)}，将使用空缓存")
             self.cache = {}
+            return
+        
+        if not self.cache:
+            self._import_legacy_json()
+        
+        logger.info(f"已加载翻译缓存，包含 {len(self.cache)} 个条目")
+        self._check_legacy_keys()
+    
+    def _import_legacy_json(self) -> None:
+        """导入早期版本的JSON缓存文件。
+        
+        导入成功后JSON文件会被重命名为.bak，避免重复导入。
+        """
+        json_path = os.path.join(self.cache_dir, _LEGACY_JSON_FILE)
+        if not os.path.exists(json_path):
+            return
+        
+        try:
+            with open(json_path, 'rb') as f:
+                self.cache = _json.loads(f.read())
+        except Exception as e:
+            logger.warning(f"导入旧版JSON缓存失败: {str(e)}")
+            self.cache = {}
+            return
+        
+        self._save_cache()
+        os.replace(json_path, json_path + ".bak")
+        logger.info(f"已从 {json_path} 导入 {len(self.cache)} 个缓存条目")
+    
+    def _store(self, items: Iterable[Tuple[str, str, Optional[str]]], deleted: Iterable[str] = ()) -> None:
+        """在一个事务中把缓存条目写入数据库。
+        
+        Parameters
+        ----------
+        items : Iterable[Tuple[str, str, Optional[str]]]
+            要写入或覆盖的缓存键、翻译结果和目标语言
+        deleted : Iterable[str], optional
+            要删除的缓存键，默认为空
+        """
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", ((key,) for key in deleted))
+                self._conn.executemany(_INSERT_SQL, items)
+                self._dirty = True
+        except sqlite3.Error as e:
+            logger.warning(f"写入翻译缓存失败: {str(e)}")
     
     def _save_cache(self) -> None:
-        """将缓存数据保存到文件。"""
+        """用内存中的缓存数据整体替换数据库中的条目。
+        
+        set和batch_set会增量写入数据库，只有清空、导入和压缩这类整体替换缓存的操作才需要调用这个方法。
+        仍然存在的条目保留原有的目标语言记录。
+        """
         try:
-            with open(self.cache_path, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
+            with self._lock, self._conn:
+                self._conn.execute("BEGIN")
+                langs = dict(self._conn.execute("SELECT key, lang FROM cache WHERE lang IS NOT NULL"))
+                self._conn.execute("DELETE FROM cache")
+                self._conn.executemany(
+                    _INSERT_SQL,
+                    ((key, value, langs.get(key)) for key, value in self.cache.items())
+                )
+                self._dirty = True
             logger.info(f"已保存翻译缓存，包含 {len(self.cache)} 个条目")
-        except Exception as e:
+        except sqlite3.Error as e:
             logger.warning(f"保存翻译缓存失败: {str(e)}")
     
-    def _generate_key(self, text: str, target_lang: str) -> str:
+    def _generate_key(self, text: str, target_lang: str, model: str = "") -> str:
         """为翻译生成缓存键。
         
         Parameters
@@ -101,37 +234,71 @@ class TranslationCache:
             要翻译的文本
         target_lang : str
             目标语言
+        model : str, optional
+            翻译所用的模型名称，默认为空字符串
             
         Returns
         -------
         str
             缓存键
         """
-        # 使用原文和目标语言的组合生成唯一哈希值
+        # 使用原文、目标语言和模型的组合生成唯一哈希值；缓存键不需要抗碰撞的安全性，
+        # BLAKE2b比SHA-256更快
+        combined = f"{text}|{target_lang}|{model}"
+        return _KEY_PREFIX + hashlib.blake2b(combined.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _legacy_key(self, text: str, target_lang: str) -> str:
+        """生成已发布版本使用的MD5缓存键。
+        
+        旧键不包含模型名称，命中后由_migrate_legacy迁移到当前模型的新键下。
+        
+        Parameters
+        ----------
+        text : str
+            要翻译的文本
+        target_lang : str
+            目标语言
+            
+        Returns
+        -------
+        str
+            旧格式的缓存键
+        """
         combined = f"{text}|{target_lang}"
         return hashlib.md5(combined.encode('utf-8')).hexdigest()
     
-    def _extract_language_from_key(self, key: str) -> Optional[str]:
-        """从缓存条目中提取语言信息。
+    def _check_legacy_keys(self) -> None:
+        """检查缓存中是否还有早期版本的缓存键。"""
+        self._has_legacy_keys = any(_is_legacy_key(key) for key in self.cache)
+        if self._has_legacy_keys:
+            logger.info("缓存中包含旧格式的缓存键，将在命中时迁移")
+    
+    def _migrate_legacy(self, key: str, legacy_key: str, target_lang: str) -> Optional[str]:
+        """查找旧格式的缓存键，找到时迁移为新键。
         
-        参数
+        Parameters
         ----------
         key : str
-            缓存键
+            新格式的缓存键
+        legacy_key : str
+            对应的旧格式缓存键
+        target_lang : str
+            目标语言
             
-        返回
+        Returns
         -------
         Optional[str]
-            语言代码，如无法提取则返回None
+            缓存的翻译结果，如果旧键也不存在则返回None
         """
-        # 尝试从缓存中获取原始文本和目标语言
-        # 这是个近似方法，因为我们只有哈希值，无法恢复原始信息
-        for target_lang in ["zh-CN", "zh_CN", "en", "ja", "ko", "fr", "de", "es", "ru"]:
-            if key.endswith(target_lang):
-                return target_lang
-        return None
+        with self._lock:
+            value = self.cache.pop(legacy_key, None)
+            if value is not None:
+                self.cache[key] = value
+        if value is not None:
+            self._store([(key, value, target_lang)], deleted=[legacy_key])
+        return value
     
-    def get(self, text: str, target_lang: str) -> Optional[str]:
+    def get(self, text: str, target_lang: str, model: str = "") -> Optional[str]:
         """获取缓存的翻译结果。
         
         Parameters
@@ -140,16 +307,21 @@ class TranslationCache:
             要翻译的文本
         target_lang : str
             目标语言
+        model : str, optional
+            翻译所用的模型名称，默认为空字符串
             
         Returns
         -------
         Optional[str]
             缓存的翻译结果，如果缓存未命中则返回None
         """
-        key = self._generate_key(text, target_lang)
-        return self.cache.get(key)
+        key = self._generate_key(text, target_lang, model)
+        value = self.cache.get(key)
+        if value is None and self._has_legacy_keys:
+            value = self._migrate_legacy(key, self._legacy_key(text, target_lang), target_lang)
+        return value
     
-    def set(self, text: str, target_lang: str, translated_text: str) -> None:
+    def set(self, text: str, target_lang: str, translated_text: str, model: str = "") -> None:
         """设置翻译结果到缓存。
         
         Parameters
@@ -160,15 +332,17 @@ class TranslationCache:
             目标语言
         translated_text : str
             翻译后的文本
+        model : str, optional
+            翻译所用的模型名称，默认为空字符串
         """
-        key = self._generate_key(text, target_lang)
-        self.cache[key] = translated_text
+        key = self._generate_key(text, target_lang, model)
+        with self._lock:
+            self.cache[key] = translated_text
         
-        # 定期保存缓存，避免频繁IO
-        if len(self.cache) % 100 == 0:
-            self._save_cache()
+        # 只写入这一个条目
+        self._store([(key, translated_text, target_lang)])
     
-    def batch_get(self, texts: List[str], target_lang: str) -> Tuple[List[str], List[int]]:
+    def batch_get(self, texts: List[str], target_lang: str, model: str = "") -> Tuple[List[str], List[int]]:
         """批量获取缓存的翻译结果。
         
         Parameters
@@ -177,24 +351,70 @@ class TranslationCache:
             要翻译的文本列表
         target_lang : str
             目标语言
+        model : str, optional
+            翻译所用的模型名称，默认为空字符串
             
         Returns
         -------
         Tuple[List[str], List[int]]
             已缓存的翻译结果列表和对应的原始索引列表
         """
-        cached_translations = []
-        cached_indices = []
+        results, misses = self.batch_lookup(texts, target_lang, model)
+        missed = set(misses)
+        cached_indices = [i for i in range(len(texts)) if i not in missed]
+        return [results[i] for i in cached_indices], cached_indices
+    
+    def batch_lookup(
+        self,
+        texts: List[str],
+        target_lang: str,
+        model: str = ""
+    ) -> Tuple[List[Optional[str]], List[int]]:
+        """批量查询缓存，同时返回命中结果和未命中的索引。
+        
+        与逐条调用get相比，目标语言和模型部分只编码一次，每个文本只计算一次哈希。
+        
+        Parameters
+        ----------
+        texts : List[str]
+            要翻译的文本列表
+        target_lang : str
+            目标语言
+        model : str, optional
+            翻译所用的模型名称，默认为空字符串
+            
+        Returns
+        -------
+        Tuple[List[Optional[str]], List[int]]
+            与texts一一对应的缓存结果（未命中为None）和未命中文本的索引列表
+        """
+        # 与_generate_key的结果一致：_KEY_PREFIX + blake2b(f"{text}|{target_lang}|{model}")
+        suffix = f"|{target_lang}|{model}".encode('utf-8')
+        blake2b = hashlib.blake2b
+        cache_get = self.cache.get
+        keys = [
+            _KEY_PREFIX + blake2b(text.encode('utf-8') + suffix, digest_size=16).hexdigest()
+            for text in texts
+        ]
+        results = [cache_get(key) for key in keys]
+        misses = [i for i, value in enumerate(results) if value is None]
         
-        for i, text in enumerate(texts):
-            cached = self.get(text, target_lang)
-            if cached is not None:
-                cached_translations.append(cached)
-                cached_indices.append(i)
+        if misses and self._has_legacy_keys:
+            for i in misses:
+                results[i] = self._migrate_legacy(
+                    keys[i], self._legacy_key(texts[i], target_lang), target_lang
+                )
+            misses = [i for i in misses if results[i] is None]
         
-        return cached_translations, cached_indices
+        return results, misses
     
-    def batch_set(self, texts: List[str], target_lang: str, translated_texts: List[str]) -> None:
+    def batch_set(
+        self,
+        texts: List[str],
+        target_lang: str,
+        translated_texts: List[str],
+        model: str = ""
+    ) -> None:
         """批量设置翻译结果到缓存。
         
         Parameters
@@ -205,16 +425,39 @@ class TranslationCache:
             目标语言
         translated_texts : List[str]
             翻译后的文本列表
+        model : str, optional
+            翻译所用的模型名称，默认为空字符串
         """
-        for text, translated in zip(texts, translated_texts):
-            self.set(text, target_lang, translated)
+        # 先计算所有缓存键，再一次性更新内存缓存
+        items = list(zip((self._generate_key(text, target_lang, model) for text in texts), translated_texts))
+        with self._lock:
+            self.cache.update(items)
         
-        # 批量设置后保存缓存
-        self._save_cache()
+        # 所有条目在一个事务中写入数据库
+        self._store((key, value, target_lang) for key, value in items)
     
     def save(self) -> None:
-        """强制保存缓存到文件。"""
-        self._save_cache()
+        """把数据库的预写日志合并到缓存文件中。
+        
+        条目在写入缓存时已经保存到数据库，这个方法不会重写整个缓存；
+        上次调用之后没有写入时直接返回。
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                self._dirty = False
+            except sqlite3.Error as e:
+                logger.warning(f"保存翻译缓存失败: {str(e)}")
+    
+    def close(self) -> None:
+        """合并预写日志并关闭缓存数据库连接。"""
+        self.save()
+        with self._lock:
+            self._conn.close()
+            self._dirty = False
+        atexit.unregister(self.close)
     
     def get_stats(self) -> Dict:
         """获取缓存统计信息。
@@ -222,30 +465,48 @@ class TranslationCache:
         Returns
         -------
         Dict
-            缓存统计信息，包括缓存条目数量等
+            缓存统计信息，包括缓存条目数量、缓存文件路径和文件大小（字节）
         """
+        try:
+            size_bytes = os.path.getsize(self.cache_path)
+        except OSError:
+            size_bytes = 0
+        
         return {
             "cache_entries": len(self.cache),
-            "cache_file": self.cache_path
+            "cache_file": self.cache_path,
+            "size_bytes": size_bytes
         }
     
     def get_language_stats(self) -> Dict[str, int]:
         """获取缓存中的语言分布统计。
         
+        写入时记录了目标语言的条目直接在数据库中分组计数，
+        只有导入的、没有目标语言记录的条目才需要根据元数据或内容推断。
+        
         Returns
         -------
         Dict[str, int]
             各目标语言的条目数量
         """
-        language_counts = {}
+        try:
+            with self._lock:
+                language_counts = dict(self._conn.execute(
+                    "SELECT lang, COUNT(*) FROM cache WHERE lang IS NOT NULL GROUP BY lang"
+                ))
+                unknown_keys = [row[0] for row in self._conn.execute("SELECT key FROM cache WHERE lang IS NULL")]
+        except sqlite3.Error as e:
+            logger.warning(f"读取缓存语言统计失败: {str(e)}")
+            language_counts, unknown_keys = {}, list(self.cache)
         
-        # 尝试根据常见语言代码匹配
-        for key in self.cache.keys():
+        for key in unknown_keys:
+            if key.startswith("__meta__") or key not in self.cache:
+                continue
             # 存储原始键和目标语言的映射
             meta_key = f"__meta__{key}"
             if meta_key in self.cache:
                 # 如果有元数据，直接使用
-                meta = json.loads(self.cache[meta_key])
+                meta = _json.loads(self.cache[meta_key])
                 lang = meta.get("target_lang")
             else:
                 # 否则尝试从内容推断
@@ -272,28 +533,17 @@ class TranslationCache:
         Optional[str]
             检测到的语言代码，无法确定时返回None
         """
-        # 简单的语言检测规则
-        if re.search(r'[\u4e00-\u9fff]', text):
-            # 含有中文字符
-            return "zh"
-        elif re.search(r'[あ-んア-ン]', text):
-            # 含有日文假名
-            return "ja"
-        elif re.search(r'[가-힣]', text):
-            # 含有韩文字符
-            return "ko"
-        elif re.search(r'[а-яА-Я]', text):
-            # 含有俄文字符
-            return "ru"
-        elif re.search(r'[a-zA-Z]', text):
-            # 含有拉丁字母，可能是英文或欧洲语言
-            return "en"  # 默认作为英文
+        # 按顺序匹配，第一个命中的规则即为结果
+        for lang, pattern in _LANG_PATTERNS:
+            if pattern.search(text):
+                return lang
         return None
     
     def clear(self) -> None:
         """清空缓存。"""
-        self.cache = {}
-        self._save_cache()
+        with self._lock:
+            self.cache = {}
+            self._save_cache()
         logger.info("翻译缓存已清空")
     
     def export_data(self) -> Dict[str, str]:
@@ -306,6 +556,48 @@ class TranslationCache:
         """
         return self.cache.copy()
     
+    def iter_entries(self) -> Iterator[Tuple[str, str]]:
+        """逐条遍历缓存条目。
+        
+        与export_data不同，这个方法不会复制整个缓存，适合流式导出大型缓存。
+        
+        Yields
+        ------
+        Tuple[str, str]
+            缓存键和对应的翻译结果
+        """
+        yield from self.cache.items()
+    
+    def import_entries(self, entries: Iterable[Tuple[str, str]], merge: bool = False) -> int:
+        """从可迭代对象逐条导入缓存条目。
+        
+        Parameters
+        ----------
+        entries : Iterable[Tuple[str, str]]
+            缓存键和翻译结果组成的可迭代对象
+        merge : bool, optional
+            是否与现有缓存合并，默认为False（替换）
+            
+        Returns
+        -------
+        int
+            导入后的缓存条目数量
+        """
+        # 先完整读取新条目，避免读取失败时丢失原有缓存，也避免读取期间持有锁
+        entries = dict(entries)
+        with self._lock:
+            if not merge:
+                # 替换模式
+                self.cache = entries
+            else:
+                # 合并模式
+                self.cache.update(entries)
+            self._check_legacy_keys()
+            
+            # 保存更新后的缓存
+            self._save_cache()
+            return len(self.cache)
+    
     def import_data(self, data: Dict[str, str], merge: bool = False) -> int:
         """导入缓存数据。
         
@@ -321,33 +613,43 @@ class TranslationCache:
         int
             导入后的缓存条目数量
         """
-        if not merge:
-            # 替换模式
-            self.cache = data.copy()
-        else:
-            # 合并模式
-            self.cache.update(data)
-        
-        # 保存更新后的缓存
-        self._save_cache()
-        return len(self.cache)
+        with self._lock:
+            if not merge:
+                # 替换模式
+                self.cache = data.copy()
+            else:
+                # 合并模式
+                self.cache.update(data)
+            self._check_legacy_keys()
+            
+            # 保存更新后的缓存
+            self._save_cache()
+            return len(self.cache)
     
     def compact(self) -> int:
-        """压缩缓存，删除重复项。
+        """压缩缓存，删除无效条目。
+        
+        缓存键是原文、目标语言和模型的哈希值，本身不会重复，
+        因此压缩只需一次遍历：丢弃空翻译结果，以及对应条目已不存在的元数据条目。
         
         Returns
         -------
         int
             压缩后的缓存条目数量
         """
-        # 实际上，按照当前的实现，缓存键是唯一的（MD5哈希），
-        # 所以理论上不会有重复项。这个方法主要是为了未来可能的
-        # 缓存结构变化做准备。
-        
-        # 当前实现只是重新保存缓存
-        self._save_cache()
-        return len(self.cache)
-    
-    def __del__(self):
-        """析构函数，确保缓存被保存。"""
-        self._save_cache()
\ No newline at end of file
+        with self._lock:
+            compacted = {}
+            for key, value in self.cache.items():
+                if not isinstance(value, str) or not value:
+                    continue
+                if key.startswith("__meta__") and not self.cache.get(key[len("__meta__"):]):
+                    continue
+                compacted[key] = value
+            
+            removed = len(self.cache) - len(compacted)
+            if removed:
+                logger.info(f"压缩缓存，删除了 {removed} 个无效条目")
+            
+            self.cache = compacted
+            self._save_cache()
+            return len(self.cache)
\ No newline at end of file
@@ -4,18 +4,378 @@
 """
 
 import os
-import json
+import re
+import random
+import hashlib
+import functools
 import logging
-from typing import Dict, List, Optional, Union, Any, Tuple
+import tempfile
+import threading
+from typing import Dict, List, Optional, Set, Union, Any, Tuple
 
 import requests
 import time
+from tqdm import tqdm
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
+from . import _json
 from .translation_cache import TranslationCache
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# Batch API任务的结束状态
+_BATCH_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# 无法从中获取结果、需要重新提交的状态
+_BATCH_FAILED_STATUSES = {"failed", "expired", "cancelled", "cancelling"}
+# 无需翻译的文本：网址、只含数字和符号的文本（包括空白）、十六进制哈希值
+_NON_TRANSLATABLE = re.compile(r'\s*(?:https?://\S+|[\W\d_]+|[A-Fa-f0-9]{16,})?\s*')
+# 请求体由_json序列化后以字节发送，需要显式声明类型
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# 可以重试的HTTP状态码：请求超时、限流和服务端临时错误
+_RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+# 可重试错误的最大重试次数和单次等待的最长秒数
+_MAX_RETRIES = 4
+_MAX_RETRY_DELAY = 30.0
+# 连续失败多少次后熔断，以及熔断后等待多少秒再放行一个探测请求
+_BREAKER_THRESHOLD = 5
+_BREAKER_COOLDOWN = 60.0
+# 按token预算打包批次时的默认预算，以及估算token数时每个token约对应的字符数
+_DEFAULT_BATCH_TOKENS = 3000
+_CHARS_PER_TOKEN = 4
+# 按token预算打包时每批最多的条目数量，条目过多时模型更容易返回长度不符的数组
+_MAX_BATCH_ITEMS = 50
+# 批量翻译时标记每个条目开始位置的分隔符
+_SEGMENT_MARKER = "<<<SEG {}>>>"
+_SEGMENT_MARKER_RE = re.compile(r"<<<SEG (\d+)>>>[ \t]*\n?")
+
+
+class CircuitOpenError(Exception):
+    """翻译API连续失败后熔断，冷却期内的请求直接被拒绝。"""
+
+
+class _CircuitBreaker:
+    """线程安全的熔断器。
+    
+    请求连续失败达到阈值后进入熔断状态，冷却期内直接拒绝请求；
+    冷却期结束后只放行一个探测请求，成功则恢复，失败则重新开始冷却。
+    
+    Parameters
+    ----------
+    threshold : int, optional
+        触发熔断的连续失败次数，默认为_BREAKER_THRESHOLD
+    cooldown : float, optional
+        熔断后等待的秒数，默认为_BREAKER_COOLDOWN
+    """
+    
+    def __init__(self, threshold: int = _BREAKER_THRESHOLD, cooldown: float = _BREAKER_COOLDOWN):
+        """初始化熔断器。
+        
+        Parameters
+        ----------
+        threshold : int, optional
+            触发熔断的连续失败次数，默认为_BREAKER_THRESHOLD
+        cooldown : float, optional
+            熔断后等待的秒数，默认为_BREAKER_COOLDOWN
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def check(self) -> bool:
+        """检查是否允许发送请求。
+        
+        Returns
+        -------
+        bool
+            本次请求是否为冷却期结束后的探测请求
+        
+        Raises
+        ------
+        CircuitOpenError
+            熔断器处于熔断状态，或冷却期结束后已有探测请求在进行中
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown:
+                raise CircuitOpenError(f"翻译API连续失败 {self._failures} 次，暂停发送请求")
+            self._probing = True
+            return True
+    
+    def record_success(self) -> None:
+        """记录一次成功的请求，关闭熔断器。"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+    
+    def end_probe(self) -> None:
+        """结束探测请求，但不改变熔断状态。
+        
+        探测请求以既不算成功也不算失败的异常结束时调用，让之后的请求可以再次探测。
+        """
+        with self._lock:
+            self._probing = False
+    
+    def record_failure(self) -> None:
+        """记录一次失败的请求，连续失败达到阈值时熔断。"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.error(f"翻译API连续失败 {self._failures} 次，{self.cooldown:.0f}秒内不再发送请求")
+                self._opened_at = time.monotonic()
+
+
+class _RateLimiter:
+    """线程安全的请求速率限制器。
+    
+    按固定间隔为每个请求分配发送时刻，多个线程同时请求时依次排队，
+    请求在一分钟内均匀发出，而不是在固定批次之间等待。
+    
+    Parameters
+    ----------
+    rpm : int, optional
+        每分钟最多发送的请求数量，为None或不大于0时不限制
+    """
+    
+    def __init__(self, rpm: Optional[int] = None):
+        """初始化速率限制器。
+        
+        Parameters
+        ----------
+        rpm : int, optional
+            每分钟最多发送的请求数量，为None或不大于0时不限制
+        """
+        self.interval = 60.0 / rpm if rpm and rpm > 0 else 0.0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """等待到下一个可用的发送时刻。"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_time)
+            self._next_time = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _retry_delay(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """计算第attempt次重试前的等待秒数。
+    
+    响应带有数值形式的Retry-After头时按其等待，否则使用带随机抖动的指数退避。
+    
+    Parameters
+    ----------
+    attempt : int
+        已经失败的次数减一（从0开始）
+    response : requests.Response, optional
+        失败请求的响应，网络错误时为None
+        
+    Returns
+    -------
+    float
+        等待秒数
+    """
+    if response is not None:
+        try:
+            return max(0.0, float(response.headers.get("Retry-After", "")))
+        except (TypeError, ValueError):
+            pass
+    return min(_MAX_RETRY_DELAY, 2.0 ** attempt) * (1 + random.random() * 0.5)
+
+
+def _pack_batches(
+    texts: List[str],
+    batch_size: int,
+    max_tokens: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """按顺序将文本划分为批次。
+    
+    设置了max_tokens时按token预算贪心打包：依次加入文本，直到估算的token数将超过预算
+    或条目数达到上限时开始新的批次，超过预算的单条文本单独成批；否则每批固定batch_size个文本。
+    
+    Parameters
+    ----------
+    texts : List[str]
+        要划分的文本列表
+    batch_size : int
+        未设置token预算时每批的文本数量
+    max_tokens : int, optional
+        每批估算的token上限，为None或不大于0时按batch_size划分
+        
+    Returns
+    -------
+    List[Tuple[int, int]]
+        每个批次在texts中的[start, end)区间
+    """
+    if not max_tokens or max_tokens <= 0:
+        step = max(1, batch_size)
+        return [(i, min(i + step, len(texts))) for i in range(0, len(texts), step)]
+    
+    batches = []
+    start = tokens = 0
+    for i, text in enumerate(texts):
+        # 粗略估算：每个token约4个字符，另加条目本身的开销
+        cost = len(text) // _CHARS_PER_TOKEN + 1
+        if i > start and (tokens + cost > max_tokens or i - start >= _MAX_BATCH_ITEMS):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+def _preview(text: str, width: int = 30) -> str:
+    """截取文本开头用于日志中的翻译示例。
+    
+    不使用textwrap.shorten，因为它按空白断词，会把没有空格的中文整段替换为占位符。
+    
+    Parameters
+    ----------
+    text : str
+        要截取的文本
+    width : int, optional
+        保留的最多字符数，默认为30
+        
+    Returns
+    -------
+    str
+        超出长度时截断并追加"..."的文本
+    """
+    return text[:width] + "..." if len(text) > width else text
+
+
+def _default_cache_dir() -> str:
+    """获取默认缓存目录。
+    
+    Returns
+    -------
+    str
+        用户家目录下的.docs_translator/cache目录
+    """
+    return os.path.join(os.path.expanduser("~"), ".docs_translator", "cache")
+
+
+def _strip_code_fence(content: str) -> str:
+    """去除模型返回内容外层可能包裹的Markdown代码围栏。
+    
+    Parameters
+    ----------
+    content : str
+        模型返回的原始内容
+        
+    Returns
+    -------
+    str
+        去除代码围栏后的内容
+    """
+    content = content.strip()
+    if content.startswith("```") and content.endswith("```"):
+        # 去掉首行（可能带有语言标记，如```json）和末尾的围栏
+        first_newline = content.find("\n")
+        if first_newline != -1:
+            content = content[first_newline + 1:-3].strip()
+    return content
+
+
+@functools.lru_cache(maxsize=None)
+def _system_prompt(target_lang: str) -> str:
+    """构建单条文本翻译的系统提示词，按目标语言缓存。
+    
+    Parameters
+    ----------
+    target_lang : str
+        目标语言
+        
+    Returns
+    -------
+    str
+        系统提示词
+    """
+    return (
+        f"你是一个专业的翻译助手。请将以下文本翻译成{target_lang}，"
+        "保持原文的格式和专业术语准确性。不要添加任何解释或额外内容。"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _batch_system_prompt(target_lang: str, count: int) -> str:
+    """构建批量翻译的系统提示词，按目标语言和条目数量缓存。
+    
+    Parameters
+    ----------
+    target_lang : str
+        目标语言
+    count : int
+        批次中的条目数量
+        
+    Returns
+    -------
+    str
+        系统提示词
+    """
+    return (
+        f"你是一个专业的翻译助手。用户消息包含{count}个条目，"
+        "每个条目前有一行形如<<<SEG 0>>>的编号分隔符。"
+        f"请将每个条目分别翻译成{target_lang}，保持每个条目的格式和专业术语准确性。"
+        "返回时原样保留每个分隔符行，并在其后给出对应条目的译文。"
+        "不要合并或拆分条目，不要添加任何解释或额外内容。"
+    )
+
+
+def _join_segments(texts: List[str]) -> str:
+    """用编号分隔符将多个条目拼接为一条批量翻译消息。
+    
+    Parameters
+    ----------
+    texts : List[str]
+        要翻译的文本列表
+        
+    Returns
+    -------
+    str
+        每个条目前带有"<<<SEG i>>>"分隔行的文本
+    """
+    return "".join(f"{_SEGMENT_MARKER.format(i)}\n{text}\n" for i, text in enumerate(texts))
+
+
+def _split_segments(content: str, count: int) -> Optional[List[str]]:
+    """按编号分隔符拆分模型返回的批量译文。
+    
+    Parameters
+    ----------
+    content : str
+        模型返回的内容
+    count : int
+        预期的条目数量
+        
+    Returns
+    -------
+    Optional[List[str]]
+        按编号排列的译文列表；编号缺失、重复或越界时返回None
+    """
+    parts = _SEGMENT_MARKER_RE.split(_strip_code_fence(content))
+    # parts依次为：分隔符前的内容、编号、译文、编号、译文……
+    translations: Dict[int, str] = {}
+    for i in range(1, len(parts) - 1, 2):
+        index = int(parts[i])
+        if index in translations or index >= count:
+            return None
+        translations[index] = parts[i + 1].strip("\n")
+    if len(translations) != count:
+        return None
+    return [translations[i] for i in range(count)]
+
 
 class BaseTranslator:
     """翻译器基类。
@@ -34,6 +394,12 @@ class BaseTranslator:
         是否使用翻译缓存，默认为True
     cache_dir : str, optional
         缓存目录，默认为None（使用默认目录）
+    concurrency : int, optional
+        所有线程共享的同时进行的API请求数量上限，默认为8（设为1时串行）
+    rate_limit_rpm : int, optional
+        每分钟最多发送的API请求数量，默认为None（不限制）
+    max_batch_tokens : int, optional
+        每批翻译请求估算的token上限，默认为3000；为None或0时每批固定batch_size个文本
     
     Attributes
     ----------
@@ -51,6 +417,10 @@ class BaseTranslator:
         是否使用翻译缓存
     cache_stats : Dict
         缓存使用统计
+    concurrency : int
+        所有线程共享的同时进行的API请求数量上限
+    max_batch_tokens : int or None
+        每批翻译请求估算的token上限
     """
     
     def __init__(
@@ -59,7 +429,10 @@ class BaseTranslator:
         api_base: Optional[str] = "https://api.openai.com/v1", 
         model: str = "gpt-3.5-turbo",
         use_cache: bool = True,
-        cache_dir: Optional[str] = None
+        cache_dir: Optional[str] = None,
+        concurrency: int = 8,
+        rate_limit_rpm: Optional[int] = None,
+        max_batch_tokens: Optional[int] = _DEFAULT_BATCH_TOKENS
     ):
         """初始化翻译器。
         
@@ -75,10 +448,22 @@ class BaseTranslator:
             是否使用翻译缓存，默认为True
         cache_dir : str, optional
             缓存目录，默认为None（使用默认目录）
+        concurrency : int, optional
+            所有线程共享的同时进行的API请求数量上限，默认为8（设为1时串行）
+        rate_limit_rpm : int, optional
+            每分钟最多发送的API请求数量，默认为None（不限制）
+        max_batch_tokens : int, optional
+            每批翻译请求估算的token上限，默认为3000；为None或0时每批固定batch_size个文本
         """
         self.api_key = api_key
         self.api_base = api_base
         self.model = model
+        self.concurrency = max(1, concurrency)
+        self.max_batch_tokens = max_batch_tokens
+        # 所有线程共用的请求速率限制
+        self._rate_limiter = _RateLimiter(rate_limit_rpm)
+        # API持续不可用时快速失败，而不是让每个片段都等待超时和重试
+        self._breaker = _CircuitBreaker()
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}"
@@ -91,12 +476,47 @@ class BaseTranslator:
             "hits": 0,         # 缓存命中次数
             "misses": 0,       # 缓存未命中次数
             "saved_calls": 0,  # 节省的API调用次数
+            "skipped": 0,      # 无需翻译而直接返回原文的次数
             "total_requests": 0  # 总请求次数
         }
+        # 多个线程共用同一个翻译器时，保护统计计数的更新
+        self._stats_lock = threading.Lock()
+        # 正在翻译中的文本，(文本, 目标语言) -> 翻译结果的Future
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._inflight_lock = threading.Lock()
+        # 所有翻译请求共用的线程池：无论有多少个线程同时调用翻译器，
+        # 同时进行的请求都不超过concurrency个
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="translator")
         
         if self.use_cache:
             logger.info("已启用翻译缓存")
     
+    def close(self) -> None:
+        """关闭翻译器持有的资源，默认关闭请求线程池和翻译缓存。"""
+        self._executor.shutdown()
+        if self.cache is not None:
+            self.cache.close()
+    
+    def __enter__(self) -> "BaseTranslator":
+        """进入上下文时返回翻译器本身。"""
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        """退出上下文时关闭翻译器。"""
+        self.close()
+    
+    def _update_stats(self, **deltas: int) -> None:
+        """线程安全地累加缓存统计计数。
+        
+        Parameters
+        ----------
+        **deltas : int
+            各统计项的增量
+        """
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.cache_stats[name] += delta
+    
     def translate(self, text: str, target_lang: str = "zh-CN") -> str:
         """翻译文本到目标语言。
         
@@ -117,24 +537,29 @@ class BaseTranslator:
         Exception
             如果翻译过程中出现错误
         """
-        self.cache_stats["total_requests"] += 1
+        self._update_stats(total_requests=1)
+        
+        # 网址、数字和符号等无需翻译的文本直接返回，不查询缓存也不调用API
+        if _NON_TRANSLATABLE.fullmatch(text):
+            self._update_stats(skipped=1, saved_calls=1)
+            return text
         
         # 检查缓存
         if self.use_cache:
-            cached_translation = self.cache.get(text, target_lang)
+            cached_translation = self.cache.get(text, target_lang, self.model)
             if cached_translation is not None:
-                self.cache_stats["hits"] += 1
+                self._update_stats(hits=1)
                 logger.debug(f"缓存命中: {text[:30]}...")
                 return cached_translation
             else:
-                self.cache_stats["misses"] += 1
+                self._update_stats(misses=1)
         
-        # 子类必须实现_translate方法
-        translated = self._translate(text, target_lang)
+        # 子类必须实现_translate方法；请求在共用线程池中发送，与批量翻译共享并发上限
+        translated = self._executor.submit(self._translate, text, target_lang).result()
         
         # 保存到缓存
         if self.use_cache and translated:
-            self.cache.set(text, target_lang, translated)
+            self.cache.set(text, target_lang, translated, self.model)
         
         return translated
     
@@ -165,127 +590,332 @@ class BaseTranslator:
         target_lang : str, optional
             目标语言，默认为"zh-CN"
         batch_size : int, optional
-            每批处理的文本数量，默认为10
+            每批处理的文本数量，默认为10，仅在未设置max_batch_tokens时生效
             
         Returns
         -------
         List[str]
-            翻译后的文本列表，顺序与输入列表相同
+            翻译后的文本列表，顺序与输入列表相同，翻译失败的条目保留原文
+            
+        Raises
+        ------
+        Exception
+            如果翻译过程中出现错误
+        """
+        return self.batch_translate_with_failures(texts, target_lang, batch_size)[0]
+    
+    def batch_translate_with_failures(
+        self,
+        texts: List[str],
+        target_lang: str = "zh-CN",
+        batch_size: int = 10
+    ) -> Tuple[List[str], Set[int]]:
+        """批量翻译多个文本，并报告哪些条目未能翻译。
+        
+        与batch_translate相同，翻译失败的条目保留原文，但调用方可以据此
+        避免把未翻译的结果当作已完成的翻译保存下来。
+        
+        Parameters
+        ----------
+        texts : List[str]
+            要翻译的文本列表
+        target_lang : str, optional
+            目标语言，默认为"zh-CN"
+        batch_size : int, optional
+            每批处理的文本数量，默认为10，仅在未设置max_batch_tokens时生效
+            
+        Returns
+        -------
+        Tuple[List[str], Set[int]]
+            翻译后的文本列表，以及翻译失败（结果为原文）的条目索引
             
         Raises
         ------
         Exception
             如果翻译过程中出现错误
         """
+        if not texts:
+            return [], set()
+        
         # 创建结果数组
-        results = [None] * len(texts)
         total = len(texts)
-        self.cache_stats["total_requests"] += total
+        results: List[Optional[str]] = [None] * total
+        
+        # 网址、数字和符号等无需翻译的文本直接使用原文，不查询缓存也不调用API
+        pending_indices = []
+        for i, text in enumerate(texts):
+            if _NON_TRANSLATABLE.fullmatch(text):
+                results[i] = text
+            else:
+                pending_indices.append(i)
+        skipped = total - len(pending_indices)
+        if skipped:
+            self._update_stats(skipped=skipped, saved_calls=skipped)
+            logger.debug(f"跳过 {skipped} 个无需翻译的文本")
+        pending_total = len(pending_indices)
         
         # 首先检查缓存并填充已缓存的翻译
         uncached_texts = []
         uncached_indices = []
         
         if self.use_cache:
-            cached_stats = {"before": self.cache.get_stats()["cache_entries"]}
+            cached_stats = {"before": len(self.cache.cache)}
             
-            # 检查每个文本是否已缓存
-            for i, text in enumerate(texts):
-                cached = self.cache.get(text, target_lang)
-                if cached is not None:
-                    results[i] = cached
-                    self.cache_stats["hits"] += 1
-                else:
-                    uncached_texts.append(text)
-                    uncached_indices.append(i)
-                    self.cache_stats["misses"] += 1
+            # 一次性查询所有文本的缓存，只有未命中的文本需要翻译
+            cached, misses = self.cache.batch_lookup([texts[i] for i in pending_indices], target_lang, self.model)
+            for i, translated in zip(pending_indices, cached):
+                results[i] = translated
+            uncached_indices = [pending_indices[j] for j in misses]
+            uncached_texts = [texts[i] for i in uncached_indices]
             
-            logger.info(f"缓存命中率: {self.cache_stats['hits']}/{total} ({self.cache_stats['hits']/total*100:.1f}%)")
-            print(f"缓存命中率: {self.cache_stats['hits']}/{total} ({self.cache_stats['hits']/total*100:.1f}%)")
+            # 本次调用的统计一次性累加，避免多线程时逐条加锁
+            hits = pending_total - len(uncached_texts)
+            self._update_stats(
+                total_requests=total,
+                hits=hits,
+                misses=len(uncached_texts),
+                saved_calls=hits
+            )
             
-            if not uncached_texts:
-                logger.info(f"所有 {total} 个文本都已在缓存中，跳过API调用")
-                print(f"所有 {total} 个文本都已在缓存中，跳过API调用")
-                self.cache_stats["saved_calls"] += total
-                return results
+            if pending_total:
+                logger.info(f"缓存命中率: {hits}/{pending_total} ({hits/pending_total*100:.1f}%)")
             
-            self.cache_stats["saved_calls"] += (total - len(uncached_texts))
+            if not uncached_texts:
+                logger.info(f"所有 {total} 个文本都已在缓存中或无需翻译，跳过API调用")
+                return results, set()
         else:
-            # 不使用缓存，所有文本都需要翻译
-            uncached_texts = texts
-            uncached_indices = list(range(total))
+            self._update_stats(total_requests=total)
+            # 不使用缓存，所有需要翻译的文本都要调用API
+            uncached_indices = pending_indices
+            uncached_texts = [texts[i] for i in uncached_indices]
+            if not uncached_texts:
+                return results, set()
+        
+        # 对相同的文本去重，每个唯一文本只翻译一次
+        positions: Dict[str, List[int]] = {}
+        for text, index in zip(uncached_texts, uncached_indices):
+            positions.setdefault(text, []).append(index)
+        unique_texts = list(positions)
         
-        # 分批翻译未缓存的文本
         uncached_total = len(uncached_texts)
-        logger.info(f"需要翻译 {uncached_total} 个未缓存的文本")
-        print(f"需要翻译 {uncached_total} 个未缓存的文本")
+        unique_total = len(unique_texts)
+        logger.debug(
+            f"去重: {uncached_total} 个文本中有 {unique_total} 个唯一文本 "
+            f"(去重率 {(1 - unique_total / uncached_total) * 100:.1f}%)"
+        )
         
-        for i in range(0, uncached_total, batch_size):
-            batch_texts = uncached_texts[i:i+batch_size]
-            batch_indices = uncached_indices[i:i+batch_size]
-            batch_size_actual = len(batch_texts)
-            
-            logger.info(f"翻译批次 {i//batch_size + 1}/{(uncached_total + batch_size - 1)//batch_size}: {i}-{min(i+batch_size_actual, uncached_total)}/{uncached_total}")
-            print(f"翻译批次 {i//batch_size + 1}/{(uncached_total + batch_size - 1)//batch_size}: {i}-{min(i+batch_size_actual, uncached_total)}/{uncached_total}")
-            
-            # 翻译当前批次
-            try:
-                # 尝试使用批量API翻译
-                batch_translated = self._batch_translate(batch_texts, target_lang)
-                
-                # 更新结果数组和缓存
-                for idx, translated_text, original_text in zip(batch_indices, batch_translated, batch_texts):
-                    results[idx] = translated_text
-                    
-                    # 保存到缓存
-                    if self.use_cache and translated_text:
-                        self.cache.set(original_text, target_lang, translated_text)
-                
-                # 显示示例
-                if batch_translated:
-                    src_preview = batch_texts[0][:30] + "..." if len(batch_texts[0]) > 30 else batch_texts[0]
-                    tgt_preview = batch_translated[0][:30] + "..." if len(batch_translated[0]) > 30 else batch_translated[0]
-                    print(f"  示例: '{src_preview}' -> '{tgt_preview}'")
-                
-            except Exception as e:
-                logger.error(f"批量翻译出错: {str(e)}")
-                print(f"批量翻译出错: {str(e)}")
-                
-                # 回退到逐条翻译
-                print("回退到逐条翻译...")
-                for j, (text, idx) in enumerate(zip(batch_texts, batch_indices)):
-                    try:
-                        translated = self.translate(text, target_lang)
-                        results[idx] = translated
-                    except Exception as inner_e:
-                        logger.warning(f"单条翻译出错: {str(inner_e)}")
-                        print(f"单条翻译出错: {str(inner_e)}")
-                        # 如果翻译失败，使用原文
-                        results[idx] = text
-            
-            # 添加短暂延迟以避免API限制
-            if i + batch_size < uncached_total:
-                time.sleep(0.5)
+        # 分批翻译未缓存的文本
+        logger.info(f"需要翻译 {unique_total} 个未缓存的文本")
+        
+        # 其他线程正在翻译的相同文本不再重复请求，而是等待其结果
+        owned, waiting = self._claim_inflight(unique_texts, target_lang)
+        if waiting:
+            logger.debug(f"{len(waiting)} 个文本正由其他线程翻译，等待其结果")
+        
+        unique_results: List[Optional[str]] = [None] * unique_total
+        owned_texts = [unique_texts[i] for i in owned]
+        try:
+            if owned_texts:
+                self._translate_uncached(owned_texts, owned, unique_results, target_lang, batch_size)
+        finally:
+            self._release_inflight(owned_texts, [unique_results[i] for i in owned], target_lang)
+        
+        for i, future in waiting:
+            unique_results[i] = future.result()
+        
+        # 将翻译结果分发回所有重复位置
+        for text, translated in zip(unique_texts, unique_results):
+            for index in positions[text]:
+                results[index] = translated
         
         # 显示缓存统计
         if self.use_cache:
-            cached_stats["after"] = self.cache.get_stats()["cache_entries"]
+            cached_stats["after"] = len(self.cache.cache)
             new_entries = cached_stats["after"] - cached_stats["before"]
             logger.info(f"翻译完成，新增 {new_entries} 个缓存条目")
-            print(f"翻译完成，新增 {new_entries} 个缓存条目")
             
-            # 保存缓存
+            # 条目已随每个批次写入数据库，这里只合并预写日志
             self.cache.save()
         
-        # 确保所有结果都有值
-        for i in range(len(results)):
-            if results[i] is None:
-                results[i] = texts[i]  # 使用原文作为后备
+        # 确保所有结果都有值，未能翻译的条目使用原文作为后备
+        failed = {i for i, result in enumerate(results) if result is None}
+        for i in failed:
+            results[i] = texts[i]
+        if failed:
+            logger.warning(f"{len(failed)} 个文本未能翻译，保留原文")
         
-        return results
+        return results, failed
     
-    def _batch_translate(self, texts: List[str], target_lang: str) -> List[str]:
-        """批量翻译方法，子类可以重写以提供更高效的实现。
+    def _claim_inflight(
+        self,
+        texts: List[str],
+        target_lang: str
+    ) -> Tuple[List[int], List[Tuple[int, Future]]]:
+        """登记即将翻译的文本，找出已由其他线程翻译中的文本。
+        
+        Parameters
+        ----------
+        texts : List[str]
+            去重后的待翻译文本
+        target_lang : str
+            目标语言
+        
+        Returns
+        -------
+        Tuple[List[int], List[Tuple[int, Future]]]
+            由当前线程负责翻译的文本索引，以及需要等待的(索引, Future)列表
+        """
+        owned: List[int] = []
+        waiting: List[Tuple[int, Future]] = []
+        with self._inflight_lock:
+            for i, text in enumerate(texts):
+                key = (text, target_lang)
+                future = self._inflight.get(key)
+                if future is None:
+                    self._inflight[key] = Future()
+                    owned.append(i)
+                else:
+                    waiting.append((i, future))
+        return owned, waiting
+    
+    def _release_inflight(
+        self,
+        texts: List[str],
+        translated: List[Optional[str]],
+        target_lang: str
+    ) -> None:
+        """发布翻译结果，唤醒等待相同文本的其他线程。
+        
+        翻译失败的文本以None发布，等待方会和当前线程一样使用原文。
+        
+        Parameters
+        ----------
+        texts : List[str]
+            由当前线程负责翻译的文本
+        translated : List[Optional[str]]
+            对应的翻译结果
+        target_lang : str
+            目标语言
+        """
+        with self._inflight_lock:
+            futures = [self._inflight.pop((text, target_lang)) for text in texts]
+        for future, value in zip(futures, translated):
+            future.set_result(value)
+    
+    def _translate_uncached(
+        self,
+        uncached_texts: List[str],
+        uncached_indices: List[int],
+        results: List[Optional[str]],
+        target_lang: str,
+        batch_size: int
+    ) -> None:
+        """分批翻译未命中缓存的文本，并将结果写回结果数组和缓存。
+        
+        Parameters
+        ----------
+        uncached_texts : List[str]
+            未命中缓存的文本列表
+        uncached_indices : List[int]
+            这些文本在结果数组中的索引
+        results : List[Optional[str]]
+            完整的结果数组，会被原地修改
+        target_lang : str
+            目标语言
+        batch_size : int
+            未设置token预算时每批处理的文本数量
+        """
+        # 按token预算将较短的文本合并到同一个请求中，减少API往返次数
+        batches = _pack_batches(uncached_texts, batch_size, self.max_batch_tokens)
+        n_batches = len(batches)
+        # 批量请求失败、需要逐条翻译的文本及其索引
+        fallback_texts: List[str] = []
+        fallback_indices: List[int] = []
+        
+        # 批次较多时显示进度条，代替每个批次输出的状态行
+        progress = tqdm(total=n_batches, desc="翻译批次", unit="批", leave=False, disable=n_batches <= 1)
+        with progress:
+            # 批次提交到共用线程池并发翻译，网络等待相互重叠；结果与缓存统一在当前线程写入
+            futures = {}
+            for start, end in batches:
+                batch_texts = uncached_texts[start:end]
+                future = self._executor.submit(self._try_batch_translate, batch_texts, target_lang)
+                futures[future] = (batch_texts, uncached_indices[start:end])
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                batch_texts, batch_indices = futures[future]
+                logger.debug(f"完成批次 {done}/{n_batches}")
+                batch_translated = future.result()
+                if batch_translated is None:
+                    fallback_texts.extend(batch_texts)
+                    fallback_indices.extend(batch_indices)
+                else:
+                    self._store_batch_results(results, batch_indices, batch_texts, batch_translated, target_lang)
+                progress.update()
+        
+        if fallback_texts:
+            # 逐条翻译同样提交到共用线程池，而不是在批次的工作线程中再创建线程池
+            logger.info(f"回退到逐条翻译 {len(fallback_texts)} 个文本")
+            translated = self._translate_each(fallback_texts, target_lang)
+            self._store_batch_results(results, fallback_indices, fallback_texts, translated, target_lang)
+    
+    def _try_batch_translate(self, batch_texts: List[str], target_lang: str) -> Optional[List[Optional[str]]]:
+        """翻译一个批次，批量请求失败时返回None，由调用方回退到逐条翻译。
+        
+        此方法只调用翻译接口，不读写缓存，在共用线程池的工作线程中执行。
+        
+        Parameters
+        ----------
+        batch_texts : List[str]
+            当前批次的文本列表
+        target_lang : str
+            目标语言
+            
+        Returns
+        -------
+        Optional[List[Optional[str]]]
+            翻译后的文本列表，熔断期间未翻译的条目为None，不会写入缓存；
+            批量请求失败、需要逐条翻译时为None
+        """
+        try:
+            # 尝试使用批量API翻译
+            return self._batch_translate(batch_texts, target_lang)
+        except CircuitOpenError as e:
+            logger.warning(f"跳过 {len(batch_texts)} 个文本: {str(e)}")
+            return [None] * len(batch_texts)
+        except Exception as e:
+            logger.error(f"批量翻译出错: {str(e)}")
+            return None
+    
+    def _safe_translate(self, text: str, target_lang: str) -> Optional[str]:
+        """翻译单条文本，失败时返回None而不抛出异常。
+        
+        Parameters
+        ----------
+        text : str
+            要翻译的文本
+        target_lang : str
+            目标语言
+            
+        Returns
+        -------
+        Optional[str]
+            翻译后的文本，翻译失败或熔断期间为None
+        """
+        try:
+            return self._translate(text, target_lang)
+        except CircuitOpenError:
+            # 熔断期间请求会被立即拒绝，不逐条记录
+            return None
+        except Exception as e:
+            logger.warning(f"单条翻译出错: {str(e)}")
+            return None
+    
+    def _translate_each(self, texts: List[str], target_lang: str) -> List[Optional[str]]:
+        """在共用线程池中逐条翻译多个文本，最多concurrency个请求同时进行。
+        
+        只能在调用方线程中调用，不能在共用线程池的工作线程中调用，
+        否则工作线程等待同一线程池中的任务可能导致死锁。
         
         Parameters
         ----------
@@ -296,21 +926,69 @@ class BaseTranslator:
             
         Returns
         -------
-        List[str]
-            翻译后的文本列表
+        List[Optional[str]]
+            翻译后的文本列表，翻译失败的条目为None，由batch_translate使用原文且不写入缓存
         """
-        # 默认实现是逐个翻译
-        results = []
-        for text in texts:
-            try:
-                translated = self._translate(text, target_lang)
-                results.append(translated)
-            except Exception as e:
-                logger.error(f"批量翻译中单条文本失败: {str(e)}")
-                # 发生错误时，插入原文作为占位符
-                results.append(text)
+        return list(self._executor.map(lambda text: self._safe_translate(text, target_lang), texts))
+    
+    def _store_batch_results(
+        self,
+        results: List[Optional[str]],
+        batch_indices: List[int],
+        batch_texts: List[str],
+        batch_translated: List[Optional[str]],
+        target_lang: str
+    ) -> None:
+        """将一个批次的翻译结果写回结果数组和缓存。
         
-        return results
+        Parameters
+        ----------
+        results : List[Optional[str]]
+            完整的结果数组，会被原地修改
+        batch_indices : List[int]
+            当前批次文本在结果数组中的索引
+        batch_texts : List[str]
+            当前批次的原文列表
+        batch_translated : List[Optional[str]]
+            当前批次的译文列表，None表示未能翻译
+        target_lang : str
+            目标语言
+        """
+        for idx, translated_text in zip(batch_indices, batch_translated):
+            results[idx] = translated_text
+        
+        # 每个批次完成后立即在一个事务中写入缓存，中断时已完成批次的译文不会丢失
+        if self.use_cache:
+            pairs = [(text, translated) for text, translated in zip(batch_texts, batch_translated) if translated]
+            if pairs:
+                self.cache.batch_set(
+                    [text for text, _ in pairs], target_lang, [translated for _, translated in pairs], self.model
+                )
+        
+        # 调试日志中显示示例，未开启调试日志时不构造预览字符串
+        if batch_translated and batch_translated[0] is not None and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"示例: '{_preview(batch_texts[0])}' -> '{_preview(batch_translated[0])}'")
+    
+    def _batch_translate(self, texts: List[str], target_lang: str) -> List[Optional[str]]:
+        """批量翻译方法，子类可以重写以提供更高效的实现。
+        
+        在共用线程池的工作线程中执行，不能再向线程池提交任务；
+        无法完成批量翻译时抛出异常，由调用方回退到逐条翻译。
+        
+        Parameters
+        ----------
+        texts : List[str]
+            要翻译的文本列表
+        target_lang : str
+            目标语言
+            
+        Returns
+        -------
+        List[Optional[str]]
+            翻译后的文本列表，翻译失败的条目为None
+        """
+        # 默认实现是在当前工作线程中逐条翻译，多个批次之间并发进行
+        return [self._safe_translate(text, target_lang) for text in texts]
     
     def get_cache_stats(self) -> Dict:
         """获取缓存使用统计。
@@ -320,7 +998,8 @@ class BaseTranslator:
         Dict
             缓存使用统计
         """
-        stats = self.cache_stats.copy()
+        with self._stats_lock:
+            stats = self.cache_stats.copy()
         
         # 添加缓存条目数量
         if self.use_cache:
@@ -352,39 +1031,108 @@ class OpenAITranslator(BaseTranslator):
         是否使用翻译缓存，默认为True
     cache_dir : str, optional
         缓存目录，默认为None（使用默认目录）
+    concurrency : int, optional
+        所有线程共享的同时进行的API请求数量上限，默认为8（设为1时串行）
+    use_batch_api : bool, optional
+        是否通过OpenAI Batch API提交批量翻译任务，默认为False。
+        Batch API费用更低且不占用同步接口的速率限制，但任务最长可能需要24小时完成
+    batch_poll_interval : float, optional
+        轮询Batch API任务状态的间隔秒数，默认为30
+    rate_limit_rpm : int, optional
+        每分钟最多发送的翻译请求数量，默认为None（不限制）
+    max_batch_tokens : int, optional
+        每批翻译请求估算的token上限，默认为3000；为None或0时每批固定batch_size个文本
     """
     
-    def _translate(self, text: str, target_lang: str = "zh-CN") -> str:
-        """使用OpenAI API翻译文本到目标语言。
+    def __init__(
+        self,
+        api_key: str,
+        api_base: Optional[str] = "https://api.openai.com/v1",
+        model: str = "gpt-3.5-turbo",
+        use_cache: bool = True,
+        cache_dir: Optional[str] = None,
+        concurrency: int = 8,
+        use_batch_api: bool = False,
+        batch_poll_interval: float = 30.0,
+        rate_limit_rpm: Optional[int] = None,
+        max_batch_tokens: Optional[int] = _DEFAULT_BATCH_TOKENS
+    ):
+        """初始化OpenAI翻译器。
+        
+        Parameters
+        ----------
+        api_key : str
+            OpenAI兼容的API密钥
+        api_base : str, optional
+            API的基础URL，默认为OpenAI的API地址
+        model : str, optional
+            使用的模型名称，默认为"gpt-3.5-turbo"
+        use_cache : bool, optional
+            是否使用翻译缓存，默认为True
+        cache_dir : str, optional
+            缓存目录，默认为None（使用默认目录）
+        concurrency : int, optional
+            所有线程共享的同时进行的API请求数量上限，默认为8（设为1时串行）
+        use_batch_api : bool, optional
+            是否通过OpenAI Batch API提交批量翻译任务，默认为False
+        batch_poll_interval : float, optional
+            轮询Batch API任务状态的间隔秒数，默认为30
+        rate_limit_rpm : int, optional
+            每分钟最多发送的翻译请求数量，默认为None（不限制）
+        max_batch_tokens : int, optional
+            每批翻译请求估算的token上限，默认为3000；为None或0时每批固定batch_size个文本
+        """
+        super().__init__(
+            api_key=api_key,
+            api_base=api_base,
+            model=model,
+            use_cache=use_cache,
+            cache_dir=cache_dir,
+            concurrency=concurrency,
+            rate_limit_rpm=rate_limit_rpm,
+            max_batch_tokens=max_batch_tokens
+        )
+        self.use_batch_api = use_batch_api
+        self.batch_poll_interval = batch_poll_interval
+        # 复用同一个会话，避免每次请求都重新建立TCP/TLS连接；认证头由会话统一发送，
+        # JSON请求体的Content-Type由各个请求单独设置，避免影响文件上传的multipart类型
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = self.headers["Authorization"]
+        # 所有请求都经由共用线程池发送，连接数不会超过concurrency
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.batch_jobs_path = os.path.join(
+            self.cache.cache_dir if self.cache else _default_cache_dir(),
+            "batch_jobs.json"
+        )
+    
+    def close(self) -> None:
+        """关闭HTTP会话，释放连接池，并关闭翻译缓存。"""
+        self.session.close()
+        super().close()
+    
+    def _build_payload(self, text: str, target_lang: str) -> Dict[str, Any]:
+        """构建单条文本翻译的chat/completions请求体。
         
         Parameters
         ----------
         text : str
             要翻译的文本
-        target_lang : str, optional
-            目标语言，默认为"zh-CN"
+        target_lang : str
+            目标语言
             
         Returns
         -------
-        str
-            翻译后的文本
-            
-        Raises
-        ------
-        Exception
-            如果翻译过程中出现错误
+        Dict[str, Any]
+            请求体
         """
-        url = f"{self.api_base}/chat/completions"
-        
-        payload = {
+        return {
             "model": self.model,
             "messages": [
                 {
                     "role": "system",
-                    "content": (
-                        f"你是一个专业的翻译助手。请将以下文本翻译成{target_lang}，"
-                        "保持原文的格式和专业术语准确性。不要添加任何解释或额外内容。"
-                    )
+                    "content": _system_prompt(target_lang)
                 },
                 {
                     "role": "user",
@@ -393,21 +1141,150 @@ class OpenAITranslator(BaseTranslator):
             ],
             "temperature": 0.3
         }
+    
+    def _post_with_retry(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        stream: bool = False
+    ) -> requests.Response:
+        """发送POST请求，遇到可恢复的错误时退避重试。
+        
+        网络错误和_RETRYABLE_STATUS中的状态码最多重试_MAX_RETRIES次，
+        其他错误状态（如400、401、403）立即抛出。每次尝试都受速率限制器约束。
+        重试用尽的请求计入熔断器，熔断期间直接抛出CircuitOpenError。
+        
+        Parameters
+        ----------
+        url : str
+            请求地址
+        payload : Dict[str, Any]
+            JSON请求体
+        timeout : float
+            单次请求的超时秒数
+        stream : bool, optional
+            是否以流式方式读取响应体，默认为False
+            
+        Returns
+        -------
+        requests.Response
+            成功的响应
+            
+        Raises
+        ------
+        CircuitOpenError
+            API连续失败，熔断器处于熔断状态
+        requests.RequestException
+            请求失败且不可重试，或重试次数用尽
+        """
+        probing = self._breaker.check()
+        attempt = 0
+        try:
+            while True:
+                self._rate_limiter.acquire()
+                try:
+                    response = self.session.post(
+                        url, data=_json.dumps(payload), headers=_JSON_HEADERS, timeout=timeout, stream=stream
+                    )
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt >= _MAX_RETRIES:
+                        self._breaker.record_failure()
+                        raise
+                    delay = _retry_delay(attempt)
+                    logger.warning(f"请求出错: {str(e)}，{delay:.1f}秒后重试 ({attempt + 1}/{_MAX_RETRIES})")
+                else:
+                    if response.status_code not in _RETRYABLE_STATUS:
+                        # 服务端已正常应答，即使是400等请求错误也说明API可用
+                        self._breaker.record_success()
+                        response.raise_for_status()
+                        return response
+                    if attempt >= _MAX_RETRIES:
+                        self._breaker.record_failure()
+                        response.raise_for_status()
+                    delay = _retry_delay(attempt, response)
+                    logger.warning(f"请求返回 {response.status_code}，{delay:.1f}秒后重试 ({attempt + 1}/{_MAX_RETRIES})")
+                    # 流式响应不会自动读完，重试前需释放连接，否则连接池会被占满
+                    response.close()
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            # 探测请求以其他异常结束时（如重定向过多、请求体序列化出错）也要结束探测，
+            # 否则熔断器会一直拒绝之后的请求
+            if probing:
+                self._breaker.end_probe()
+    
+    def _read_completion(self, response: requests.Response) -> str:
+        """读取chat/completions响应中的回复内容。
+        
+        流式响应（text/event-stream）按行累积每个data事件中的增量内容，
+        服务端忽略stream参数返回普通JSON时按完整响应解析。
+        
+        Parameters
+        ----------
+        response : requests.Response
+            以stream=True发送的请求的响应
+            
+        Returns
+        -------
+        str
+            模型回复的完整内容
+        """
+        with response:
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                return _json.loads(response.content)["choices"][0]["message"]["content"]
+            
+            # SSE始终为UTF-8编码；未声明charset时requests会按ISO-8859-1解码text/*，
+            # 因此逐行读取字节，由_json按UTF-8解析
+            parts = []
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                choices = _json.loads(data).get("choices") or [{}]
+                parts.append(choices[0].get("delta", {}).get("content") or "")
+            return "".join(parts)
+    
+    def _translate(self, text: str, target_lang: str = "zh-CN") -> str:
+        """使用OpenAI API翻译文本到目标语言。
+        
+        Parameters
+        ----------
+        text : str
+            要翻译的文本
+        target_lang : str, optional
+            目标语言，默认为"zh-CN"
+            
+        Returns
+        -------
+        str
+            翻译后的文本
+            
+        Raises
+        ------
+        Exception
+            如果翻译过程中出现错误
+        """
+        url = f"{self.api_base}/chat/completions"
+        payload = self._build_payload(text, target_lang)
         
         try:
-            response = requests.post(url, headers=self.headers, json=payload, timeout=30)
-            response.raise_for_status()
+            response = self._post_with_retry(url, payload, timeout=30)
             
-            result = response.json()
+            result = _json.loads(response.content)
             translated_text = result["choices"][0]["message"]["content"]
             
             return translated_text.strip()
         
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"翻译失败: {str(e)}")
             raise Exception(f"翻译失败: {str(e)}")
     
-    def _batch_translate(self, texts: List[str], target_lang: str = "zh-CN") -> List[str]:
+    def _batch_translate(self, texts: List[str], target_lang: str = "zh-CN") -> List[Optional[str]]:
         """使用单个API调用批量翻译多个文本。
         
         此方法适用于较短的多个文本，将它们组合成一个请求发送给API。
@@ -421,19 +1298,19 @@ class OpenAITranslator(BaseTranslator):
             
         Returns
         -------
-        List[str]
+        List[Optional[str]]
             翻译后的文本列表
         
         Raises
         ------
         Exception
-            如果翻译过程中出现错误
+            如果请求失败或修正后仍无法拆分译文，由调用方回退到逐条翻译
         """
         if not texts:
             return []
         
-        # 将多个文本组合成一个JSON格式的字符串
-        combined_text = json.dumps(texts)
+        # 用编号分隔符拼接多个文本，避免JSON转义引号、反斜杠和换行带来的额外token
+        combined_text = _join_segments(texts)
         url = f"{self.api_base}/chat/completions"
         
         payload = {
@@ -441,44 +1318,338 @@ class OpenAITranslator(BaseTranslator):
             "messages": [
                 {
                     "role": "system",
-                    "content": (
-                        f"你是一个专业的翻译助手。请将以下JSON格式的文本列表翻译成{target_lang}，"
-                        "保持每个项目的格式和专业术语准确性。以相同的JSON格式返回翻译结果列表。"
-                        "不要添加任何解释或额外内容，只返回翻译后的JSON列表。"
-                    )
+                    "content": _batch_system_prompt(target_lang, len(texts))
                 },
                 {
                     "role": "user",
                     "content": combined_text
                 }
             ],
-            "temperature": 0.3
+            "temperature": 0.3,
+            # 批量译文较长，流式返回时首个字节很快到达，超时只约束相邻数据块之间的间隔
+            "stream": True
         }
         
+        response = self._post_with_retry(url, payload, timeout=60, stream=True)
+        content = self._read_completion(response)
+        
+        translated_texts = _split_segments(content, len(texts))
+        if translated_texts is None:
+            # 分隔符缺失或数量不匹配时，先让模型修正一次格式，比逐条重新翻译便宜得多
+            logger.warning(f"无法按分隔符拆分翻译结果（预期 {len(texts)} 个条目），请求模型修正格式")
+            translated_texts = self._repair_segments(url, payload, content, len(texts))
+        if translated_texts is None:
+            # 逐条翻译由调用方提交到共用线程池，不在当前工作线程中进行
+            raise ValueError(f"修正后仍无法按分隔符拆分翻译结果（预期 {len(texts)} 个条目）")
+        
+        return translated_texts
+    
+    def _repair_segments(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        content: str,
+        count: int
+    ) -> Optional[List[str]]:
+        """请求模型按分隔符格式重新整理上一次的批量译文。
+        
+        在原对话后追加模型的回复和一条指出格式问题的消息，只尝试一次。
+        
+        Parameters
+        ----------
+        url : str
+            chat/completions接口地址
+        payload : Dict[str, Any]
+            原批量翻译请求体
+        content : str
+            模型上一次的回复
+        count : int
+            预期的条目数量
+            
+        Returns
+        -------
+        Optional[List[str]]
+            按编号排列的译文列表，修正失败时返回None
+        """
+        repair_payload = dict(payload)
+        repair_payload["messages"] = payload["messages"] + [
+            {"role": "assistant", "content": content},
+            {
+                "role": "user",
+                "content": (
+                    f"格式不正确：需要恰好{count}个条目，每个条目前单独一行<<<SEG i>>>，i从0到{count - 1}。"
+                    "请按这个格式重新给出全部译文，不要添加任何解释或额外内容。"
+                )
+            }
+        ]
         try:
-            response = requests.post(url, headers=self.headers, json=payload, timeout=60)
-            response.raise_for_status()
+            response = self._post_with_retry(url, repair_payload, timeout=60, stream=True)
+            return _split_segments(self._read_completion(response), count)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.warning(f"修正批量译文格式失败: {str(e)}")
+            return None
+    
+    def _translate_uncached(
+        self,
+        uncached_texts: List[str],
+        uncached_indices: List[int],
+        results: List[Optional[str]],
+        target_lang: str,
+        batch_size: int
+    ) -> None:
+        """翻译未命中缓存的文本，启用Batch API时整体提交为一个批处理任务。
+        
+        Parameters
+        ----------
+        uncached_texts : List[str]
+            未命中缓存的文本列表
+        uncached_indices : List[int]
+            这些文本在结果数组中的索引
+        results : List[Optional[str]]
+            完整的结果数组，会被原地修改
+        target_lang : str
+            目标语言
+        batch_size : int
+            每批处理的文本数量（仅用于回退到同步接口时）
+        """
+        if self.use_batch_api:
+            try:
+                # 批处理中失败的请求记为None，不写入缓存，由batch_translate使用原文
+                outputs = self._run_batch(uncached_texts, target_lang)
+                translated_texts = [outputs.get(str(i)) for i in range(len(uncached_texts))]
+                self._store_batch_results(results, uncached_indices, uncached_texts, translated_texts, target_lang)
+                return
+            except Exception as e:
+                logger.error(f"Batch API翻译失败: {str(e)}，回退到同步接口")
+        
+        super()._translate_uncached(uncached_texts, uncached_indices, results, target_lang, batch_size)
+    
+    def submit_batch(self, texts: List[str], target_lang: str = "zh-CN") -> List[str]:
+        """通过OpenAI Batch API翻译多个文本。
+        
+        将每个文本序列化为JSONL中的一行请求，上传后创建批处理任务并轮询直到完成，
+        最后下载输出文件并按原顺序组装结果。任务ID会保存在缓存目录中，
+        中断后再次运行相同的翻译任务时会继续等待原任务，而不是重新提交。
+        
+        Parameters
+        ----------
+        texts : List[str]
+            要翻译的文本列表
+        target_lang : str, optional
+            目标语言，默认为"zh-CN"
+            
+        Returns
+        -------
+        List[str]
+            翻译后的文本列表，未能翻译的条目保留原文
+            
+        Raises
+        ------
+        Exception
+            如果批处理任务失败、过期或被取消
+        """
+        if not texts:
+            return []
+        
+        outputs = self._run_batch(texts, target_lang)
+        return [outputs.get(str(i), text) for i, text in enumerate(texts)]
+    
+    def _run_batch(self, texts: List[str], target_lang: str) -> Dict[str, str]:
+        """提交或恢复批处理任务，等待完成后下载翻译结果。
+        
+        Parameters
+        ----------
+        texts : List[str]
+            要翻译的文本列表
+        target_lang : str
+            目标语言
             
-            result = response.json()
-            translated_json = result["choices"][0]["message"]["content"]
+        Returns
+        -------
+        Dict[str, str]
+            custom_id（文本在列表中的索引）到译文的映射，只包含成功的请求
             
-            # 尝试解析返回的JSON
-            try:
-                translated_texts = json.loads(translated_json)
-                
-                # 确保返回了正确数量的翻译
-                if len(translated_texts) != len(texts):
-                    logger.warning(f"翻译数量不匹配: 预期 {len(texts)}, 实际 {len(translated_texts)}")
-                    # 如果数量不匹配，使用普通的批量翻译方法
-                    return super()._batch_translate(texts, target_lang)
-                
-                return translated_texts
-                
-            except json.JSONDecodeError:
-                logger.warning("无法解析翻译返回的JSON，使用常规批量翻译方法")
-                return super()._batch_translate(texts, target_lang)
+        Raises
+        ------
+        Exception
+            如果批处理任务失败、过期或被取消
+        """
+        # 以模型、目标语言和文本内容标识任务，用于中断后恢复
+        job_key = hashlib.sha256(_json.dumps([self.model, target_lang, texts])).hexdigest()
+        jobs = self._load_batch_jobs()
+        
+        batch = None
+        batch_id = jobs.get(job_key)
+        if batch_id:
+            batch = _json.loads(self._api_request("GET", f"batches/{batch_id}").content)
+            if batch.get("status") in _BATCH_FAILED_STATUSES:
+                logger.warning(f"之前的批处理任务 {batch_id} 状态为 {batch.get('status')}，重新提交")
+                batch = None
+            else:
+                logger.info(f"恢复之前提交的批处理任务: {batch_id}")
+                print(f"恢复之前提交的批处理任务: {batch_id}")
+        
+        if batch is None:
+            input_file_id = self._upload_batch_file(texts, target_lang)
+            response = self._api_request("POST", "batches", headers=_JSON_HEADERS, data=_json.dumps({
+                "input_file_id": input_file_id,
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h"
+            }))
+            batch = _json.loads(response.content)
+            jobs[job_key] = batch["id"]
+            self._save_batch_jobs(jobs)
+            logger.info(f"已提交批处理任务 {batch['id']}，包含 {len(texts)} 个请求")
+            print(f"已提交批处理任务 {batch['id']}，包含 {len(texts)} 个请求")
+        
+        batch = self._wait_for_batch(batch)
+        if batch.get("status") != "completed":
+            raise Exception(f"批处理任务 {batch['id']} 未完成，状态: {batch.get('status')}")
+        
+        outputs = self._download_batch_output(batch["output_file_id"]) if batch.get("output_file_id") else {}
+        if len(outputs) < len(texts):
+            logger.warning(f"批处理任务中有 {len(texts) - len(outputs)} 个请求失败，这些条目将保留原文")
+        
+        # 任务已完成，不再需要恢复
+        jobs.pop(job_key, None)
+        self._save_batch_jobs(jobs)
+        
+        return outputs
+    
+    def _api_request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """向OpenAI兼容API发送请求。
+        
+        Parameters
+        ----------
+        method : str
+            HTTP方法
+        path : str
+            相对于api_base的路径
+        **kwargs : Any
+            传递给requests.Session.request的其他参数
+            
+        Returns
+        -------
+        requests.Response
+            响应对象
+        """
+        response = self.session.request(method, f"{self.api_base}/{path}", timeout=60, **kwargs)
+        response.raise_for_status()
+        return response
+    
+    def _upload_batch_file(self, texts: List[str], target_lang: str) -> str:
+        """将翻译请求写入JSONL文件并上传。
+        
+        Parameters
+        ----------
+        texts : List[str]
+            要翻译的文本列表
+        target_lang : str
+            目标语言
+            
+        Returns
+        -------
+        str
+            上传后的文件ID
+        """
+        with tempfile.NamedTemporaryFile('wb', suffix='.jsonl', delete=False) as f:
+            for i, text in enumerate(texts):
+                request = {
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._build_payload(text, target_lang)
+                }
+                f.write(_json.dumps(request) + b"\n")
+            jsonl_path = f.name
+        
+        try:
+            with open(jsonl_path, 'rb') as f:
+                response = self._api_request(
+                    "POST", "files",
+                    data={"purpose": "batch"},
+                    files={"file": (os.path.basename(jsonl_path), f)}
+                )
+            return _json.loads(response.content)["id"]
+        finally:
+            os.remove(jsonl_path)
+    
+    def _wait_for_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """轮询批处理任务直到结束。
+        
+        Parameters
+        ----------
+        batch : Dict[str, Any]
+            批处理任务对象
+            
+        Returns
+        -------
+        Dict[str, Any]
+            结束状态的批处理任务对象
+        """
+        while batch.get("status") not in _BATCH_FINAL_STATUSES:
+            counts = batch.get("request_counts") or {}
+            logger.info(
+                f"批处理任务 {batch['id']} 状态: {batch.get('status')}，"
+                f"已完成 {counts.get('completed', 0)}/{counts.get('total', 0)}"
+            )
+            time.sleep(self.batch_poll_interval)
+            batch = _json.loads(self._api_request("GET", f"batches/{batch['id']}").content)
+        return batch
+    
+    def _download_batch_output(self, file_id: str) -> Dict[str, str]:
+        """下载批处理任务的输出文件并解析翻译结果。
+        
+        Parameters
+        ----------
+        file_id : str
+            输出文件ID
             
+        Returns
+        -------
+        Dict[str, str]
+            custom_id到译文的映射，只包含成功的请求
+        """
+        outputs = {}
+        content = self._api_request("GET", f"files/{file_id}/content").text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            item = _json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            translated_text = response["body"]["choices"][0]["message"]["content"]
+            outputs[item["custom_id"]] = translated_text.strip()
+        return outputs
+    
+    def _load_batch_jobs(self) -> Dict[str, str]:
+        """读取未完成的批处理任务记录。
+        
+        Returns
+        -------
+        Dict[str, str]
+            任务标识到批处理任务ID的映射
+        """
+        if not os.path.exists(self.batch_jobs_path):
+            return {}
+        try:
+            with open(self.batch_jobs_path, 'rb') as f:
+                return _json.loads(f.read())
         except Exception as e:
-            logger.error(f"批量API翻译失败: {str(e)}")
-            # 失败时回退到常规批量翻译方法
-            return super()._batch_translate(texts, target_lang)
\ No newline at end of file
+            logger.warning(f"读取批处理任务记录失败: {str(e)}")
+            return {}
+    
+    def _save_batch_jobs(self, jobs: Dict[str, str]) -> None:
+        """保存未完成的批处理任务记录。
+        
+        Parameters
+        ----------
+        jobs : Dict[str, str]
+            任务标识到批处理任务ID的映射
+        """
+        os.makedirs(os.path.dirname(self.batch_jobs_path), exist_ok=True)
+        with open(self.batch_jobs_path, 'wb') as f:
+            f.write(_json.dumps(jobs))
\ No newline at end of file
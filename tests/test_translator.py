@@ -3,15 +3,25 @@
 此模块包含文档翻译工具的单元测试。
 """
 
+import io
+import json
 import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
 from docs_translator.translator import BaseTranslator, OpenAITranslator
-from docs_translator.parsers.base import BaseParser
-from docs_translator.parsers.markdown import MarkdownParser
+from docs_translator.parsers.base import BaseParser, Segment
+from docs_translator.parsers.markdown import MarkdownParser, _tokenize
 from docs_translator.parsers.sphinx_intl import SphinxIntlParser
-from docs_translator.processor import DocumentProcessor
+from docs_translator.processor import DocumentProcessor, _max_workers
+from docs_translator.sphinx_intl_processor import SphinxIntlProcessor
+from docs_translator.translation_cache import TranslationCache
+from docs_translator.cache_tool import format_size, handle_export, handle_import
+from docs_translator._detect import find_sphinx_conf, is_sphinx_project, probe_sphinx_project
+from docs_translator.estimate import estimate_translation
+from docs_translator.cli import parse_args
 
 
 class TestBaseTranslator(unittest.TestCase):
@@ -29,17 +39,164 @@ class TestBaseTranslator(unittest.TestCase):
         translator = BaseTranslator(api_key="test_key")
         with self.assertRaises(NotImplementedError):
             translator.translate("test text")
+    
+    def test_cache_stats_threaded(self):
+        """测试多个线程同时批量翻译时统计计数准确。"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        class UpperTranslator(BaseTranslator):
+            def _translate(self, text, target_lang):
+                return text.upper()
+        
+        cache_dir = tempfile.mkdtemp()
+        try:
+            translator = UpperTranslator(api_key="test_key", cache_dir=cache_dir)
+            texts = [f"text {i}" for i in range(20)]
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda _: translator.batch_translate(texts), range(8)))
+            
+            self.assertTrue(all(result == [text.upper() for text in texts] for result in results))
+            stats = translator.get_cache_stats()
+            self.assertEqual(stats["total_requests"], 160)
+            self.assertEqual(stats["hits"] + stats["misses"], 160)
+            self.assertEqual(stats["saved_calls"], stats["hits"])
+        finally:
+            shutil.rmtree(cache_dir)
+    
+    def test_batch_results_persisted_per_batch(self):
+        """测试每个批次的译文在一个事务中立即写入缓存数据库。"""
+        class UpperTranslator(BaseTranslator):
+            def _translate(self, text, target_lang):
+                return text.upper()
+        
+        cache_dir = tempfile.mkdtemp()
+        try:
+            translator = UpperTranslator(api_key="test_key", cache_dir=cache_dir, max_batch_tokens=None)
+            with patch.object(translator.cache, "_store", wraps=translator.cache._store) as mock_store:
+                translator.batch_translate(["a", "b", "c"], batch_size=2)
+            self.assertEqual(mock_store.call_count, 2)
+            
+            # 不调用close，另一个缓存实例也能读到已写入的条目
+            other = TranslationCache(cache_dir)
+            self.assertEqual(other.get("c", "zh-CN", "gpt-3.5-turbo"), "C")
+            other.close()
+            translator.close()
+        finally:
+            shutil.rmtree(cache_dir)
+    
+    def test_non_translatable_skipped(self):
+        """测试网址、数字符号和哈希值不调用API，直接返回原文。"""
+        translator = BaseTranslator(api_key="test_key", use_cache=False)
+        translator._translate = MagicMock(side_effect=lambda text, target_lang: text.upper())
+        texts = ["https://example.com/a?b=1", "1.2.3", "---", "", "0123456789abcdef0123", "hello 2"]
+        
+        result = translator.batch_translate(texts)
+        
+        self.assertEqual(result, texts[:-1] + ["HELLO 2"])
+        translator._translate.assert_called_once_with("hello 2", "zh-CN")
+        self.assertEqual(translator.translate("42"), "42")
+        self.assertEqual(translator.get_cache_stats()["skipped"], 6)
+    
+    def test_per_segment_fallback_concurrent(self):
+        """测试批量请求失败后逐条翻译并发进行，失败的条目保留原文。"""
+        import threading
+        
+        barrier = threading.Barrier(3)
+        
+        class BarrierTranslator(BaseTranslator):
+            def _batch_translate(self, texts, target_lang):
+                raise ValueError("bad batch")
+            
+            def _translate(self, text, target_lang):
+                # 三个请求必须同时进行才能通过屏障
+                barrier.wait(5)
+                if text == "bad":
+                    raise ValueError("boom")
+                return text.upper()
+        
+        translator = BarrierTranslator(api_key="test_key", use_cache=False, concurrency=3)
+        self.assertEqual(
+            translator.batch_translate_with_failures(["a", "bad", "c"], "zh-CN"),
+            (["A", "bad", "C"], {1})
+        )
+    
+    def test_shared_concurrency_limit(self):
+        """测试多个线程同时调用翻译器时，同时进行的请求不超过concurrency个。"""
+        import threading
+        import time
+        
+        lock = threading.Lock()
+        active = [0, 0]
+        
+        class CountingTranslator(BaseTranslator):
+            def _translate(self, text, target_lang):
+                with lock:
+                    active[0] += 1
+                    active[1] = max(active[1], active[0])
+                time.sleep(0.01)
+                with lock:
+                    active[0] -= 1
+                return text.upper()
+        
+        translator = CountingTranslator(api_key="test_key", use_cache=False, concurrency=2, max_batch_tokens=None)
+        threads = [
+            threading.Thread(target=translator.batch_translate, args=([f"t{n} {i}" for i in range(4)], "zh-CN", 1))
+            for n in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertEqual(active[1], 2)
+    
+    def test_inflight_coalescing(self):
+        """测试多个线程同时翻译相同文本时只发送一次请求。"""
+        import threading
+        import time
+        
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        
+        class SlowTranslator(BaseTranslator):
+            def _translate(self, text, target_lang):
+                calls.append(text)
+                started.set()
+                release.wait(5)
+                return text.upper()
+        
+        translator = SlowTranslator(api_key="test_key", use_cache=False)
+        results = {}
+        first = threading.Thread(target=lambda: results.setdefault("first", translator.batch_translate(["hello"])))
+        first.start()
+        self.assertTrue(started.wait(5))
+        
+        second = threading.Thread(target=lambda: results.setdefault("second", translator.batch_translate(["hello", "world"])))
+        second.start()
+        # 第二个线程开始翻译"world"时，已经登记为等待"hello"的结果
+        deadline = time.monotonic() + 5
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        first.join(5)
+        second.join(5)
+        
+        self.assertEqual(results["first"], ["HELLO"])
+        self.assertEqual(results["second"], ["HELLO", "WORLD"])
+        self.assertEqual(sorted(calls), ["hello", "world"])
+        self.assertEqual(translator._inflight, {})
 
 
 class TestOpenAITranslator(unittest.TestCase):
     """测试OpenAITranslator类。"""
     
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_translate(self, mock_post):
         """测试translate方法。"""
         # 模拟请求响应
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "choices": [
                 {
                     "message": {
@@ -47,7 +204,7 @@ class TestOpenAITranslator(unittest.TestCase):
                     }
                 }
             ]
-        }
+        }).encode("utf-8")
         mock_post.return_value = mock_response
         
         # 创建翻译器并调用translate方法
@@ -60,9 +217,498 @@ class TestOpenAITranslator(unittest.TestCase):
         # 验证请求
         mock_post.assert_called_once()
         args, kwargs = mock_post.call_args
-        self.assertIn("headers", kwargs)
-        self.assertIn("json", kwargs)
-        self.assertEqual(kwargs["json"]["messages"][1]["content"], "Test text")
+        self.assertEqual(translator.session.headers["Authorization"], "Bearer test_key")
+        self.assertEqual(kwargs["headers"]["Content-Type"], "application/json")
+        self.assertEqual(json.loads(kwargs["data"])["messages"][1]["content"], "Test text")
+
+    def test_rate_limiter_spaces_requests(self):
+        """测试速率限制器按固定间隔分配请求时刻。"""
+        from docs_translator.translator import _RateLimiter
+        
+        limiter = _RateLimiter(rpm=600)
+        with patch("docs_translator.translator.time.monotonic", return_value=100.0), \
+                patch("docs_translator.translator.time.sleep") as mock_sleep:
+            for _ in range(3):
+                limiter.acquire()
+        
+        self.assertEqual([round(c.args[0], 6) for c in mock_sleep.call_args_list], [0.1, 0.2])
+        
+        with patch("docs_translator.translator.time.sleep") as mock_sleep:
+            _RateLimiter(rpm=None).acquire()
+        mock_sleep.assert_not_called()
+
+    @patch("docs_translator.translator.time.sleep")
+    def test_post_with_retry(self, mock_sleep):
+        """测试可恢复的错误会退避重试，其他错误立即抛出。"""
+        import requests
+        
+        def make_response(status, headers=None):
+            response = requests.Response()
+            response.status_code = status
+            response.headers.update(headers or {})
+            return response
+        
+        translator = OpenAITranslator(api_key="test_key", use_cache=False)
+        throttled = make_response(429, {"Retry-After": "7"})
+        throttled.close = MagicMock()
+        with patch.object(translator.session, "post", side_effect=[
+            requests.ConnectionError("reset"),
+            throttled,
+            make_response(200),
+        ]) as mock_post:
+            response = translator._post_with_retry("https://example.com", {}, timeout=1, stream=True)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list[1].args[0], 7.0)
+        # 重试前释放被限流的流式响应
+        throttled.close.assert_called_once()
+        
+        with patch.object(translator.session, "post", return_value=make_response(401)) as mock_post:
+            with self.assertRaises(requests.HTTPError):
+                translator._post_with_retry("https://example.com", {}, timeout=1)
+        mock_post.assert_called_once()
+
+    @patch("docs_translator.translator.time.sleep")
+    def test_circuit_breaker(self, mock_sleep):
+        """测试API持续不可用时熔断，剩余文本不再请求且不写入缓存。"""
+        import requests
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            translator = OpenAITranslator(
+                api_key="test_key", cache_dir=cache_dir, concurrency=1, max_batch_tokens=None
+            )
+            with patch.object(translator.session, "post", side_effect=requests.ConnectionError("down")) as mock_post:
+                texts = [f"text {i}" for i in range(20)]
+                result = translator.batch_translate(texts, batch_size=2)
+
+            self.assertEqual(result, texts)
+            # 5次请求各自重试用尽后熔断，之后的批次不再发送请求
+            self.assertEqual(mock_post.call_count, 5 * 5)
+            self.assertEqual(len(translator.cache.cache), 0)
+            translator.close()
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_circuit_breaker_half_open(self):
+        """测试冷却期结束后只放行一个探测请求，成功后恢复。"""
+        from docs_translator.translator import CircuitOpenError, _CircuitBreaker
+
+        breaker = _CircuitBreaker(threshold=2, cooldown=10.0)
+        with patch("docs_translator.translator.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+            breaker.check()
+            breaker.record_failure()
+            with self.assertRaises(CircuitOpenError):
+                breaker.check()
+        with patch("docs_translator.translator.time.monotonic", return_value=111.0):
+            breaker.check()
+            with self.assertRaises(CircuitOpenError):
+                breaker.check()
+            breaker.record_success()
+            breaker.check()
+
+    def test_circuit_breaker_probe_other_exception(self):
+        """测试探测请求抛出非连接类异常时结束探测，熔断器不会一直拒绝请求。"""
+        import requests
+        from docs_translator.translator import _CircuitBreaker
+
+        translator = OpenAITranslator(api_key="test_key", use_cache=False)
+        translator._breaker = _CircuitBreaker(threshold=1, cooldown=0.0)
+        translator._breaker.record_failure()
+        with patch.object(translator.session, "post", side_effect=requests.TooManyRedirects("loop")):
+            with self.assertRaises(requests.TooManyRedirects):
+                translator._post_with_retry("https://example.com", {}, timeout=1)
+
+        self.assertTrue(translator._breaker.check())
+
+    def test_context_manager_closes(self):
+        """测试以上下文管理器使用时关闭HTTP会话和翻译缓存。"""
+        translator = OpenAITranslator(api_key="test_key", use_cache=False)
+        with patch.object(translator.session, "close") as mock_close:
+            with translator as entered:
+                self.assertIs(entered, translator)
+        mock_close.assert_called_once()
+
+    @patch('requests.Session.post')
+    def test_batch_translate(self, mock_post):
+        """测试batch_translate方法在一次请求中翻译多个文本。"""
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            "choices": [
+                {
+                    "message": {
+                        "content": '<<<SEG 0>>>\n你好\n<<<SEG 1>>>\n世界\n'
+                    }
+                }
+            ]
+        }).encode("utf-8")
+        mock_post.return_value = mock_response
+
+        translator = OpenAITranslator(api_key="test_key", use_cache=False)
+        result = translator.batch_translate(["Hello", "World"], target_lang="zh-CN")
+
+        self.assertEqual(result, ["你好", "世界"])
+        mock_post.assert_called_once()
+        self.assertEqual(
+            json.loads(mock_post.call_args.kwargs["data"])["messages"][1]["content"],
+            '<<<SEG 0>>>\nHello\n<<<SEG 1>>>\nWorld\n'
+        )
+
+    @patch('requests.Session.post')
+    def test_batch_translate_streaming(self, mock_post):
+        """测试批量翻译以流式方式请求并拼接增量内容。"""
+        chunks = ["<<<SEG 0>>>\n你", "好\n<<<SEG 1>>>\n", "世界\n"]
+        mock_response = MagicMock()
+        mock_response.headers = {"Content-Type": "text/event-stream; charset=utf-8"}
+        mock_response.iter_lines.return_value = [
+            ("data: " + json.dumps({"choices": [{"delta": {"content": chunk}}]})).encode("utf-8") for chunk in chunks
+        ] + [b"", b"data: [DONE]"]
+        mock_post.return_value = mock_response
+
+        translator = OpenAITranslator(api_key="test_key", use_cache=False)
+        result = translator.batch_translate(["Hello", "World"], target_lang="zh-CN")
+
+        self.assertEqual(result, ["你好", "世界"])
+        self.assertTrue(mock_post.call_args.kwargs["stream"])
+        self.assertTrue(json.loads(mock_post.call_args.kwargs["data"])["stream"])
+
+    def test_read_completion_stream_without_charset(self):
+        """测试未声明charset的事件流按UTF-8解码，而不是requests默认的ISO-8859-1。"""
+        import requests
+        
+        body = "".join(
+            "data: " + json.dumps({"choices": [{"delta": {"content": chunk}}]}, ensure_ascii=False) + "\n\n"
+            for chunk in ["你好", "，世界"]
+        ) + "data: [DONE]\n\n"
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/event-stream"
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body.encode("utf-8"))
+        self.assertEqual(response.encoding, "ISO-8859-1")
+        
+        translator = OpenAITranslator(api_key="test_key", use_cache=False)
+        self.assertEqual(translator._read_completion(response), "你好，世界")
+
+    @patch('requests.Session.post')
+    def test_batch_translate_repairs_format(self, mock_post):
+        """测试分隔符不完整时请求模型修正一次格式，而不是逐条重新翻译。"""
+        def make_response(content):
+            response = MagicMock()
+            response.content = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+            return response
+
+        mock_post.side_effect = [
+            make_response("你好\n世界"),
+            make_response("<<<SEG 0>>>\n你好\n<<<SEG 1>>>\n世界\n"),
+        ]
+
+        translator = OpenAITranslator(api_key="test_key", use_cache=False)
+        result = translator.batch_translate(["Hello", "World"], target_lang="zh-CN")
+
+        self.assertEqual(result, ["你好", "世界"])
+        self.assertEqual(mock_post.call_count, 2)
+        messages = json.loads(mock_post.call_args.kwargs["data"])["messages"]
+        self.assertEqual([m["role"] for m in messages], ["system", "user", "assistant", "user"])
+        self.assertEqual(messages[2]["content"], "你好\n世界")
+
+    def test_split_segments(self):
+        """测试按分隔符拆分译文，编号缺失或重复时返回None。"""
+        from docs_translator.translator import _split_segments
+
+        content = '```\n<<<SEG 1>>>\n第二行\n"引号"\n<<<SEG 0>>>\n第一行\n```'
+        self.assertEqual(_split_segments(content, 2), ["第一行", '第二行\n"引号"'])
+        self.assertIsNone(_split_segments("<<<SEG 0>>>\n第一行\n", 2))
+        self.assertIsNone(_split_segments("<<<SEG 0>>>\na\n<<<SEG 0>>>\nb\n", 2))
+
+    def test_batch_translate_concurrent(self):
+        """测试并发批量翻译保持结果顺序。"""
+        translator = OpenAITranslator(api_key="test_key", use_cache=False, concurrency=4, max_batch_tokens=None)
+        translator._batch_translate = MagicMock(
+            side_effect=lambda texts, target_lang: [t.upper() for t in texts]
+        )
+
+        texts = [f"text {i}" for i in range(10)]
+        result = translator.batch_translate(texts, target_lang="zh-CN", batch_size=3)
+
+        self.assertEqual(result, [t.upper() for t in texts])
+        self.assertEqual(translator._batch_translate.call_count, 4)
+
+    def test_pack_batches(self):
+        """测试按token预算合并较短的文本，较长的文本单独成批。"""
+        from docs_translator.translator import _pack_batches
+
+        texts = ["short"] * 5 + ["x" * 400] + ["short"] * 2
+        self.assertEqual(_pack_batches(texts, batch_size=3, max_tokens=None), [(0, 3), (3, 6), (6, 8)])
+        self.assertEqual(_pack_batches(texts, batch_size=3, max_tokens=50), [(0, 5), (5, 6), (6, 8)])
+        self.assertEqual(_pack_batches(["a"] * 120, batch_size=3, max_tokens=3000), [(0, 50), (50, 100), (100, 120)])
+        self.assertEqual(_pack_batches([], batch_size=3, max_tokens=3000), [])
+
+    def test_batch_translate_deduplicates(self):
+        """测试重复文本只翻译一次并按原位置返回。"""
+        translator = OpenAITranslator(api_key="test_key", use_cache=False)
+        translator._batch_translate = MagicMock(
+            side_effect=lambda texts, target_lang: [t.upper() for t in texts]
+        )
+
+        result = translator.batch_translate(["a", "b", "a", "a"], target_lang="zh-CN")
+
+        self.assertEqual(result, ["A", "B", "A", "A"])
+        translator._batch_translate.assert_called_once_with(["a", "b"], "zh-CN")
+
+    @patch('requests.Session.request')
+    def test_submit_batch(self, mock_request):
+        """测试通过Batch API提交并组装翻译结果。"""
+        def make_response(payload=None, text=""):
+            response = MagicMock()
+            response.content = json.dumps(payload).encode("utf-8")
+            response.text = text
+            return response
+
+        output_lines = "\n".join(
+            '{"custom_id": "%d", "response": {"status_code": 200, "body": '
+            '{"choices": [{"message": {"content": "%s"}}]}}}' % (i, content)
+            for i, content in enumerate(["你好", "世界"])
+        )
+        mock_request.side_effect = [
+            make_response({"id": "file-in"}),
+            make_response({"id": "batch-1", "status": "completed", "output_file_id": "file-out"}),
+            make_response(text=output_lines),
+        ]
+
+        translator = OpenAITranslator(api_key="test_key", use_cache=False, use_batch_api=True)
+        result = translator.batch_translate(["Hello", "World"], target_lang="zh-CN")
+
+        self.assertEqual(result, ["你好", "世界"])
+        methods_and_urls = [c.args[:2] for c in mock_request.call_args_list]
+        self.assertEqual(methods_and_urls[1], ("POST", "https://api.openai.com/v1/batches"))
+        self.assertEqual(json.loads(mock_request.call_args_list[1].kwargs["data"])["input_file_id"], "file-in")
+        self.assertEqual(translator._load_batch_jobs(), {})
+        
+        # 任务记录以_json读写
+        jobs_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, jobs_dir, ignore_errors=True)
+        translator.batch_jobs_path = os.path.join(jobs_dir, "batch_jobs.json")
+        translator._save_batch_jobs({"key": "batch-2"})
+        self.assertEqual(translator._load_batch_jobs(), {"key": "batch-2"})
+
+
+class TestTranslationCache(unittest.TestCase):
+    """测试TranslationCache类。"""
+
+    def setUp(self):
+        """设置测试环境。"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = TranslationCache(self.cache_dir)
+
+    def tearDown(self):
+        """清理测试环境。"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_key_includes_model(self):
+        """测试缓存键区分模型。"""
+        self.cache.set("Hello", "zh-CN", "你好", model="model-a")
+        self.assertEqual(self.cache.get("Hello", "zh-CN", model="model-a"), "你好")
+        self.assertIsNone(self.cache.get("Hello", "zh-CN", model="model-b"))
+        self.assertIsNone(self.cache.get("Hello", "ja", model="model-a"))
+
+    def test_export_import_ndjson(self):
+        """测试以NDJSON格式导出并重新导入缓存。"""
+        self.cache.set("Hello", "zh-CN", "你好")
+        self.cache.set("World", "zh-CN", "世界")
+        export_file = os.path.join(self.cache_dir, "export.ndjson")
+        
+        with patch('builtins.print'):
+            handle_export(self.cache, export_file)
+            self.cache.clear()
+            handle_import(self.cache, export_file, merge=False)
+        
+        with open(export_file, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.assertEqual(self.cache.get("Hello", "zh-CN"), "你好")
+        self.assertEqual(self.cache.get("World", "zh-CN"), "世界")
+
+    def test_batch_set_saves_once(self):
+        """测试批量设置缓存时在一个事务中写入数据库。"""
+        texts = [f"text {i}" for i in range(250)]
+        with patch.object(self.cache, "_store", wraps=self.cache._store) as mock_store:
+            self.cache.batch_set(texts, "zh-CN", [t.upper() for t in texts], model="m")
+        
+        mock_store.assert_called_once()
+        self.assertEqual(self.cache.get("text 42", "zh-CN", model="m"), "TEXT 42")
+
+    def test_persisted_across_instances(self):
+        """测试缓存条目写入数据库后可被新的实例读取。"""
+        self.cache.set("Hello", "zh-CN", "你好")
+        self.cache.batch_set(["World"], "zh-CN", ["世界"])
+        
+        reopened = TranslationCache(self.cache_dir)
+        self.assertEqual(reopened.get("Hello", "zh-CN"), "你好")
+        self.assertEqual(reopened.get("World", "zh-CN"), "世界")
+        reopened.close()
+
+    def test_save_only_when_dirty(self):
+        """测试没有写入时保存缓存不会访问数据库，关闭后不再在退出时保存。"""
+        self.cache.set("Hello", "zh-CN", "你好")
+        self.cache.save()
+        self.assertFalse(self.cache._dirty)
+        
+        with patch.object(self.cache, "_conn") as mock_conn:
+            self.cache.save()
+        mock_conn.execute.assert_not_called()
+        
+        self.cache.close()
+        self.cache.close()
+
+    def test_import_legacy_json(self):
+        """测试首次打开数据库时导入已发布版本的JSON缓存文件，旧键在命中时迁移到当前模型。"""
+        import hashlib
+        
+        legacy_dir = os.path.join(self.cache_dir, "legacy")
+        os.makedirs(legacy_dir)
+        # 已发布版本的缓存键为md5("原文|目标语言")，不含模型
+        key = hashlib.md5("Hello|zh-CN".encode("utf-8")).hexdigest()
+        with open(os.path.join(legacy_dir, "translation_cache.json"), "w", encoding="utf-8") as f:
+            json.dump({key: "你好"}, f)
+        
+        cache = TranslationCache(legacy_dir)
+        self.assertTrue(os.path.exists(os.path.join(legacy_dir, "translation_cache.json.bak")))
+        self.assertEqual(cache.get("Hello", "zh-CN", model="gpt-4o"), "你好")
+        cache.close()
+        
+        # 迁移后的条目保存在数据库中，旧键只迁移一次
+        cache = TranslationCache(legacy_dir)
+        self.assertEqual(list(cache.cache), [cache._generate_key("Hello", "zh-CN", "gpt-4o")])
+        self.assertIsNone(cache.get("Hello", "zh-CN", model="other"))
+        cache.close()
+
+    def test_batch_lookup(self):
+        """测试批量查询缓存返回逐项结果和未命中索引。"""
+        self.cache.set("Hello", "zh-CN", "你好", model="m")
+        results, misses = self.cache.batch_lookup(["Hello", "World", "Hello"], "zh-CN", model="m")
+        
+        self.assertEqual(results, ["你好", None, "你好"])
+        self.assertEqual(misses, [1])
+        self.assertEqual(self.cache.batch_get(["World", "Hello"], "zh-CN", model="m"), (["你好"], [1]))
+
+    def test_legacy_key_migration(self):
+        """测试已发布版本的MD5缓存键在命中时迁移为当前模型的新键。"""
+        import hashlib
+        
+        legacy_key = hashlib.md5("Hello|zh-CN".encode("utf-8")).hexdigest()
+        self.assertEqual(self.cache._legacy_key("Hello", "zh-CN"), legacy_key)
+        self.cache.import_data({legacy_key: "你好", self.cache._legacy_key("World", "zh-CN"): "世界"})
+        
+        self.assertEqual(self.cache.get("Hello", "zh-CN", model="m"), "你好")
+        self.assertNotIn(legacy_key, self.cache.cache)
+        self.assertIn(self.cache._generate_key("Hello", "zh-CN", "m"), self.cache.cache)
+        self.assertEqual(self.cache.batch_lookup(["World", "Other"], "zh-CN", model="m"), (["世界", None], [1]))
+
+    def test_concurrent_set(self):
+        """测试多个线程同时写入缓存时所有条目都被保存。"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: self.cache.set(f"text {i}", "zh-CN", f"文本 {i}"), range(200)))
+        
+        reopened = TranslationCache(self.cache_dir)
+        self.assertEqual(len(reopened.cache), 200)
+        self.assertEqual(reopened.get("text 199", "zh-CN"), "文本 199")
+        reopened.close()
+
+    def test_language_stats(self):
+        """测试语言统计使用写入时记录的目标语言，只推断导入条目的语言。"""
+        self.cache.batch_set(["Hello", "World"], "zh-CN", ["你好", "世界"])
+        self.cache.set("Hello", "ja", "こんにちは")
+        self.cache.import_data({"imported": "中文"}, merge=True)
+        
+        expected = {"zh-CN": 2, "ja": 1, "zh": 1}
+        self.assertEqual(self.cache.get_language_stats(), expected)
+        self.cache.compact()
+        self.assertEqual(self.cache.get_language_stats(), expected)
+        self.assertEqual(self.cache._detect_language("ゔカタカナ"), "ja")
+        self.assertEqual(self.cache._detect_language("Ёж"), "ru")
+
+    def test_compact(self):
+        """测试压缩缓存时删除空结果和孤立的元数据条目。"""
+        self.cache.set("Hello", "zh-CN", "你好")
+        self.cache.cache["empty"] = ""
+        self.cache.cache["__meta__missing"] = "{}"
+        
+        self.assertEqual(self.cache.compact(), 1)
+        self.assertEqual(self.cache.get("Hello", "zh-CN"), "你好")
+
+    def test_format_size(self):
+        """测试文件大小格式化。"""
+        self.assertEqual(format_size(1023), "1023 B")
+        self.assertEqual(format_size(1536), "1.5 KB")
+        self.assertEqual(format_size(3 * 1024 ** 4), "3.0 TB")
+
+
+class TestDetect(unittest.TestCase):
+    """测试文档项目类型检测。"""
+
+    def setUp(self):
+        """设置测试环境。"""
+        self.test_dir = tempfile.mkdtemp()
+        probe_sphinx_project.cache_clear()
+
+    def tearDown(self):
+        """清理测试环境。"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        probe_sphinx_project.cache_clear()
+
+    def test_is_sphinx_project(self):
+        """测试在根目录和docs子目录中检测conf.py。"""
+        self.assertFalse(is_sphinx_project(self.test_dir))
+        self.assertFalse(is_sphinx_project(os.path.join(self.test_dir, "missing")))
+        with patch("docs_translator._detect.os.scandir", side_effect=PermissionError("denied")):
+            self.assertFalse(is_sphinx_project(os.path.join(self.test_dir, "locked")))
+
+        docs_dir = os.path.join(self.test_dir, "docs")
+        os.makedirs(docs_dir)
+        open(os.path.join(docs_dir, "conf.py"), "w").close()
+        probe_sphinx_project.cache_clear()
+        self.assertTrue(is_sphinx_project(self.test_dir))
+        self.assertEqual(find_sphinx_conf(self.test_dir), os.path.join(docs_dir, "conf.py"))
+        self.assertEqual(
+            probe_sphinx_project(self.test_dir),
+            (True, os.path.join(docs_dir, "conf.py"), docs_dir)
+        )
+
+        # 解析器使用探测到的源文件目录
+        open(os.path.join(docs_dir, "index.rst"), "w").close()
+        parser = SphinxIntlParser(self.test_dir)
+        self.assertEqual(parser.get_all_files(), [os.path.join("docs", "index.rst")])
+
+
+class TestEstimate(unittest.TestCase):
+    """测试翻译开销估算。"""
+
+    def setUp(self):
+        """设置测试环境。"""
+        self.test_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.test_dir, "test.md"), "w", encoding="utf-8") as f:
+            f.write("Hello.\n\nWorld.\n\nHello.\n\n```python\nprint('Hello')\n```\n")
+        self.cache = TranslationCache(os.path.join(self.test_dir, "cache"))
+
+    def tearDown(self):
+        """清理测试环境。"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_estimate_translation(self):
+        """测试估算时去重并跳过已缓存的文本。"""
+        self.cache.set("World.", "zh-CN", "世界。", model="test-model")
+        parser = MarkdownParser(self.test_dir)
+
+        result = estimate_translation(parser, "zh-CN", "test-model", batch_size=10, cache=self.cache)
+
+        self.assertEqual(result["unique"], result["segments"] - 1)
+        self.assertEqual(result["cached"], 1)
+        self.assertEqual(result["to_translate"], result["unique"] - 1)
+        self.assertEqual(result["requests"], 1)
 
 
 class TestMarkdownParser(unittest.TestCase):
@@ -96,28 +742,545 @@ class TestMarkdownParser(unittest.TestCase):
         self.assertEqual(len(files), 1)
         self.assertEqual(files[0], "test.md")
     
+    def test_get_all_files_skip_dirs(self):
+        """测试扫描文件时跳过构建输出和依赖目录。"""
+        root = tempfile.mkdtemp()
+        try:
+            for name in ("docs", "_build", "node_modules", ".git", ".venv"):
+                os.makedirs(os.path.join(root, name))
+                open(os.path.join(root, name, "index.md"), "w").close()
+            
+            self.assertEqual(MarkdownParser(root).get_all_files(), [os.path.join("docs", "index.md")])
+        finally:
+            shutil.rmtree(root)
+    
     def test_parse_file(self):
         """测试parse_file方法。"""
         segments = self.parser.parse_file("test.md")
-        self.assertEqual(len(segments), 3)
+        self.assertEqual(len(segments), 6)
         
         # 检查段落
-        self.assertEqual(segments[0]["type"], "text")
-        self.assertEqual(segments[0]["content"], "# Test Heading\n\nTest paragraph.")
+        self.assertEqual(segments[0].type, "text")
+        self.assertEqual(segments[0].content, "# Test Heading")
+        self.assertEqual(segments[1].type, "blank")
+        self.assertEqual(segments[2].content, "Test paragraph.")
         
         # 检查代码块
-        self.assertEqual(segments[2]["type"], "code_block")
-        self.assertEqual(segments[2]["content"], "```python\nprint('Hello')\n```")
+        self.assertEqual(segments[4].type, "code_block")
+        self.assertEqual(segments[4].content, "```python\nprint('Hello')\n```")
+        
+        # 按顺序拼接片段可以还原原文
+        with open(self.test_file, encoding="utf-8") as f:
+            self.assertEqual(self.parser.build_file("test.md", segments), f.read())
+    
+    def test_tokenize(self):
+        """测试划分代码块、内联代码和段落，包括未闭合的代码块。"""
+        content = "a `b` c\n\n```py\nx\n```\n```a```b"
+        tokens = [(content[start:end], kind) for start, end, kind in _tokenize(content)]
+        self.assertEqual(tokens, [
+            ("a ", "text"), ("`b`", "inline_code"), (" c", "text"), ("\n\n", "blank"),
+            ("```py\nx\n```", "code_block"), ("\n", "blank"), ("``", "inline_code"),
+            ("`a`", "inline_code"), ("``", "inline_code"), ("b", "text")
+        ])
+    
+    def test_parse_all_async(self):
+        """测试parse_all_async并发解析文件，解析失败的文件返回None。"""
+        import asyncio
+        results = asyncio.run(self.parser.parse_all_async(["test.md", "missing.md"]))
+        
+        self.assertEqual(results[0], self.parser.parse_file("test.md"))
+        self.assertIsNone(results[1])
     
     def test_build_file(self):
         """测试build_file方法。"""
         segments = [
-            {"content": "# 测试标题\n\n测试段落。", "type": "text", "position": 0},
-            {"content": "```python\nprint('Hello')\n```", "type": "code_block", "position": 1}
+            Segment("# 测试标题\n\n测试段落。", "text", 0),
+            Segment("```python\nprint('Hello')\n```", "code_block", 1)
         ]
         
         content = self.parser.build_file("test.md", segments)
         self.assertEqual(content, "# 测试标题\n\n测试段落。```python\nprint('Hello')\n```")
+        
+        # 传入输出流时直接写入
+        out = io.StringIO()
+        self.assertIsNone(self.parser.build_file("test.md", segments, out=out))
+        self.assertEqual(out.getvalue(), content)
+        
+        # 顺序被打乱时按位置重新排序
+        content = self.parser.build_file("test.md", segments[::-1])
+        self.assertEqual(content, "# 测试标题\n\n测试段落。```python\nprint('Hello')\n```")
+
+
+
+class TestSphinxIntlParser(unittest.TestCase):
+    """测试Sphinx-intl解析器"""
+    
+    def setUp(self):
+        """测试前准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        open(os.path.join(self.temp_dir, "conf.py"), "w").close()
+        probe_sphinx_project.cache_clear()
+        self.parser = SphinxIntlParser(self.temp_dir)
+    
+    def tearDown(self):
+        """测试后清理工作"""
+        shutil.rmtree(self.temp_dir)
+        probe_sphinx_project.cache_clear()
+    
+    def test_markdown_extensions(self):
+        """测试conf.py启用myst_parser时包含Markdown扩展名"""
+        self.assertEqual(self.parser.file_extensions, [".rst", ".txt"])
+        
+        with open(os.path.join(self.temp_dir, "conf.py"), "w") as f:
+            f.write("extensions = ['myst_parser']\n")
+        probe_sphinx_project.cache_clear()
+        parser = SphinxIntlParser(self.temp_dir, config_path=os.path.join(self.temp_dir, "conf.py"))
+        self.assertEqual(parser.file_extensions, [".rst", ".txt", ".md", ".markdown"])
+    
+    @patch("docs_translator.parsers.sphinx_intl.subprocess.Popen")
+    def test_extract_messages_jobs(self, mock_popen):
+        """测试sphinx-build的-j参数可通过SPHINX_JOBS指定，文件较少时不并行"""
+        proc = mock_popen.return_value.__enter__.return_value
+        proc.stdout = iter(["reading sources...\n"])
+        proc.wait.return_value = 0
+        
+        with patch.dict(os.environ, {"SPHINX_JOBS": "4"}):
+            self.assertTrue(self.parser.extract_messages())
+        
+        cmd = mock_popen.call_args[0][0]
+        self.assertEqual(cmd[:3], ["sphinx-build", "-j", "4"])
+        self.assertEqual(cmd[cmd.index("-d") + 1], os.path.join(self.parser.doctree_dir, "gettext"))
+        
+        # 文件较少时不启用并行
+        with patch.dict(os.environ):
+            os.environ.pop("SPHINX_JOBS", None)
+            self.assertTrue(self.parser.extract_messages())
+        self.assertEqual(mock_popen.call_args[0][0][:2], ["sphinx-build", "-d"])
+    
+    def test_run_streaming(self):
+        """测试逐行读取命令输出，失败时返回最后的输出"""
+        import sys
+        from docs_translator.parsers.sphinx_intl import _run_streaming
+        
+        code = "import sys; print('line 1', flush=True); print('line 2', file=sys.stderr); sys.exit(3)"
+        with self.assertLogs("docs_translator.parsers.sphinx_intl", level="INFO") as logs:
+            returncode, output = _run_streaming([sys.executable, "-c", code])
+        self.assertEqual(returncode, 3)
+        self.assertEqual(output, "line 1\nline 2")
+        self.assertEqual([record.getMessage() for record in logs.records], ["line 1", "line 2"])
+
+
+class TestSphinxIntlProcessor(unittest.TestCase):
+    """测试Sphinx-intl处理器"""
+    
+    PO_CONTENT = (
+        'msgid ""\n'
+        'msgstr ""\n'
+        '"Content-Type: text/plain; charset=UTF-8\\n"\n'
+        '\n'
+        'msgid "Hello"\n'
+        'msgstr ""\n'
+        '\n'
+        'msgid ""\n'
+        '"Multi "\n'
+        '"line"\n'
+        'msgstr ""\n'
+        '\n'
+        'msgid "Done"\n'
+        'msgstr "完成"\n'
+    )
+    
+    def setUp(self):
+        """测试前准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.po_path = os.path.join(self.temp_dir, "index.po")
+        with open(self.po_path, "w", encoding="utf-8") as f:
+            f.write(self.PO_CONTENT)
+        
+        self.translator = MagicMock()
+        self.translator.concurrency = 8
+        self.translator.batch_translate_with_failures.side_effect = (
+            lambda texts, *args: ([f'"{text}"' for text in texts], set())
+        )
+        self.processor = SphinxIntlProcessor(MagicMock(), self.translator, os.path.join(self.temp_dir, "out"))
+    
+    def tearDown(self):
+        """测试后清理工作"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_translate_po_file_simple(self):
+        """测试不依赖polib的逐行解析翻译"""
+        self.processor._translate_po_file_simple(self.po_path)
+        
+        self.assertEqual(self.translator.batch_translate_with_failures.call_args[0][0], ["Hello", "Multi line"])
+        with open(self.po_path, encoding="utf-8") as f:
+            content = f.read()
+        expected = self.PO_CONTENT.replace(
+            'msgid "Hello"\nmsgstr ""', 'msgid "Hello"\nmsgstr "\\"Hello\\""'
+        ).replace('"line"\nmsgstr ""', '"line"\nmsgstr "\\"Multi line\\""')
+        self.assertEqual(content, expected)
+    
+    def test_translate_po_file_simple_escapes(self):
+        """测试简单模式提交还原转义后的原文，并正确转义译文"""
+        import polib
+        
+        with open(self.po_path, "w", encoding="utf-8") as f:
+            f.write('msgid "Say \\"hi\\"\\n"\nmsgstr ""\n')
+        self.translator.batch_translate_with_failures.side_effect = (
+            lambda texts, *args: ([f'{text}\\' for text in texts], set())
+        )
+        
+        self.processor._translate_po_file_simple(self.po_path)
+        
+        self.assertEqual(self.translator.batch_translate_with_failures.call_args[0][0], ['Say "hi"\n'])
+        self.assertEqual(polib.pofile(self.po_path).find('Say "hi"\n').msgstr, 'Say "hi"\n\\')
+    
+    def test_translate_po_file_dedup_and_passthrough(self):
+        """测试重复的msgid只翻译一次，不含字母的msgid沿用原文"""
+        import polib
+        
+        with open(self.po_path, "a", encoding="utf-8") as f:
+            f.write('\nmsgctxt "other"\nmsgid "Hello"\nmsgstr ""\n\nmsgid "---"\nmsgstr ""\n')
+        
+        self.assertTrue(self.processor._translate_po_file(self.po_path))
+        
+        self.assertEqual(self.translator.batch_translate_with_failures.call_args[0][0], ["Hello", "Multi line"])
+        po = polib.pofile(self.po_path)
+        self.assertEqual(po.find("Hello", msgctxt="other").msgstr, '"Hello"')
+        self.assertEqual(po.find("---").msgstr, "---")
+    
+    def test_translate_po_file_shared_translations(self):
+        """测试预翻译的映射只被读取，本文件中未预翻译的条目单独翻译"""
+        import polib
+        
+        translations = {"Hello": "你好"}
+        self.assertTrue(self.processor._translate_po_file(self.po_path, translations))
+        
+        self.assertEqual(self.translator.batch_translate_with_failures.call_args[0][0], ["Multi line"])
+        self.assertEqual(translations, {"Hello": "你好"})
+        po = polib.pofile(self.po_path)
+        self.assertEqual(po.find("Hello").msgstr, "你好")
+        self.assertEqual(po.find("Multi line").msgstr, '"Multi line"')
+    
+    def test_translate_po_file_failed_entries_left_empty(self):
+        """测试翻译失败的条目保留空的msgstr，文件不视为已完整翻译"""
+        import polib
+        
+        self.translator.batch_translate_with_failures.side_effect = (
+            lambda texts, *args: ([text.upper() for text in texts], {1})
+        )
+        
+        self.assertFalse(self.processor._translate_po_file(self.po_path))
+        po = polib.pofile(self.po_path)
+        self.assertEqual(po.find("Hello").msgstr, "HELLO")
+        self.assertEqual(po.find("Multi line").msgstr, "")
+        
+        # 简单模式同样保留空的msgstr
+        with open(self.po_path, "w", encoding="utf-8") as f:
+            f.write(self.PO_CONTENT)
+        self.processor._translate_po_file_simple(self.po_path)
+        po = polib.pofile(self.po_path)
+        self.assertEqual(po.find("Hello").msgstr, "HELLO")
+        self.assertEqual(po.find("Multi line").msgstr, "")
+    
+    def test_pretranslate_excludes_failures(self):
+        """测试预翻译失败的条目不放入映射，且返回已解析的.po文件"""
+        self.translator.batch_translate_with_failures.side_effect = (
+            lambda texts, *args: ([text.upper() for text in texts], {0})
+        )
+        
+        translations, parsed = self.processor._pretranslate([self.po_path])
+        
+        self.assertEqual(translations, {"Multi line": "MULTI LINE"})
+        self.assertEqual(list(parsed), [self.po_path])
+    
+    def test_needs_translation(self):
+        """测试不含需要翻译的文字的msgid被跳过"""
+        from docs_translator.sphinx_intl_processor import _needs_translation
+        
+        for msgid in ["---", ":", "  ", "3.14", "``foo.bar()``", ":func:`len`, ``x``"]:
+            self.assertFalse(_needs_translation(msgid), msgid)
+        for msgid in ["Hello", "Call ``foo()`` first", ":func:`len` returns", "中文"]:
+            self.assertTrue(_needs_translation(msgid), msgid)
+    
+    def test_translate_po_files_subdirectories(self):
+        """测试标准目录下子目录中的.po文件也会被翻译"""
+        po_dir = os.path.join(self.temp_dir, "locale", "zh_CN", "LC_MESSAGES")
+        os.makedirs(os.path.join(po_dir, "api"))
+        shutil.copy(self.po_path, os.path.join(po_dir, "index.po"))
+        shutil.copy(self.po_path, os.path.join(po_dir, "api", "module.po"))
+        open(os.path.join(po_dir, "index.mo"), "w").close()
+        self.processor.parser.locale_dir = os.path.join(self.temp_dir, "locale")
+        self.processor.parser.pot_dir = os.path.join(self.temp_dir, "_build", "gettext")
+        self.processor.translator.use_batch_api = False
+        
+        with patch.object(self.processor, "_translate_po_file", return_value=False) as mock_translate:
+            self.assertTrue(self.processor._translate_po_files())
+        
+        self.assertEqual(
+            sorted(call.args[0] for call in mock_translate.call_args_list),
+            [os.path.join(po_dir, "api", "module.po"), os.path.join(po_dir, "index.po")]
+        )
+    
+    def test_translate_po_files_parallel(self):
+        """测试并行翻译多个.po文件"""
+        import polib
+        
+        po_dir = os.path.join(self.temp_dir, "locale", "zh_CN", "LC_MESSAGES")
+        os.makedirs(po_dir)
+        for i in range(4):
+            shutil.copy(self.po_path, os.path.join(po_dir, f"doc{i}.po"))
+        pot_dir = os.path.join(self.temp_dir, "_build", "gettext")
+        os.makedirs(pot_dir)
+        for i in range(4):
+            open(os.path.join(pot_dir, f"doc{i}.pot"), "w").close()
+        self.processor.parser.locale_dir = os.path.join(self.temp_dir, "locale")
+        self.processor.parser.pot_dir = pot_dir
+        self.processor.translator.use_batch_api = False
+        
+        self.processor.max_workers = 2
+        with patch("polib.pofile", wraps=polib.pofile) as mock_pofile:
+            self.assertTrue(self.processor._translate_po_files())
+        
+        # 所有文件中的相同条目合并后只翻译一次，每个文件只解析一次
+        self.translator.batch_translate_with_failures.assert_called_once()
+        self.assertEqual(self.translator.batch_translate_with_failures.call_args[0][0], ["Hello", "Multi line"])
+        self.assertEqual(mock_pofile.call_count, 4)
+        
+        for i in range(4):
+            po = polib.pofile(os.path.join(po_dir, f"doc{i}.po"))
+            self.assertEqual(po.find("Hello").msgstr, '"Hello"')
+            self.assertTrue(os.path.exists(os.path.join(po_dir, f"doc{i}.po.done")))
+        
+        # 再次运行时跳过已完整翻译且未变化的文件
+        with patch.object(self.processor, "_translate_po_file") as mock_translate:
+            self.assertTrue(self.processor._translate_po_files())
+        mock_translate.assert_not_called()
+        
+        # 单个文件失败不影响其他文件，且失败的文件不会被标记为已完成
+        for i in range(4):
+            shutil.copy(self.po_path, os.path.join(po_dir, f"doc{i}.po"))
+            os.remove(os.path.join(po_dir, f"doc{i}.po.done"))
+        original = self.processor._translate_po_file
+        
+        def flaky(po_path, translations=None, po=None):
+            if po_path.endswith("doc1.po"):
+                raise RuntimeError("API error")
+            return original(po_path, translations, po)
+        
+        with patch.object(self.processor, "_translate_po_file", side_effect=flaky):
+            self.assertTrue(self.processor._translate_po_files())
+        self.assertFalse(os.path.exists(os.path.join(po_dir, "doc1.po.done")))
+        self.assertTrue(os.path.exists(os.path.join(po_dir, "doc3.po.done")))
+
+
+class TestDocumentProcessor(unittest.TestCase):
+    """测试文档处理器"""
+    
+    def setUp(self):
+        """测试前准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, "test.md"), "w", encoding="utf-8") as f:
+            f.write("Hello world\n\nHello  world \n\nOther")
+    
+    def tearDown(self):
+        """测试后清理工作"""
+        shutil.rmtree(self.temp_dir)
+        shutil.rmtree(self.output_dir)
+    
+    def test_process_file_dedup(self):
+        """测试仅空白不同的片段只翻译一次"""
+        translator = MagicMock()
+        translator.concurrency = 8
+        translator.batch_translate_with_failures.side_effect = lambda texts, *args: ([text.upper() for text in texts], set())
+        processor = DocumentProcessor(MarkdownParser(self.temp_dir), translator, self.output_dir)
+        
+        processor._process_file("test.md")
+        
+        translator.batch_translate_with_failures.assert_called_once()
+        self.assertEqual(translator.batch_translate_with_failures.call_args[0][0], ["Hello world", "Other"])
+        with open(os.path.join(self.output_dir, "test.md"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "HELLO WORLD\n\nHELLO WORLD \n\nOTHER")
+    
+    def test_process_file_atomic_write(self):
+        """测试重建文件失败时保留原有输出且不留下临时文件"""
+        os.makedirs(os.path.join(self.temp_dir, "sub"))
+        with open(os.path.join(self.temp_dir, "sub", "a.md"), "w", encoding="utf-8") as f:
+            f.write("Text")
+        translator = MagicMock()
+        translator.concurrency = 8
+        translator.batch_translate_with_failures.side_effect = lambda texts, *args: (list(texts), set())
+        parser = MarkdownParser(self.temp_dir)
+        processor = DocumentProcessor(parser, translator, self.output_dir)
+        
+        self.assertTrue(processor._process_file(os.path.join("sub", "a.md")))
+        with patch.object(parser, "build_file", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                processor._process_file(os.path.join("sub", "a.md"))
+        
+        self.assertEqual(os.listdir(os.path.join(self.output_dir, "sub")), ["a.md"])
+        with open(os.path.join(self.output_dir, "sub", "a.md"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "Text")
+    
+    def test_copy_static_files(self):
+        """测试复制静态文件，未变化的文件不重复复制"""
+        os.makedirs(os.path.join(self.temp_dir, "img", "icons"))
+        with open(os.path.join(self.temp_dir, "img", "icons", "logo.svg"), "w") as f:
+            f.write("<svg/>")
+        processor = DocumentProcessor(MarkdownParser(self.temp_dir), MagicMock(), self.output_dir)
+        
+        # 构建输出和隐藏目录不复制
+        for name in ("_build", ".git"):
+            os.makedirs(os.path.join(self.temp_dir, name))
+            open(os.path.join(self.temp_dir, name, "objects"), "w").close()
+        
+        processor._copy_static_files()
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "img", "icons", "logo.svg")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "test.md")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "_build")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, ".git")))
+        
+        with patch("docs_translator.processor.shutil.copyfile") as mock_copy:
+            processor._copy_static_files()
+        mock_copy.assert_not_called()
+        
+        # 源文件变化后重新复制
+        with open(os.path.join(self.temp_dir, "img", "icons", "logo.svg"), "w") as f:
+            f.write("<svg></svg>")
+        processor._copy_static_files()
+        with open(os.path.join(self.output_dir, "img", "icons", "logo.svg")) as f:
+            self.assertEqual(f.read(), "<svg></svg>")
+    
+    def test_process_all_skips_unchanged(self):
+        """测试再次运行时跳过内容未变化且已有输出的文件"""
+        translator = MagicMock()
+        translator.concurrency = 8
+        translator.use_batch_api = False
+        translator.batch_translate_with_failures.side_effect = lambda texts, *args: ([text.upper() for text in texts], set())
+        
+        DocumentProcessor(MarkdownParser(self.temp_dir), translator, self.output_dir).process_all()
+        self.assertEqual(translator.batch_translate_with_failures.call_count, 1)
+        
+        # 内容未变化时不再翻译
+        DocumentProcessor(MarkdownParser(self.temp_dir), translator, self.output_dir).process_all()
+        self.assertEqual(translator.batch_translate_with_failures.call_count, 1)
+        
+        # 内容变化或目标语言不同时重新翻译
+        with open(os.path.join(self.temp_dir, "test.md"), "a", encoding="utf-8") as f:
+            f.write("\n\nMore")
+        DocumentProcessor(MarkdownParser(self.temp_dir), translator, self.output_dir).process_all()
+        self.assertEqual(translator.batch_translate_with_failures.call_count, 2)
+        DocumentProcessor(
+            MarkdownParser(self.temp_dir), translator, self.output_dir, target_lang="ja"
+        ).process_all()
+        self.assertEqual(translator.batch_translate_with_failures.call_count, 3)
+    
+    @patch("docs_translator.translator.time.sleep")
+    def test_process_all_failed_translation_not_recorded(self, mock_sleep):
+        """测试API不可用时输出保留原文，但文件不记入清单，下次运行重新翻译"""
+        import requests
+        
+        translator = OpenAITranslator(api_key="test_key", use_cache=False, concurrency=1)
+        processor = DocumentProcessor(MarkdownParser(self.temp_dir), translator, self.output_dir)
+        with patch.object(translator.session, "post", side_effect=requests.ConnectionError("down")):
+            processor.process_all()
+        
+        with open(os.path.join(self.output_dir, "test.md"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "Hello world\n\nHello world \n\nOther")
+        with open(os.path.join(self.output_dir, ".docs_translator_manifest.json"), encoding="utf-8") as f:
+            self.assertNotIn("test.md", json.load(f))
+        
+        # 再次运行时文件仍需翻译
+        files, _ = DocumentProcessor(
+            MarkdownParser(self.temp_dir), MagicMock(), self.output_dir
+        )._changed_files(["test.md"])
+        self.assertEqual(files, ["test.md"])
+    
+    def test_max_workers(self):
+        """测试文件数量按翻译器并发数限制，无效的TRANSLATE_WORKERS值回退到默认值"""
+        with patch.dict(os.environ):
+            os.environ.pop("TRANSLATE_WORKERS", None)
+            self.assertEqual(_max_workers(8), 16)
+            self.assertEqual(_max_workers(2), 4)
+        with patch.dict(os.environ, {"TRANSLATE_WORKERS": "64"}):
+            self.assertEqual(_max_workers(8), 16)
+        with patch.dict(os.environ, {"TRANSLATE_WORKERS": "auto"}), self.assertLogs("docs_translator.processor", "WARNING"):
+            self.assertEqual(_max_workers(8, 4), 4)
+    
+    def test_process_all_parallel(self):
+        """测试并行处理所有文件，单个文件失败不影响其他文件"""
+        for i in range(5):
+            with open(os.path.join(self.temp_dir, f"doc{i}.md"), "w", encoding="utf-8") as f:
+                f.write(f"Doc {i}")
+        
+        def fake_translate(texts, *args):
+            if texts == ["Doc 3"]:
+                raise RuntimeError("boom")
+            return [text.upper() for text in texts], set()
+        
+        translator = MagicMock()
+        translator.concurrency = 8
+        translator.use_batch_api = False
+        translator.batch_translate_with_failures.side_effect = fake_translate
+        processor = DocumentProcessor(MarkdownParser(self.temp_dir), translator, self.output_dir)
+        
+        with patch.dict(os.environ, {"TRANSLATE_WORKERS": "4"}):
+            processor.process_all()
+        
+        for i in range(5):
+            with open(os.path.join(self.output_dir, f"doc{i}.md"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), f"Doc {i}" if i == 3 else f"DOC {i}")
+        
+        # 通过事件循环驱动时结果相同
+        shutil.rmtree(self.output_dir)
+        processor = DocumentProcessor(
+            MarkdownParser(self.temp_dir), translator, self.output_dir, use_async=True
+        )
+        with patch.dict(os.environ, {"TRANSLATE_WORKERS": "4"}):
+            processor.process_all()
+        
+        for i in range(5):
+            with open(os.path.join(self.output_dir, f"doc{i}.md"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), f"Doc {i}" if i == 3 else f"DOC {i}")
+
+
+class TestCLI(unittest.TestCase):
+    """测试命令行参数解析"""
+    
+    def test_parse_args(self):
+        """测试版本查询和完整参数解析"""
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with self.assertRaises(SystemExit) as cm:
+                parse_args(["--version"])
+        self.assertEqual(cm.exception.code, 0)
+        self.assertIn("docs_translator", stdout.getvalue())
+        
+        args = parse_args(["src", "out", "--batch-size", "5"])
+        self.assertEqual(args.source_dir, "src")
+        self.assertEqual(args.output_dir, "out")
+        self.assertEqual(args.batch_size, 5)
+        self.assertEqual(args.doc_type, "auto")
+    
+    def test_dry_run_uses_probed_sphinx_dirs(self):
+        """测试估算模式使用探测到的conf.py和源文件目录"""
+        from docs_translator.cli import dry_run
+        
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir, ignore_errors=True)
+        docs_dir = os.path.join(test_dir, "docs")
+        os.makedirs(docs_dir)
+        open(os.path.join(docs_dir, "conf.py"), "w").close()
+        
+        args = parse_args([test_dir, os.path.join(test_dir, "out"), "--dry-run"])
+        result = {"segments": 0, "unique": 0, "cached": 0, "to_translate": 0, "requests": 0, "tokens": 0}
+        with patch("docs_translator.estimate.estimate_translation", return_value=result) as mock_estimate, \
+                patch("sys.stdout", new_callable=io.StringIO):
+            self.assertEqual(dry_run(args, True, os.path.join(docs_dir, "conf.py"), docs_dir), 0)
+        
+        parser = mock_estimate.call_args[0][0]
+        self.assertEqual(parser.config_path, os.path.join(docs_dir, "conf.py"))
+        self.assertEqual(parser._source_dir, docs_dir)
 
 
 if __name__ == "__main__":